@@ -0,0 +1,435 @@
+# benchmark.py
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from processor import InterferenceProcessor, DEFAULT_ZONE_ORDER, ENGINES, PROCESSOR_VERSION, REQUIRED_COLS
+from readers import lettori_disponibili, seleziona_lettore
+
+# =============================================================================
+# CONFIGURAZIONE DI DEFAULT
+# =============================================================================
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+STAGES = ["load_data", "filter_dynamic_interference", "process", "write_chart_config", "write_summary"]
+ORDINALI = {1: ("", "1st"), 2: ("2nd",), 3: ("3rd",)}
+# Eseguibile PyInstaller one-file (pyinstaller main.py --onefile): misurato con --startup se presente
+DEFAULT_FROZEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dist",
+                              "main.exe" if os.name == "nt" else "main")
+STARTUP_ROWS = 10_000
+
+
+def genera_foglio_sintetico(
+    n_motori: int = 40,
+    n_coppie: int = 100,
+    pagine_per_zona: int = 4,
+    zone_per_coppia: int = 2,
+    quota_underscore: float = 0.3,
+    righe_rumore: int = 1000,
+    n_prefissi: int = 2,
+    zone_order=None,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Genera un foglio "Variabili" sintetico con le colonne REQUIRED_COLS.
+    - n_motori: motori distinti; quota_underscore di essi ha un nome con underscore
+      (es. "MOT_007") e le sue righe StartNo/EndNo usano a caso il root con o senza underscore
+    - n_coppie: righe DynamicInterference "<P>_<motA>_<P>_<motB>"
+    - pagine_per_zona: pagine "<Zona>_<n>" per ogni zona di zone_order
+    - zone_per_coppia: zone StartNo/EndNo per motore e coppia (ordinali 1st/2nd/3rd, max 3)
+    - righe_rumore: righe non pertinenti (DataType INT)
+    Le righe vengono mescolate con un seed fisso: stessi parametri, stesso foglio.
+    """
+    rnd = random.Random(seed)
+    zone_order = zone_order or DEFAULT_ZONE_ORDER
+    zone_per_coppia = max(0, min(zone_per_coppia, 3))
+
+    motori = [
+        f"MOT_{i:03d}" if rnd.random() < quota_underscore else f"MOT{i:03d}"
+        for i in range(max(n_motori, 2))
+    ]
+    prefissi = [f"MC{i + 1}" for i in range(max(n_prefissi, 1))]
+    pagine = [f"{z}_{n + 1}" for z in zone_order for n in range(max(pagine_per_zona, 1))]
+
+    radici, estensioni, tipi, oggetti, indici, nuove_pagine = [], [], [], [], [], []
+
+    def aggiungi(radice, estensione, tipo, oggetto, indice, pagina):
+        radici.append(radice)
+        estensioni.append(estensione)
+        tipi.append(tipo)
+        oggetti.append(oggetto)
+        indici.append(indice)
+        nuove_pagine.append(pagina)
+
+    indice = 0
+    for n in range(n_coppie):
+        prefix = rnd.choice(prefissi)
+        motA, motB = rnd.sample(motori, 2)
+        aggiungi(f"{prefix}_{motA}_{prefix}_{motB}", f"DynamicInterference_{n}", "BOOL",
+                 "DB10;BOOL", n, pagine[n % len(pagine)])
+
+        for motX, motY in ((motA, motB), (motB, motA)):
+            radice = f"{prefix}_{motX}" if rnd.random() < 0.5 else f"{prefix}_{motX.replace('_', '')}"
+            for ordinal in range(1, zone_per_coppia + 1):
+                suffisso = rnd.choice(ORDINALI[ordinal])
+                indice += 2
+                aggiungi(radice, f"StartNo{suffisso}Interference_{motY}", "BOOL", "DB20;BOOL", indice, None)
+                aggiungi(radice, f"EndNo{suffisso}Interference_{motY}", "BOOL", "DB20;BOOL", indice + 1, None)
+
+    for n in range(righe_rumore):
+        aggiungi(f"{prefissi[n % len(prefissi)]}_AUX{n}", f"Param_{n % 50}", "INT", "DB30;INT", n, None)
+
+    df = pd.DataFrame({
+        "DescrizioneRadice": radici,
+        "DescrizioneEstensione": estensioni,
+        "DataType": tipi,
+        "ObjectType": oggetti,
+        "Index": indici,
+        "New Page": nuove_pagine,
+    }, columns=REQUIRED_COLS)
+    ordine = np.random.default_rng(seed).permutation(len(df))
+    return df.iloc[ordine].reset_index(drop=True)
+
+
+def parametri_per_righe(righe: int, zone_per_coppia: int = 2, quota_rumore: float = 0.5) -> dict:
+    """
+    Parametri di genera_foglio_sintetico() per ottenere circa `righe` righe totali:
+    ogni coppia produce 1 riga DynamicInterference + 4 righe per zona, il resto è rumore.
+    """
+    righe_per_coppia = 1 + 4 * zone_per_coppia
+    n_coppie = max(1, int(righe * (1 - quota_rumore)) // righe_per_coppia)
+    return {
+        "n_coppie": n_coppie,
+        "n_motori": max(10, int(n_coppie ** 0.5) * 4),
+        "pagine_per_zona": max(1, n_coppie // len(DEFAULT_ZONE_ORDER)),
+        "zone_per_coppia": zone_per_coppia,
+        "righe_rumore": max(0, righe - n_coppie * righe_per_coppia),
+    }
+
+
+def misura_fasi(df: pd.DataFrame, excel_path: str, engine: str, out_dir: str, memoria: bool) -> dict:
+    """
+    Cronometra separatamente le fasi di InterferenceProcessor su un foglio.
+    Se excel_path è None la fase load_data viene saltata e df è usato direttamente.
+    Nota: process() include al suo interno un nuovo filter_dynamic_interference().
+    """
+    def nuovo_processor():
+        return InterferenceProcessor(
+            excel_path=excel_path or "",
+            sheet_name="Variabili",
+            output_chart=os.path.join(out_dir, "chart_config.txt"),
+            output_summary=os.path.join(out_dir, "interferences_summary.txt"),
+            engine=engine,
+        )
+
+    def esegui(p, fase):
+        if fase == "load_data":
+            p.load_data()
+        else:
+            if p.df_vars is None:
+                p.df_vars = df
+            getattr(p, fase)()
+
+    risultati = {}
+    for passaggio in ("tempo", "memoria") if memoria else ("tempo",):
+        p = nuovo_processor()
+        for fase in STAGES:
+            if fase == "load_data" and excel_path is None:
+                continue
+            if passaggio == "tempo":
+                inizio = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    esegui(p, fase)
+                secondi = time.perf_counter() - inizio
+                risultati[fase] = {
+                    "seconds": secondi,
+                    "rows_per_second": len(df) / secondi if secondi > 0 else None,
+                }
+            else:
+                tracemalloc.start()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    esegui(p, fase)
+                _, picco = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                risultati[fase]["peak_bytes"] = picco
+    return risultati
+
+
+def misura_lettori(df: pd.DataFrame, excel_path: str) -> dict:
+    """
+    Tempo di lettura del foglio con ogni backend installato (readers.py):
+    il workbook .xlsx e la sua esportazione .csv (scritta accanto, se assente).
+    Restituisce {"<lettore> <ext>": secondi}.
+    """
+    csv_path = os.path.splitext(excel_path)[0] + ".csv"
+    if not os.path.isfile(csv_path):
+        df.to_csv(csv_path, index=False, sep=";")
+
+    risultati = {}
+    for percorso in (excel_path, csv_path):
+        ext = os.path.splitext(percorso)[1].lower()
+        for nome in lettori_disponibili(percorso):
+            lettore = seleziona_lettore(percorso, nome)
+            inizio = time.perf_counter()
+            lettore.leggi(percorso, "Variabili")
+            risultati[f"{nome} {ext}"] = time.perf_counter() - inizio
+    return risultati
+
+
+def esegui_benchmark(
+    sizes=None,
+    engines=("classic",),
+    max_load_rows: int = 100_000,
+    memoria: bool = True,
+    work_dir: str = None,
+    seed: int = 0,
+    lettori: bool = False,
+    stampa=print,
+) -> dict:
+    """
+    Sweep sulle dimensioni richieste. Il workbook .xlsx viene scritto (e riusato se già
+    presente in work_dir) solo fino a max_load_rows righe: oltre, load_data non è misurato.
+    Con lettori=True misura anche la lettura con ogni backend di readers.py.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    work_dir = work_dir or os.path.join(tempfile.gettempdir(), "interference_benchmark")
+    os.makedirs(work_dir, exist_ok=True)
+
+    risultati = []
+    for righe in sizes:
+        parametri = parametri_per_righe(righe)
+        df = genera_foglio_sintetico(seed=seed, **parametri)
+
+        excel_path = None
+        if righe <= max_load_rows:
+            excel_path = os.path.join(work_dir, f"synthetic_{righe}_{seed}.xlsx")
+            if not os.path.isfile(excel_path):
+                stampa(f"Scrittura workbook sintetico da {len(df)} righe…")
+                df.to_excel(excel_path, sheet_name="Variabili", index=False, engine="openpyxl")
+
+        for engine in engines:
+            fasi = misura_fasi(df, excel_path, engine, work_dir, memoria)
+            risultati.append({
+                "rows": len(df),
+                "engine": engine,
+                "params": parametri,
+                "stages": fasi,
+            })
+            stampa(formatta_riga(risultati[-1]))
+
+        if lettori and excel_path is not None:
+            tempi = misura_lettori(df, excel_path)
+            risultati.append({"rows": len(df), "engine": "readers", "params": parametri, "readers": tempi})
+            stampa(formatta_lettori(len(df), tempi))
+
+    return {
+        "processor_version": PROCESSOR_VERSION,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": seed,
+        "results": risultati,
+    }
+
+
+def misura_avvio(build: str, comando: list, workbook: str, ripetizioni: int = 3,
+                 work_dir: str = None, timeout: float = 300) -> dict:
+    """
+    Avvia la GUI (sorgente o build congelata) `ripetizioni` volte e misura, dal lancio del processo:
+    - window_seconds: comparsa della finestra
+    - generation_seconds: fine della prima generazione su `workbook`
+    I tempi sono scritti dalla GUI nel file indicato da STARTUP_PROBE_ENV; si riportano le mediane.
+    """
+    # Importato solo qui: gui richiede tkinter, che non serve agli altri benchmark
+    from gui import STARTUP_PROBE_ENV, STARTUP_WORKBOOK_ENV
+
+    work_dir = work_dir or tempfile.gettempdir()
+    sonda = os.path.join(work_dir, f"startup_probe_{build}.json")
+    env = dict(os.environ, **{STARTUP_PROBE_ENV: sonda, STARTUP_WORKBOOK_ENV: workbook})
+
+    misure = []
+    for _ in range(ripetizioni):
+        if os.path.exists(sonda):
+            os.remove(sonda)
+        avvio = time.time()
+        subprocess.run(comando, env=env, timeout=timeout, check=False)
+        try:
+            with open(sonda, encoding="utf-8") as f:
+                tempi = json.load(f)
+        except (OSError, ValueError):
+            raise RuntimeError(f"La GUI ({build}) non ha scritto i tempi di avvio in '{sonda}'")
+        if tempi.get("error"):
+            raise RuntimeError(f"Generazione fallita all'avvio ({build}): {tempi['error']}")
+        misure.append({
+            "window_seconds": tempi["window"] - avvio,
+            "generation_seconds": tempi["generation"] - avvio,
+        })
+
+    return {
+        "build": build,
+        "command": comando,
+        "window_seconds": statistics.median(m["window_seconds"] for m in misure),
+        "generation_seconds": statistics.median(m["generation_seconds"] for m in misure),
+        "runs": misure,
+    }
+
+
+def esegui_benchmark_avvio(frozen: str = None, workbook: str = None, ripetizioni: int = 3,
+                           work_dir: str = None, seed: int = 0, stampa=print) -> dict:
+    """
+    Tempi di avvio della GUI da sorgente (python main.py) e, se disponibile, della build PyInstaller.
+    Senza workbook viene usato un foglio sintetico da STARTUP_ROWS righe.
+    """
+    work_dir = work_dir or os.path.join(tempfile.gettempdir(), "interference_benchmark")
+    os.makedirs(work_dir, exist_ok=True)
+    if workbook is None:
+        workbook = os.path.join(work_dir, f"synthetic_{STARTUP_ROWS}_{seed}.xlsx")
+        if not os.path.isfile(workbook):
+            df = genera_foglio_sintetico(seed=seed, **parametri_per_righe(STARTUP_ROWS))
+            df.to_excel(workbook, sheet_name="Variabili", index=False, engine="openpyxl")
+
+    build = [("source", [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")])]
+    frozen = frozen or (DEFAULT_FROZEN if os.path.isfile(DEFAULT_FROZEN) else None)
+    if frozen:
+        build.append(("frozen", [os.path.abspath(frozen)]))
+
+    risultati = []
+    for nome, comando in build:
+        r = misura_avvio(nome, comando, os.path.abspath(workbook), ripetizioni, work_dir)
+        risultati.append(r)
+        stampa(f"{nome:<8} finestra={r['window_seconds']:.2f}s  prima generazione={r['generation_seconds']:.2f}s")
+
+    return {
+        "processor_version": PROCESSOR_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "startup": risultati,
+    }
+
+
+def formatta_riga(r: dict) -> str:
+    parti = [f"{r['rows']:>9} righe  {r['engine']:<10}"]
+    for fase in STAGES:
+        if fase in r["stages"]:
+            s = r["stages"][fase]
+            memoria = f" {s['peak_bytes'] / 1024 / 1024:.1f}MB" if "peak_bytes" in s else ""
+            parti.append(f"{fase}={s['seconds']:.3f}s{memoria}")
+    return "  ".join(parti)
+
+
+def formatta_lettori(righe: int, tempi: dict) -> str:
+    """
+    Tempi di lettura per backend, con il rapporto di velocità rispetto a openpyxl sul .xlsx.
+    """
+    riferimento = tempi.get("openpyxl .xlsx")
+    parti = [f"{righe:>9} righe  {'readers':<10}"]
+    for nome, secondi in sorted(tempi.items(), key=lambda v: v[1]):
+        rapporto = f" (x{riferimento / secondi:.1f})" if riferimento and secondi else ""
+        parti.append(f"{nome}={secondi:.3f}s{rapporto}")
+    return "  ".join(parti)
+
+
+def confronta(attuale: dict, riferimento: dict, soglia: float = 1.2, stampa=print) -> int:
+    """
+    Confronta due risultati (stesse righe/engine/fase) e segnala le fasi più lente
+    di `soglia` volte rispetto al riferimento. Restituisce il numero di regressioni.
+    """
+    rif = {(r["rows"], r["engine"]): r.get("stages", {}) for r in riferimento.get("results", [])}
+    regressioni = 0
+    for r in attuale.get("results", []):
+        base = rif.get((r["rows"], r["engine"]))
+        if base is None:
+            continue
+        for fase, s in r.get("stages", {}).items():
+            if fase not in base or not base[fase]["seconds"]:
+                continue
+            rapporto = s["seconds"] / base[fase]["seconds"]
+            if rapporto > soglia:
+                regressioni += 1
+                stampa(f"[REGRESSIONE] {r['rows']} righe {r['engine']} {fase}: x{rapporto:.2f}")
+
+    rif_avvio = {r["build"]: r for r in riferimento.get("startup", [])}
+    for r in attuale.get("startup", []):
+        base = rif_avvio.get(r["build"])
+        if base is None:
+            continue
+        for misura in ("window_seconds", "generation_seconds"):
+            if not base.get(misura):
+                continue
+            rapporto = r[misura] / base[misura]
+            if rapporto > soglia:
+                regressioni += 1
+                stampa(f"[REGRESSIONE] avvio {r['build']} {misura}: x{rapporto:.2f}")
+    return regressioni
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark di InterferenceProcessor su fogli sintetici.")
+    parser.add_argument(
+        "--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="Dimensioni del foglio (righe) separate da virgole",
+    )
+    parser.add_argument("--engine", nargs="+", choices=ENGINES, default=["classic"])
+    parser.add_argument("--max-load-rows", type=int, default=100_000,
+                        help="Oltre questa dimensione load_data non viene misurato (scrittura .xlsx troppo lenta)")
+    parser.add_argument("--no-memory", action="store_true", help="Non misurare il picco di memoria")
+    parser.add_argument("--readers", action="store_true",
+                        help="Confronta i backend di lettura installati (readers.py) su .xlsx e .csv")
+    parser.add_argument("--work-dir", default=None, help="Cartella per workbook sintetici e output")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json", help="File JSON dei risultati")
+    parser.add_argument("--compare", default=None, help="JSON di riferimento per rilevare regressioni")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Rapporto di rallentamento tollerato")
+    parser.add_argument("--startup", action="store_true",
+                        help="Misura i tempi di avvio della GUI (finestra e prima generazione) invece delle fasi")
+    parser.add_argument("--frozen", default=None, help=f"Eseguibile PyInstaller da misurare (default: {DEFAULT_FROZEN} se esiste)")
+    parser.add_argument("--startup-workbook", default=None, help="Workbook per la prima generazione (default: sintetico)")
+    parser.add_argument("--repeat", type=int, default=3, help="Avvii per build (si riporta la mediana)")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        risultato = esegui_benchmark_avvio(
+            frozen=args.frozen,
+            workbook=args.startup_workbook,
+            ripetizioni=args.repeat,
+            work_dir=args.work_dir,
+            seed=args.seed,
+        )
+    else:
+        risultato = esegui_benchmark(
+            sizes=[int(s) for s in args.sizes.split(",") if s.strip()],
+            engines=args.engine,
+            max_load_rows=args.max_load_rows,
+            memoria=not args.no_memory,
+            work_dir=args.work_dir,
+            seed=args.seed,
+            lettori=args.readers,
+        )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(risultato, f, indent=2)
+    print(f"Risultati salvati in {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            riferimento = json.load(f)
+        return 1 if confronta(risultato, riferimento, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+# cache.py
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+
+# =============================================================================
+# CONFIGURAZIONE DI DEFAULT
+# =============================================================================
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+
+# pyarrow è facoltativo: senza, la cache dei fogli non salva né trova voci
+ARROW_DISPONIBILE = importlib.util.find_spec("pyarrow") is not None
+
+
+def default_cache_dir(sottocartella: str = "workbooks") -> str:
+    """
+    Cartella di cache per utente: %LOCALAPPDATA% su Windows, ~/.cache altrove.
+    """
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "InterferenceCreator", sottocartella)
+
+
+class CartellaCache:
+    """
+    Cartella di voci (un file per chiave) con dimensione massima complessiva ed eviction LRU
+    (l'mtime del file di una voce è aggiornato ad ogni lettura).
+    Base di WorkbookCache e di store.ResultStore. Nessuna voce è letta con pickle:
+    chi può scrivere nella cartella non può far eseguire codice a GUI o servizio.
+    """
+
+    SUFFIX = ""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _percorso(self, chiave: str) -> str:
+        return os.path.join(self.cache_dir, chiave + self.SUFFIX)
+
+    def _scrivi(self, chiave: str, scrittore):
+        """
+        Salva la voce: scrittore(percorso) scrive un file temporaneo che viene poi
+        rinominato in modo atomico; infine applica il limite di dimensione.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            scrittore(tmp)
+            os.replace(tmp, self._percorso(chiave))
+        except Exception:
+            self._rimuovi(tmp)
+            raise
+        self.applica_limite()
+
+    def voci(self):
+        """
+        Elenco delle voci in cache come (percorso, dimensione, ultimo_uso), dalla più vecchia.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+        risultato = []
+        for nome in os.listdir(self.cache_dir):
+            if not nome.endswith(self.SUFFIX):
+                continue
+            percorso = os.path.join(self.cache_dir, nome)
+            try:
+                st = os.stat(percorso)
+            except OSError:
+                continue
+            risultato.append((percorso, st.st_size, st.st_mtime))
+        risultato.sort(key=lambda v: v[2])
+        return risultato
+
+    def dimensione_totale(self) -> int:
+        return sum(size for _, size, _ in self.voci())
+
+    def applica_limite(self):
+        """
+        Elimina le voci usate meno di recente finché la cache supera max_bytes.
+        """
+        voci = self.voci()
+        totale = sum(size for _, size, _ in voci)
+        for percorso, size, _ in voci:
+            if totale <= self.max_bytes:
+                break
+            self._rimuovi(percorso)
+            totale -= size
+
+    def clear(self) -> int:
+        """
+        Svuota la cache. Restituisce il numero di voci eliminate.
+        """
+        voci = self.voci()
+        for percorso, _, _ in voci:
+            self._rimuovi(percorso)
+        return len(voci)
+
+    @staticmethod
+    def _rimuovi(percorso: str):
+        try:
+            os.remove(percorso)
+        except OSError:
+            pass
+
+
+class WorkbookCache(CartellaCache):
+    """
+    Cache su disco dei fogli Excel già letti, in formato colonnare Arrow IPC (feather, richiede pyarrow).
+    - la chiave combina percorso, dimensione, mtime, hash del contenuto, nome del foglio
+      ed eventuale variante di lettura: se il file cambia, la voce non viene più trovata
+    - dimensione massima complessiva con eviction LRU (vedi CartellaCache)
+    - le colonne object con tipi misti (es. pagine numeriche e testuali) non hanno un tipo Arrow:
+      sono salvate come testo JSON di ogni cella e ricostruite identiche alla lettura
+    """
+
+    SUFFIX = ".feather"
+    META_JSON = b"interference_colonne_json"
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(cache_dir or default_cache_dir(), max_bytes)
+
+    @staticmethod
+    def hash_contenuto(path: str) -> str:
+        """
+        Hash SHA-256 del contenuto del file, letto a blocchi da 1 MB.
+        """
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for blocco in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(blocco)
+        return h.hexdigest()
+
+    def chiave(self, path: str, sheet_name: str, variante: str = "") -> str:
+        """
+        Restituisce la chiave di cache per (file, foglio, variante).
+        """
+        st = os.stat(path)
+        parti = [
+            os.path.abspath(path),
+            str(st.st_size),
+            str(st.st_mtime_ns),
+            self.hash_contenuto(path),
+            str(sheet_name),
+            variante,
+        ]
+        return hashlib.sha256("\x1f".join(parti).encode("utf-8")).hexdigest()
+
+    def carica(self, path: str, sheet_name: str, variante: str = ""):
+        """
+        Restituisce il DataFrame in cache oppure None se assente / non leggibile.
+        """
+        if not ARROW_DISPONIBILE:
+            return None
+        file_cache = self._percorso(self.chiave(path, sheet_name, variante))
+        if not os.path.isfile(file_cache):
+            return None
+        # Import locali: la GUI importa questo modulo prima che pandas sia caricato
+        import pyarrow.feather as feather
+
+        try:
+            tabella = feather.read_table(file_cache)
+            colonne_json = json.loads((tabella.schema.metadata or {}).get(self.META_JSON, b"[]"))
+            df = tabella.to_pandas()
+            for col in colonne_json:
+                df[col] = df[col].map(json.loads).astype(object)
+        except Exception:
+            # Voce corrotta (es. scrittura interrotta): la si scarta
+            self._rimuovi(file_cache)
+            return None
+        # Segna la voce come usata di recente per l'eviction LRU
+        os.utime(file_cache)
+        return df
+
+    def salva(self, path: str, sheet_name: str, df, variante: str = ""):
+        """
+        Salva il DataFrame in cache, poi applica il limite di dimensione.
+        Solleva RuntimeError senza pyarrow e ValueError se una colonna mista contiene
+        valori non rappresentabili in JSON (es. date).
+        """
+        if not ARROW_DISPONIBILE:
+            raise RuntimeError("La cache dei fogli richiede pyarrow (pip install pyarrow)")
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        colonne_json = []
+        for col in df.columns:
+            if df[col].dtype != object:
+                continue
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                colonne_json.append(col)
+        if colonne_json:
+            df = df.copy()
+            for col in colonne_json:
+                try:
+                    df[col] = df[col].map(json.dumps)
+                except TypeError as e:
+                    raise ValueError(f"Colonna '{col}' non rappresentabile nella cache: {e}") from None
+
+        tabella = pa.Table.from_pandas(df)
+        tabella = tabella.replace_schema_metadata(
+            {**(tabella.schema.metadata or {}), self.META_JSON: json.dumps(colonne_json).encode("utf-8")}
+        )
+        self._scrivi(self.chiave(path, sheet_name, variante), lambda tmp: feather.write_feather(tabella, tmp))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gestione della cache dei fogli Excel già letti.")
+    parser.add_argument("--dir", default=None, help="Cartella di cache (default: cartella utente)")
+    parser.add_argument("--clear", action="store_true", help="Svuota la cache")
+    args = parser.parse_args(argv)
+
+    cache = WorkbookCache(cache_dir=args.dir)
+    if args.clear:
+        print(f"Voci eliminate: {cache.clear()}")
+    else:
+        voci = cache.voci()
+        print(f"Cartella: {cache.cache_dir}")
+        print(f"Voci: {len(voci)} - {sum(size for _, size, _ in voci) / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
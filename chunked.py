@@ -0,0 +1,295 @@
+# chunked.py
+
+import heapq
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from processor import InterferenceProcessor, CHART_NAMES, REQUIRED_COLS
+from readers import seleziona_lettore
+from records import RigaChart, RigaSummary
+
+# =============================================================================
+# CONFIGURAZIONE DI DEFAULT
+# =============================================================================
+SPOOL_ROWS = 20_000   # righe tenute in memoria prima di scaricarle sul file temporaneo delle partizioni
+
+# Colonne del foglio usate da una partizione (le altre righe non servono alla generazione)
+COL_ROOT = REQUIRED_COLS.index("DescrizioneRadice")
+COL_DESCR = REQUIRED_COLS.index("DescrizioneEstensione")
+COL_TYPE = REQUIRED_COLS.index("DataType")
+COL_PAGE = REQUIRED_COLS.index("New Page")
+
+
+def tipo_valore(v) -> int:
+    """
+    Classe del valore per ricostruire il dtype che pandas darebbe all'intera colonna:
+    0 = intero, 1 = mancante/decimale (float), 2 = testo o altro (object).
+    """
+    if v is None:
+        return 1
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        return 2
+    if isinstance(v, float):
+        return 1
+    return 0
+
+
+def colonna(valori: list, tipo: int) -> pd.Series:
+    """
+    Serie con il dtype dell'intera colonna del foglio (int64, float64 o object),
+    così ogni partizione converte pagine e Index esattamente come il foglio completo.
+    """
+    if tipo == 0:
+        try:
+            return pd.Series(valori, dtype="int64")
+        except OverflowError:
+            return pd.Series(valori, dtype=object)
+    valori = [np.nan if v is None else v for v in valori]
+    if tipo == 1:
+        return pd.Series(valori, dtype="float64")
+    return pd.Series(valori, dtype=object)
+
+
+class ChunkedProcessor(InterferenceProcessor):
+    """
+    Variante di InterferenceProcessor per fogli molto grandi: il foglio non viene mai
+    tenuto in memoria per intero.
+    - load_data() scorre il foglio una riga alla volta (readers.scorri_righe) e tiene solo
+      le righe StartNo/EndNo e DynamicInterference, divise per prefisso macchina
+      (primo token di DescrizioneRadice, il prefix di estrai_motori_da_root) e scaricate
+      a blocchi su un file temporaneo
+    - process() assegna prima gli slot ChartLeft/Right/Center su tutte le righe dinamiche
+      (il contatore per pagina attraversa le partizioni), poi elabora una partizione alla volta
+      e fonde i risultati già ordinati con una k-way merge su (zone_idx, idx_num)
+    Il picco di memoria è quello della partizione più grande (più le righe di output);
+    il risultato è identico a InterferenceProcessor. La cache dei fogli non viene usata.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spool = None       # file temporaneo con i blocchi pickle delle partizioni
+        self.partizioni = {}    # prefix -> [offset dei blocchi nello spool]
+        self.dinamiche = []     # (root, New Page) di ogni riga DynamicInterference, in ordine di foglio
+        self.tipi = []          # tipo_valore massimo per colonna di REQUIRED_COLS
+
+    # -------------------------------------------------------------------------
+    # Lettura
+    # -------------------------------------------------------------------------
+    def load_data(self):
+        """
+        Scorre il foglio e distribuisce le righe utili nelle partizioni su disco.
+        Ogni riga salvata porta con sé il suo numero d'ordine tra le righe dinamiche (-1 se zona).
+        """
+        if not os.path.isfile(self.excel_path):
+            raise FileNotFoundError(f"File non trovato: '{self.excel_path}'")
+
+        lettore = seleziona_lettore(self.excel_path, self.reader)
+        self.stats.reader = lettore.nome
+        self.chiudi_spool()
+        self.spool = tempfile.TemporaryFile()
+        self.partizioni = {}
+        self.dinamiche = []
+        tipi = [0] * len(REQUIRED_COLS)
+        buffer = {}
+        in_buffer = 0
+        righe_lette = 0
+
+        for valori in lettore.scorri_righe(self.excel_path, self.sheet_name):
+            righe_lette += 1
+            for i, v in enumerate(valori):
+                if tipi[i] < 2:
+                    t = tipo_valore(v)
+                    if t > tipi[i]:
+                        tipi[i] = t
+
+            descr = valori[COL_DESCR]
+            if not isinstance(descr, str):
+                continue
+            root = valori[COL_ROOT]
+            seq = -1
+            if valori[COL_TYPE] == "BOOL" and "DynamicInterference" in descr:
+                seq = len(self.dinamiche)
+                self.dinamiche.append((root, valori[COL_PAGE]))
+            elif not descr.startswith(("StartNo", "EndNo")):
+                continue
+            if not isinstance(root, str):
+                # Root mancante: le zone non sono raggiungibili, le righe dinamiche restano nel pre-passaggio
+                continue
+
+            buffer.setdefault(root.split("_")[0], []).append((*valori, seq))
+            in_buffer += 1
+            if in_buffer >= SPOOL_ROWS:
+                self._scarica(buffer)
+                in_buffer = 0
+            if righe_lette % SPOOL_ROWS == 0:
+                self.controlla_annullamento()
+        self._scarica(buffer)
+
+        self.tipi = tipi
+        self.stats.rows_read = righe_lette
+        self.df_vars = None
+        self.tabella_zone = None
+        self.indice_zone = None
+
+    def _scarica(self, buffer: dict):
+        for prefix, righe in buffer.items():
+            self.partizioni.setdefault(prefix, []).append(self.spool.tell())
+            pickle.dump(righe, self.spool, protocol=pickle.HIGHEST_PROTOCOL)
+        buffer.clear()
+
+    def carica_partizione(self, prefix: str) -> pd.DataFrame:
+        """
+        Rilegge dallo spool le righe della partizione come DataFrame di REQUIRED_COLS
+        (con i dtype dell'intero foglio) più la colonna "seq" (-1 per le righe StartNo/EndNo).
+        """
+        righe = []
+        for offset in self.partizioni[prefix]:
+            self.spool.seek(offset)
+            righe.extend(pickle.load(self.spool))
+        colonne = list(zip(*righe))
+        del righe
+        df = pd.DataFrame({
+            c: colonna(list(valori), tipo) for c, valori, tipo in zip(REQUIRED_COLS, colonne, self.tipi)
+        })
+        df["seq"] = np.array(colonne[-1], dtype=np.int64)
+        return df
+
+    def chiudi_spool(self):
+        if self.spool is not None:
+            self.spool.close()
+            self.spool = None
+
+    # -------------------------------------------------------------------------
+    # Elaborazione
+    # -------------------------------------------------------------------------
+    def assegna_slot(self) -> np.ndarray:
+        """
+        Pre-passaggio su tutte le righe dinamiche, nell'ordine del foglio e con gli stessi
+        controlli e avvisi del ciclo classico: restituisce l'array (righe, 2) dello slot
+        del grafico di motA e motB (-1 = riga o motore scartato).
+        """
+        self.stats.dynamic_rows = len(self.dinamiche)
+        if not self.dinamiche:
+            raise RuntimeError("Nessuna riga con DynamicInterference trovata.")
+
+        roots, pagine = zip(*self.dinamiche)
+        pagine = colonna(list(pagine), self.tipi[COL_PAGE]).astype(object).map(str).str.strip()
+        slot = np.full((len(roots), 2), -1, dtype=np.int8)
+        page_chart_counter = {}
+        for seq, (root, pagina) in enumerate(zip(roots, pagine)):
+            if not pagina:
+                self.stats.pages_skipped += 1
+                continue
+            try:
+                _, motA, motB = self.estrai_motori_da_root(root)
+            except ValueError:
+                self.stats.malformed_roots += 1
+                continue
+            self.stats.pairs_processed += 1
+
+            for asse, motore in enumerate((motA, motB)):
+                idx_counter = page_chart_counter.get(pagina, 0)
+                if idx_counter >= len(CHART_NAMES):
+                    self.avvisa(
+                        f"[WARNING] Pagina '{pagina}' già ha 3 grafici; "
+                        f"skipping motore '{motore}'."
+                    )
+                    self.stats.charts_skipped += 1
+                    continue
+                slot[seq, asse] = idx_counter
+                page_chart_counter[pagina] = idx_counter + 1
+        return slot
+
+    def process(self):
+        """
+        Pre-passaggio degli slot, elaborazione per partizione e fusione ordinata dei risultati.
+        """
+        self.inter_grouped.clear()
+        self.summary_grouped.clear()
+        self.stats.reset_process()
+        with self.stats.fase("filter_dynamic_interference"):
+            slot = self.assegna_slot()
+
+        charts, summaries = [], []
+        totale = len(self.partizioni)
+        for n, prefix in enumerate(sorted(self.partizioni)):
+            self.controlla_annullamento()
+            self.notifica_progresso("process", n, totale)
+            righe_chart, righe_summary = self.elabora_partizione(prefix, slot)
+            if righe_chart:
+                charts.append(righe_chart)
+            if righe_summary:
+                summaries.append(righe_summary)
+        self.notifica_progresso("process", totale, totale)
+        self.df_vars = self.df_dyn = self.tabella_zone = self.indice_zone = None
+
+        # k-way merge: ogni partizione è già ordinata per (zone_idx, idx_num, seq, asse),
+        # cioè l'ordine stabile dell'elaborazione sull'intero foglio
+        self.inter_grouped.extend(r for _, r in heapq.merge(*charts, key=lambda x: x[0]))
+        self.summary_grouped.extend(r for _, r in heapq.merge(*summaries, key=lambda x: x[0]))
+        self.stats.charts_generated += len(self.inter_grouped)
+
+    def elabora_partizione(self, prefix: str, slot: np.ndarray):
+        """
+        Elabora le righe del prefisso con le sole zone della partizione.
+        Restituisce le liste ordinate [((zone_idx, idx_num, seq, asse), RigaChart|RigaSummary)].
+        """
+        # La partizione fa da foglio: tabella e indice delle zone contengono solo le sue root
+        self.df_vars = self.carica_partizione(prefix)
+        self.tabella_zone = None
+        self.indice_zone = None
+        dyn = self.df_vars[self.df_vars["seq"] >= 0]
+
+        pagine = dyn["New Page"].astype(object).map(str).str.strip()
+        motori = []
+        for s, root, pagina in zip(dyn["seq"].tolist(), dyn["DescrizioneRadice"], pagine):
+            slot_a, slot_b = slot[s]
+            if slot_a < 0 and slot_b < 0:
+                continue
+            _, motA, motB = self.estrai_motori_da_root(root)
+            if slot_a >= 0:
+                motori.append((s, 0, pagina, int(slot_a), motA, motB, motA, motB))
+            if slot_b >= 0:
+                motori.append((s, 1, pagina, int(slot_b), motB, motA, motA, motB))
+        if not motori:
+            return [], []
+
+        # NoInterf1 per terna unica (motore, motY, prefix), con il motore scelto
+        terne = list(dict.fromkeys((m[4], m[5]) for m in motori))
+        inizio = time.perf_counter()
+        if self.engine == "vectorized":
+            self.costruisci_tabella_zone()
+            calcolate = self._no_interf_vettoriale(
+                pd.DataFrame([(motore, motY, prefix) for motore, motY in terne], columns=["motore", "motY", "prefix"])
+            )
+            no_interf = dict(zip(zip(calcolate["motore"], calcolate["motY"]), calcolate["no_interf1"]))
+        else:
+            no_interf = {}
+            for motore, motY in terne:
+                zone1, zone2 = self.raccogli_zone_no_interf(motore, motY, prefix)
+                no_interf[motore, motY] = ",".join(t for s, e in zone1 + zone2 for t in (s, e) if t)
+        self.stats.zone_lookup_seconds += time.perf_counter() - inizio
+        self.stats.zone_lookups += len(terne)
+
+        charts, summaries = [], []
+        for s, asse, pagina, idx_counter, motore, motY, motA, motB in motori:
+            zone_idx, idx_num = self.parse_zone_and_index(pagina)
+            chiave = (zone_idx, idx_num, s, asse)
+            charts.append((chiave, RigaChart(zone_idx, idx_num, pagina, idx_counter, motore, asse, no_interf[motore, motY])))
+            # Summary solo per motA (per evitare duplicati)
+            if motore == motA:
+                summaries.append((chiave, RigaSummary(zone_idx, idx_num, pagina, f"Interferences : {motA}/{motB}")))
+        charts.sort(key=lambda x: x[0])
+        summaries.sort(key=lambda x: x[0])
+        return charts, summaries
+
+    def run(self):
+        try:
+            super().run()
+        finally:
+            self.chiudi_spool()
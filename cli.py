@@ -0,0 +1,554 @@
+# cli.py
+
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from processor import InterferenceProcessor, DEFAULT_ZONE_ORDER, ENGINES, PROFILE_MODES
+from readers import READER_NAMES
+from writers import OUTPUT_FORMATS
+from cache import WorkbookCache
+from incremental import IncrementalProcessor
+from chunked import ChunkedProcessor
+from store import StoreProcessor, ResultStore, DEFAULT_STORE_MAX_BYTES
+from multisheet import MultiSheetProcessor
+from lint import SheetLinter, MAX_RIGHE_RIEPILOGO
+import daemon
+from watcher import WorkbookWatcher, DEFAULT_INTERVAL, DEFAULT_DEBOUNCE
+
+# Estensioni cercate nelle cartelle / pattern (le esportazioni CSV vanno indicate esplicitamente)
+EXCEL_EXTS = (".xlsx", ".xlsm", ".xls", ".xlsb", ".ods")
+
+
+def raccogli_workbook(percorsi):
+    """
+    Espande file, cartelle e pattern glob nella lista ordinata dei workbook da elaborare.
+    I file di lock di Excel ("~$…") vengono ignorati.
+    """
+    trovati = []
+    for p in percorsi:
+        if os.path.isdir(p):
+            candidati, filtra = sorted(os.path.join(p, n) for n in os.listdir(p)), True
+        elif glob.has_magic(p):
+            candidati, filtra = sorted(glob.glob(p, recursive=True)), True
+        else:
+            # File esplicito: eventuali errori vengono segnalati dal processor
+            candidati, filtra = [p], False
+        for c in candidati:
+            nome = os.path.basename(c)
+            if filtra and (
+                os.path.isdir(c)
+                or nome.startswith("~$")
+                or os.path.splitext(nome)[1].lower() not in EXCEL_EXTS
+            ):
+                continue
+            trovati.append(os.path.abspath(c))
+    # Rimuove i duplicati mantenendo l'ordine
+    return list(dict.fromkeys(trovati))
+
+
+def progetto_da_workbook(excel_path: str, args) -> dict:
+    """
+    Configurazione di un progetto a partire dal solo workbook:
+    output in <out_dir>/<nome workbook>/ (out_dir di default: cartella del workbook).
+    """
+    stem = os.path.splitext(os.path.basename(excel_path))[0]
+    out_dir = os.path.join(args.out_dir or os.path.dirname(excel_path), stem)
+    return {
+        "excel_path": excel_path,
+        "sheet_name": args.sheet,
+        "output_chart": os.path.join(out_dir, "chart_config.txt"),
+        "output_summary": os.path.join(out_dir, "interferences_summary.txt"),
+        "zone_order": args.zones,
+        "output_automatico": True,  # cartella derivata dal nome del workbook (vedi rendi_output_univoci)
+    }
+
+
+def rendi_output_univoci(progetti: list) -> list:
+    """
+    Con --out-dir due workbook con lo stesso nome in cartelle diverse finirebbero nella stessa
+    cartella di output e i processi del pool si sovrascriverebbero a vicenda: alle cartelle
+    derivate dal nome si aggiunge l'hash breve della cartella del workbook ("<nome>-1a2b3c4d").
+    Se due progetti scrivono ancora sugli stessi file (es. percorsi ripetuti nel manifest,
+    stesso workbook con fogli diversi) solleva ValueError.
+    """
+    per_output = {}
+    for p in progetti:
+        per_output.setdefault(os.path.normcase(os.path.abspath(p["output_chart"])), []).append(p)
+    for gruppo in per_output.values():
+        if len(gruppo) < 2:
+            continue
+        for p in gruppo:
+            if not p.get("output_automatico"):
+                continue
+            cartella = os.path.dirname(os.path.abspath(p["excel_path"]))
+            suffisso = hashlib.sha1(os.path.normcase(cartella).encode("utf-8")).hexdigest()[:8]
+            for chiave in ("output_chart", "output_summary"):
+                out_dir, nome = os.path.split(p[chiave])
+                p[chiave] = os.path.join(f"{out_dir}-{suffisso}", nome)
+
+    visti = {}
+    for p in progetti:
+        for chiave in ("output_chart", "output_summary"):
+            percorso = os.path.normcase(os.path.abspath(p[chiave]))
+            if percorso in visti and visti[percorso] is not p:
+                raise ValueError(
+                    f"'{visti[percorso]['excel_path']}' e '{p['excel_path']}' scriverebbero entrambi in '{p[chiave]}'"
+                )
+            visti[percorso] = p
+    return progetti
+
+
+def carica_progetti(manifest_path: str, args) -> list:
+    """
+    Legge un file JSON con la lista dei progetti. Ogni voce richiede "excel_path";
+    "sheet_name", "output_chart", "output_summary" e "zone_order" sono facoltativi
+    (default dalla riga di comando). I percorsi relativi sono risolti rispetto al manifest.
+    """
+    with open(manifest_path, encoding="utf-8") as f:
+        voci = json.load(f)
+    if not isinstance(voci, list):
+        raise ValueError(f"Il manifest '{manifest_path}' deve contenere una lista di progetti")
+
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    progetti = []
+    for voce in voci:
+        if "excel_path" not in voce:
+            raise ValueError(f"Progetto senza 'excel_path' nel manifest: {voce}")
+        excel_path = os.path.join(base, voce["excel_path"])
+        progetto = progetto_da_workbook(excel_path, args)
+        for chiave in ("sheet_name", "zone_order"):
+            if chiave in voce:
+                progetto[chiave] = voce[chiave]
+        for chiave in ("output_chart", "output_summary"):
+            if chiave in voce:
+                progetto[chiave] = os.path.join(base, voce[chiave])
+                progetto["output_automatico"] = False
+        progetti.append(progetto)
+    return progetti
+
+
+def esegui_progetto(progetto: dict, opzioni: dict) -> dict:
+    """
+    Esegue InterferenceProcessor su un progetto (chiamata nei processi del pool).
+    Restituisce un dizionario con esito, tempo ed eventuale errore.
+    """
+    inizio = time.perf_counter()
+    try:
+        for chiave in ("output_chart", "output_summary"):
+            cartella = os.path.dirname(progetto[chiave])
+            if cartella:
+                os.makedirs(cartella, exist_ok=True)
+        cache = WorkbookCache(opzioni["cache_dir"]) if opzioni.get("use_cache") else None
+        parametri = dict(
+            excel_path=progetto["excel_path"],
+            sheet_name=progetto["sheet_name"],
+            output_chart=progetto["output_chart"],
+            output_summary=progetto["output_summary"],
+            zone_order=progetto["zone_order"],
+            engine=opzioni.get("engine", "classic"),
+            cache=cache,
+            low_memory=opzioni.get("low_memory", False),
+            reader=opzioni.get("reader"),
+            stats_log=opzioni.get("stats_log"),
+            profile=opzioni.get("profile"),
+            output_formats=opzioni.get("formats"),
+        )
+        if opzioni.get("incremental"):
+            processor = IncrementalProcessor(
+                **parametri, report_path=progetto["output_chart"] + ".changes.txt"
+            )
+        elif opzioni.get("chunked"):
+            processor = ChunkedProcessor(**parametri)
+        elif opzioni.get("store"):
+            store = ResultStore(opzioni.get("store_dir"), opzioni.get("store_max_bytes", DEFAULT_STORE_MAX_BYTES))
+            processor = StoreProcessor(**parametri, store=store)
+        else:
+            processor = InterferenceProcessor(**parametri)
+        processor.run()
+        errore = None
+        if opzioni.get("incremental"):
+            dettaglio = processor.descrivi_report()
+        elif opzioni.get("store"):
+            dettaglio = processor.descrivi_store()
+        else:
+            dettaglio = ""
+        esito_store = processor.esito_store if opzioni.get("store") else None
+    except Exception as e:
+        errore = f"{type(e).__name__}: {e}"
+        dettaglio = ""
+        esito_store = None
+    return {
+        "excel_path": progetto["excel_path"],
+        "ok": errore is None,
+        "errore": errore,
+        "dettaglio": dettaglio,
+        "store": esito_store,
+        "secondi": time.perf_counter() - inizio,
+    }
+
+
+def esegui_batch(progetti: list, opzioni: dict, jobs: int = None, stampa=print) -> list:
+    """
+    Elabora i progetti in un pool di processi (default: un processo per core)
+    e stampa l'esito di ciascuno appena disponibile.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    risultati = []
+    if jobs == 1 or len(progetti) <= 1:
+        for p in progetti:
+            r = esegui_progetto(p, opzioni)
+            risultati.append(r)
+            stampa(formatta_esito(r))
+        return risultati
+
+    inizio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=min(jobs, len(progetti))) as pool:
+        futures = {pool.submit(esegui_progetto, p, opzioni): p for p in progetti}
+        for fut in as_completed(futures):
+            try:
+                r = fut.result()
+            except Exception as e:
+                # BrokenProcessPool (processo del pool terminato, es. memoria esaurita) o errore di
+                # serializzazione: il progetto risulta fallito e il batch prosegue con gli altri
+                r = {
+                    "excel_path": futures[fut]["excel_path"],
+                    "ok": False,
+                    "errore": f"{type(e).__name__}: {e}",
+                    "dettaglio": "",
+                    "store": None,
+                    "secondi": time.perf_counter() - inizio,
+                }
+            risultati.append(r)
+            stampa(formatta_esito(r))
+    return risultati
+
+
+def formatta_esito(r: dict) -> str:
+    if r["ok"]:
+        dettaglio = f" - {r['dettaglio']}" if r.get("dettaglio") else ""
+        return f"[OK]     {r['excel_path']} ({r['secondi']:.2f} s){dettaglio}"
+    return f"[ERRORE] {r['excel_path']} ({r['secondi']:.2f} s): {r['errore']}"
+
+
+def cmd_batch(args) -> int:
+    if args.manifest:
+        progetti = carica_progetti(args.manifest, args)
+    else:
+        progetti = []
+    progetti += [progetto_da_workbook(p, args) for p in raccogli_workbook(args.workbooks)]
+
+    if not progetti:
+        print("Nessun workbook da elaborare.", file=sys.stderr)
+        return 2
+    try:
+        rendi_output_univoci(progetti)
+    except ValueError as e:
+        print(f"[ERRORE] {e}", file=sys.stderr)
+        return 2
+
+    opzioni = {
+        "engine": args.engine,
+        "low_memory": args.low_memory,
+        "reader": args.reader,
+        "use_cache": args.cache,
+        "cache_dir": args.cache_dir,
+        "incremental": args.incremental,
+        "chunked": args.chunked,
+        "store": args.store,
+        "store_dir": args.store_dir,
+        "store_max_bytes": args.store_mb * 1024 * 1024,
+        "stats_log": args.stats_log,
+        "profile": args.profile,
+        "formats": args.formats,
+    }
+    inizio = time.perf_counter()
+    risultati = esegui_batch(progetti, opzioni, jobs=args.jobs)
+    falliti = [r for r in risultati if not r["ok"]]
+    print(
+        f"Completati {len(risultati) - len(falliti)}/{len(risultati)} progetti "
+        f"in {time.perf_counter() - inizio:.2f} s ({len(falliti)} errori)"
+    )
+    if args.store:
+        hit = sum(r["store"] == "hit" for r in risultati)
+        miss = sum(r["store"] == "miss" for r in risultati)
+        print(f"Store risultati: {hit} hit, {miss} miss")
+    return 1 if falliti else 0
+
+
+def cmd_sheets(args) -> int:
+    fogli = [f.strip() for f in args.sheets.split(",") if f.strip()] if args.sheets else None
+    multi = MultiSheetProcessor(
+        args.workbook,
+        fogli=fogli,
+        pattern=args.pattern,
+        out_dir=args.out_dir,
+        zone_order=args.zones,
+        engine=args.engine,
+        low_memory=args.low_memory,
+        reader=args.reader,
+        jobs=args.jobs,
+        combina=args.combined,
+        formati=args.formats,
+    )
+    inizio = time.perf_counter()
+    esiti = multi.run()
+    falliti = [r for r in esiti if not r["ok"]]
+    print(
+        f"Completati {len(esiti) - len(falliti)}/{len(esiti)} fogli "
+        f"in {time.perf_counter() - inizio:.2f} s ({len(falliti)} errori) - output in {multi.out_dir}"
+    )
+    return 1 if falliti else 0
+
+
+def cmd_daemon(args) -> int:
+    if args.status:
+        stato = daemon.stato_servizio(port=args.port)
+        if stato is None:
+            print("Servizio non attivo.")
+            return 1
+        print(json.dumps(stato, indent=2, ensure_ascii=False))
+        return 0
+    if args.stop:
+        if not daemon.arresta_servizio(port=args.port):
+            print("Servizio non attivo.")
+            return 1
+        print("Servizio arrestato.")
+        return 0
+    daemon.avvia_servizio(port=args.port, max_bytes=args.memory_mb * 1024 * 1024)
+    return 0
+
+
+def cmd_generate(args) -> int:
+    try:
+        esito = daemon.genera(
+            args.workbook,
+            args.sheet,
+            args.chart,
+            args.summary,
+            zone_order=args.zones,
+            engine=args.engine,
+            low_memory=args.low_memory,
+            reader=args.reader,
+            output_formats=args.formats,
+            usa_servizio=not args.no_daemon,
+            port=args.port,
+        )
+    except Exception as e:
+        print(f"[ERRORE] {args.workbook}: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    provenienza = "foglio residente" if esito["residente"] else "foglio letto da disco"
+    print(f"[OK]     {args.workbook} ({esito['secondi']:.2f} s, {esito['via']}, {provenienza})")
+    return 0
+
+
+def cmd_watch(args) -> int:
+    # Stato caldo nel processo: foglio e indici restano in memoria tra un salvataggio e l'altro
+    servizio = daemon.ServizioWorkbook()
+    richiesta = {
+        "excel_path": os.path.abspath(args.workbook),
+        "sheet_name": args.sheet,
+        "output_chart": os.path.abspath(args.chart),
+        "output_summary": os.path.abspath(args.summary),
+        "zone_order": args.zones,
+        "engine": args.engine,
+        "low_memory": args.low_memory,
+        "reader": args.reader,
+        "output_formats": args.formats,
+    }
+
+    def rigenera():
+        try:
+            esito = servizio.genera(richiesta)
+            print(f"[OK]     {time.strftime('%H:%M:%S')} {args.workbook} ({esito['secondi']:.2f} s)")
+        except Exception as e:
+            print(f"[ERRORE] {time.strftime('%H:%M:%S')} {args.workbook}: {type(e).__name__}: {e}")
+
+    rigenera()
+    watcher = WorkbookWatcher(args.workbook, rigenera, intervallo=args.interval, debounce=args.debounce)
+    watcher.start()
+    print(f"In attesa di modifiche a {args.workbook} (Ctrl+C per uscire)…")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+    return 0
+
+
+def cmd_lint(args) -> int:
+    inizio = time.perf_counter()
+    try:
+        linter = SheetLinter.da_workbook(args.workbook, args.sheet, low_memory=args.low_memory, reader=args.reader)
+        problemi = linter.esegui()
+        print(linter.riepilogo(args.max_rows))
+        if args.output:
+            linter.scrivi_report(args.output, args.formats or ())
+            print(f"Report completo in {args.output}")
+    except Exception as e:
+        print(f"[ERRORE] {args.workbook}: {type(e).__name__}: {e}", file=sys.stderr)
+        return 2
+    print(f"{len(problemi)} problemi trovati in {time.perf_counter() - inizio:.2f} s")
+    return 1 if len(problemi) else 0
+
+
+def zone_arg(testo: str):
+    zone = [z.strip() for z in testo.split(",") if z.strip()]
+    if not zone:
+        raise argparse.ArgumentTypeError("Devi definire almeno una zona.")
+    return zone
+
+
+def formati_arg(testo: str):
+    formati = [f.strip().lower() for f in testo.split(",") if f.strip()]
+    sconosciuti = [f for f in formati if f not in OUTPUT_FORMATS]
+    if sconosciuti:
+        raise argparse.ArgumentTypeError(
+            f"Formati non supportati: {', '.join(sconosciuti)} (usa tra {', '.join(OUTPUT_FORMATS)})"
+        )
+    return formati
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="interference",
+        description="Generazione di chart_config.txt e interferences_summary.txt senza interfaccia grafica.",
+    )
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    # Opzioni comuni ai sottocomandi (argparse parents): lettura del foglio per tutti quelli che lo leggono,
+    # elaborazione per quelli che generano i file
+    lettura = argparse.ArgumentParser(add_help=False)
+    lettura.add_argument("--low-memory", action="store_true", help="Lettura a basso consumo di memoria")
+    lettura.add_argument("--reader", choices=["auto"] + READER_NAMES, default="auto",
+                         help="Backend di lettura (default: openpyxl/xlrd/pyxlsb/odf secondo l'estensione; "
+                              "calamine solo se indicato)")
+    elaborazione = argparse.ArgumentParser(add_help=False, parents=[lettura])
+    elaborazione.add_argument(
+        "--zones", type=zone_arg, default=list(DEFAULT_ZONE_ORDER),
+        help=f"Ordine delle zone separato da virgole (default: {','.join(DEFAULT_ZONE_ORDER)})",
+    )
+    elaborazione.add_argument("--engine", choices=ENGINES, default="classic")
+    elaborazione.add_argument(
+        "--formats", type=formati_arg, default=None,
+        help=f"Formati aggiuntivi accanto ai file di testo, separati da virgole ({','.join(OUTPUT_FORMATS)})",
+    )
+
+    batch = sub.add_parser(
+        "batch", help="Elabora più workbook in parallelo",
+        parents=[elaborazione],
+    )
+    batch.add_argument("workbooks", nargs="*", help="File, cartelle o pattern glob (es. 'progetti/**/*.xlsx')")
+    batch.add_argument("--manifest", help="File JSON con la configurazione per progetto")
+    batch.add_argument("--sheet", default="Variabili", help="Nome del foglio (default: Variabili)")
+    batch.add_argument("--out-dir", help="Cartella base degli output (default: cartella del workbook)")
+    batch.add_argument("--jobs", type=int, default=None, help="Processi paralleli (default: numero di core)")
+    batch.add_argument("--cache", action="store_true", help="Usa la cache dei fogli già letti")
+    batch.add_argument("--cache-dir", default=None, help="Cartella di cache (default: cartella utente)")
+    modalita = batch.add_mutually_exclusive_group()
+    modalita.add_argument(
+        "--incremental", action="store_true",
+        help="Rielabora solo le pagine cambiate (manifest e report <chart_config>.changes.txt accanto all'output)",
+    )
+    modalita.add_argument(
+        "--chunked", action="store_true",
+        help="Fogli molto grandi: legge in streaming ed elabora una partizione (prefisso macchina) alla volta",
+    )
+    modalita.add_argument(
+        "--store", action="store_true",
+        help="Riusa i risultati dei progetti con la stessa sezione di interferenze (store indirizzato per contenuto)",
+    )
+    batch.add_argument("--store-dir", default=None, help="Cartella dello store dei risultati (default: cartella utente)")
+    batch.add_argument(
+        "--store-mb", type=int, default=DEFAULT_STORE_MAX_BYTES // (1024 * 1024),
+        help="Dimensione massima dello store in MB (eviction delle voci usate meno di recente)",
+    )
+    batch.add_argument("--stats-log", default=None, help="File JSON Lines a cui aggiungere le statistiche di ogni run")
+    batch.add_argument(
+        "--profile", choices=PROFILE_MODES, default=None,
+        help="Scrive un profilo (cProfile o tracemalloc) nella cartella di output di ogni progetto",
+    )
+    batch.set_defaults(func=cmd_batch)
+
+    sheets = sub.add_parser(
+        "sheets", help="Elabora più fogli dello stesso workbook aprendolo una sola volta",
+        parents=[elaborazione],
+    )
+    sheets.add_argument("workbook", help="Workbook .xlsx o .xls")
+    sheets.add_argument("--sheets", default=None, help="Fogli da elaborare separati da virgole (default: tutti)")
+    sheets.add_argument("--pattern", default=None, help="Pattern dei nomi dei fogli (es. 'Variabili*')")
+    sheets.add_argument("--out-dir", help="Cartella degli output (default: <cartella workbook>/<nome workbook>)")
+    sheets.add_argument(
+        "--combined", action="store_true",
+        help="Un unico chart_config.txt / interferences_summary.txt con la colonna 'foglio'",
+    )
+    sheets.add_argument("--jobs", type=int, default=None, help="Processi paralleli (default: numero di core)")
+    sheets.set_defaults(func=cmd_sheets)
+
+    serv = sub.add_parser("daemon", help="Servizio locale che tiene in memoria i fogli già letti")
+    serv.add_argument("--port", type=int, default=daemon.DEFAULT_PORT)
+    serv.add_argument("--memory-mb", type=int, default=daemon.DEFAULT_MEMORY_BYTES // (1024 * 1024),
+                      help="Memoria massima dei fogli residenti (MB)")
+    serv.add_argument("--status", action="store_true", help="Mostra lo stato del servizio in esecuzione")
+    serv.add_argument("--stop", action="store_true", help="Arresta il servizio in esecuzione")
+    serv.set_defaults(func=cmd_daemon)
+
+    gen = sub.add_parser(
+        "generate", help="Genera i file di un workbook (tramite il servizio, se attivo)",
+        parents=[elaborazione],
+    )
+    gen.add_argument("workbook", help="Workbook .xlsx o .xls")
+    gen.add_argument("--sheet", default="Variabili", help="Nome del foglio (default: Variabili)")
+    gen.add_argument("--chart", default="chart_config.txt", help="File chart_config di output")
+    gen.add_argument("--summary", default="interferences_summary.txt", help="File summary di output")
+    gen.add_argument("--port", type=int, default=daemon.DEFAULT_PORT)
+    gen.add_argument("--no-daemon", action="store_true", help="Elabora sempre nel processo corrente")
+    gen.set_defaults(func=cmd_generate)
+
+    watch = sub.add_parser(
+        "watch", help="Rigenera i file ad ogni salvataggio del workbook",
+        parents=[elaborazione],
+    )
+    watch.add_argument("workbook", help="Workbook .xlsx o .xls")
+    watch.add_argument("--sheet", default="Variabili", help="Nome del foglio (default: Variabili)")
+    watch.add_argument("--chart", default="chart_config.txt", help="File chart_config di output")
+    watch.add_argument("--summary", default="interferences_summary.txt", help="File summary di output")
+    watch.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Secondi tra due controlli")
+    watch.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                       help="Secondi di stabilità del file prima di rigenerare")
+    watch.set_defaults(func=cmd_watch)
+
+    lint = sub.add_parser(
+        "lint", help="Controlla la coerenza del foglio (Start/End, ordinali, pagine, root, tag)",
+        parents=[lettura],
+    )
+    lint.add_argument("workbook", help="Workbook .xlsx o .xls")
+    lint.add_argument("--sheet", default="Variabili", help="Nome del foglio (default: Variabili)")
+    lint.add_argument("--output", default=None, help="File di report con tutti i problemi (testo tab-separated)")
+    lint.add_argument(
+        "--formats", type=formati_arg, default=None,
+        help=f"Formati aggiuntivi del report, separati da virgole ({','.join(OUTPUT_FORMATS)})",
+    )
+    lint.add_argument("--max-rows", type=int, default=MAX_RIGHE_RIEPILOGO,
+                      help="Righe mostrate per controllo nel riepilogo")
+    lint.set_defaults(func=cmd_lint)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,432 @@
+# daemon.py
+
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from processor import InterferenceProcessor, RunStats, PROCESSOR_VERSION
+from cache import WorkbookCache, default_cache_dir
+
+# =============================================================================
+# CONFIGURAZIONE DI DEFAULT
+# =============================================================================
+DEFAULT_HOST = "127.0.0.1"  # il servizio accetta solo connessioni locali
+DEFAULT_PORT = 47821
+DEFAULT_MEMORY_BYTES = 1024 * 1024 * 1024  # 1 GB di fogli residenti
+CONNECT_TIMEOUT = 0.5  # secondi per verificare se il servizio è attivo
+TOKEN_HEADER = "X-Interference-Token"  # header con il token del servizio (vedi percorso_token)
+
+
+def percorso_token(port: int = DEFAULT_PORT) -> str:
+    """
+    File con il token del servizio, nella cartella dell'utente e leggibile solo da lui (0600):
+    solo i processi dell'utente che ha avviato il servizio possono usarlo.
+    """
+    return os.path.join(default_cache_dir("daemon"), f"token-{port}")
+
+
+def scrivi_token(port: int = DEFAULT_PORT) -> str:
+    """
+    Genera un nuovo token casuale e lo scrive in percorso_token(port) con permessi 0600.
+    """
+    token = secrets.token_hex(32)
+    path = percorso_token(port)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+def leggi_token(port: int = DEFAULT_PORT) -> str:
+    with open(percorso_token(port), encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def output_consentito(output_path: str, excel_path: str) -> bool:
+    """
+    True se il file di output è nella cartella del workbook (o in una sua sottocartella):
+    il servizio non scrive altrove, anche con un token valido.
+    """
+    cartella = os.path.realpath(os.path.dirname(os.path.abspath(excel_path)))
+    output_path = os.path.realpath(os.path.abspath(output_path))
+    try:
+        return os.path.commonpath([cartella, output_path]) == cartella
+    except ValueError:
+        # Unità diverse su Windows
+        return False
+
+
+class VoceWorkbook:
+    """
+    Foglio residente in memoria: DataFrame letto e indici delle zone già costruiti.
+    """
+
+    def __init__(self, excel_path: str, sheet_name: str, low_memory: bool, reader: str = None):
+        st = os.stat(excel_path)
+        self.firma = (st.st_size, st.st_mtime_ns)
+        self.hash = WorkbookCache.hash_contenuto(excel_path)
+
+        base = InterferenceProcessor(excel_path, sheet_name, "", "", low_memory=low_memory, reader=reader)
+        base.load_data()
+        base.costruisci_indice_zone()
+        self.df_vars = base.df_vars
+        self.tabella_zone = base.tabella_zone
+        self.indice_zone = base.indice_zone
+        self.caricato = time.time()
+        self.richieste = 0
+
+        self.bytes = int(self.df_vars.memory_usage(deep=True).sum())
+        self.bytes += int(self.tabella_zone.memory_usage(deep=True).sum())
+
+    def aggiornata(self, excel_path: str) -> bool:
+        """
+        True se il file non è cambiato. Con dimensione/mtime diversi confronta l'hash:
+        un salvataggio che non modifica il contenuto non provoca una nuova lettura.
+        """
+        st = os.stat(excel_path)
+        firma = (st.st_size, st.st_mtime_ns)
+        if firma == self.firma:
+            return True
+        if st.st_size == self.firma[0] and WorkbookCache.hash_contenuto(excel_path) == self.hash:
+            self.firma = firma
+            return True
+        return False
+
+
+class ProcessorResidente(InterferenceProcessor):
+    """
+    InterferenceProcessor che usa un foglio residente invece di rileggere il workbook.
+    """
+
+    def __init__(self, voce: VoceWorkbook, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.voce = voce
+
+    def load_data(self):
+        self.imposta_foglio(self.voce.df_vars)
+        self.tabella_zone = self.voce.tabella_zone
+        self.indice_zone = self.voce.indice_zone
+
+
+class ServizioWorkbook:
+    """
+    Cache LRU dei fogli residenti con limite di memoria complessivo.
+    La chiave è (percorso assoluto, foglio, low_memory, lettore); un foglio viene riletto
+    solo se il file è cambiato (dimensione/mtime e hash del contenuto).
+    self.lock protegge solo il dizionario e i contatori; la lettura di un foglio avviene con il
+    lock della sua chiave, così un workbook lento non blocca le richieste sugli altri.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self.voci = OrderedDict()
+        self.lock = threading.Lock()
+        self.lock_voci = {}  # chiave -> threading.Lock della lettura di quel foglio
+        self.letture = 0  # fogli letti da disco
+        self.riusi = 0    # richieste servite da un foglio residente
+
+    def voce(self, excel_path: str, sheet_name: str, low_memory: bool = False, reader: str = None):
+        """
+        Restituisce (VoceWorkbook, riusata) per il foglio richiesto.
+        """
+        excel_path = os.path.abspath(excel_path)
+        if not os.path.isfile(excel_path):
+            raise FileNotFoundError(f"File non trovato: '{excel_path}'")
+        chiave = (excel_path, sheet_name, bool(low_memory), reader or "auto")
+        with self.lock:
+            lock_voce = self.lock_voci.setdefault(chiave, threading.Lock())
+
+        with lock_voce:
+            with self.lock:
+                voce = self.voci.get(chiave)
+            if voce is not None and voce.aggiornata(excel_path):
+                with self.lock:
+                    if chiave in self.voci:
+                        self.voci.move_to_end(chiave)
+                    self.riusi += 1
+                    voce.richieste += 1
+                return voce, True
+
+            voce = VoceWorkbook(excel_path, sheet_name, low_memory, reader)
+            voce.richieste = 1
+            with self.lock:
+                self.voci.pop(chiave, None)
+                self.voci[chiave] = voce
+                self.letture += 1
+                self.applica_limite()
+            return voce, False
+
+    def applica_limite(self):
+        """
+        Scarta i fogli usati meno di recente finché si supera max_bytes
+        (il foglio appena usato resta sempre residente). Va chiamato con self.lock acquisito.
+        """
+        totale = sum(v.bytes for v in self.voci.values())
+        while totale > self.max_bytes and len(self.voci) > 1:
+            chiave, voce = self.voci.popitem(last=False)
+            self.lock_voci.pop(chiave, None)
+            totale -= voce.bytes
+
+    def genera(self, richiesta: dict, progress_callback=None, cancel_event=None) -> dict:
+        """
+        Genera chart_config/summary per una richiesta
+        {excel_path, sheet_name, output_chart, output_summary, zone_order, engine, low_memory, reader, output_formats}.
+        progress_callback e cancel_event sono passati al processor (solo per l'uso nello stesso processo, es. GUI).
+        """
+        for chiave in ("excel_path", "sheet_name", "output_chart", "output_summary"):
+            if not richiesta.get(chiave):
+                raise ValueError(f"Parametro mancante nella richiesta: '{chiave}'")
+        inizio = time.perf_counter()
+        voce, riusata = self.voce(
+            richiesta["excel_path"], richiesta["sheet_name"],
+            richiesta.get("low_memory", False), richiesta.get("reader"),
+        )
+        processor = ProcessorResidente(
+            voce,
+            excel_path=richiesta["excel_path"],
+            sheet_name=richiesta["sheet_name"],
+            output_chart=richiesta["output_chart"],
+            output_summary=richiesta["output_summary"],
+            zone_order=richiesta.get("zone_order"),
+            engine=richiesta.get("engine", "classic"),
+            output_formats=richiesta.get("output_formats"),
+            progress_callback=progress_callback,
+            cancel_event=cancel_event,
+        )
+        processor.run()
+        return {
+            "ok": True,
+            "residente": riusata,
+            "secondi": time.perf_counter() - inizio,
+            "stats": processor.stats.to_dict(),
+        }
+
+    def stato(self) -> dict:
+        with self.lock:
+            return {
+                "version": PROCESSOR_VERSION,
+                "pid": os.getpid(),
+                "letture": self.letture,
+                "riusi": self.riusi,
+                "bytes": sum(v.bytes for v in self.voci.values()),
+                "max_bytes": self.max_bytes,
+                "fogli": [
+                    {"excel_path": p, "sheet_name": s, "low_memory": lm, "reader": r,
+                     "bytes": v.bytes, "richieste": v.richieste}
+                    for (p, s, lm, r), v in self.voci.items()
+                ],
+            }
+
+
+class GestoreRichieste(BaseHTTPRequestHandler):
+    """
+    API HTTP locale:
+    - GET  /status   -> stato della cache
+    - POST /generate -> genera i file (corpo JSON, vedi ServizioWorkbook.genera)
+    - POST /shutdown -> arresta il servizio
+    Ogni richiesta deve portare il token del servizio in TOKEN_HEADER (403 altrimenti).
+    Le richieste con header Origin (pagine web nel browser) sono rifiutate, le POST solo con
+    Content-Type application/json: un form o una fetch "semplice" da un sito non arrivano al servizio.
+    """
+
+    servizio = None  # ServizioWorkbook, impostato da avvia_servizio
+    token = None     # token del servizio, impostato da avvia_servizio
+
+    def _rispondi(self, codice: int, dati: dict):
+        corpo = json.dumps(dati, ensure_ascii=False).encode("utf-8")
+        self.send_response(codice)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _autorizzata(self) -> bool:
+        """
+        Verifica origine e token; se la richiesta non è ammessa risponde con l'errore.
+        """
+        if self.headers.get("Origin") is not None:
+            self._rispondi(403, {"ok": False, "errore": "Richieste dal browser non ammesse"})
+            return False
+        token = self.headers.get(TOKEN_HEADER, "")
+        if not self.token or not hmac.compare_digest(token.encode("utf-8"), self.token.encode("utf-8")):
+            self._rispondi(403, {"ok": False, "errore": "Token mancante o non valido"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._autorizzata():
+            return
+        if self.path == "/status":
+            self._rispondi(200, self.servizio.stato())
+        else:
+            self._rispondi(404, {"ok": False, "errore": f"Percorso sconosciuto: {self.path}"})
+
+    def do_POST(self):
+        if not self._autorizzata():
+            return
+        tipo = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if tipo != "application/json":
+            self._rispondi(415, {"ok": False, "errore": "Content-Type deve essere application/json"})
+            return
+        if self.path == "/shutdown":
+            self._rispondi(200, {"ok": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if self.path != "/generate":
+            self._rispondi(404, {"ok": False, "errore": f"Percorso sconosciuto: {self.path}"})
+            return
+        try:
+            lunghezza = int(self.headers.get("Content-Length", 0))
+            richiesta = json.loads(self.rfile.read(lunghezza).decode("utf-8"))
+            for chiave in ("output_chart", "output_summary"):
+                if not output_consentito(str(richiesta.get(chiave, "")), str(richiesta.get("excel_path", ""))):
+                    self._rispondi(403, {
+                        "ok": False,
+                        "errore": f"Output '{richiesta.get(chiave)}' fuori dalla cartella del workbook: il servizio non lo scrive",
+                    })
+                    return
+            self._rispondi(200, self.servizio.genera(richiesta))
+        except Exception as e:
+            self._rispondi(500, {"ok": False, "errore": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format, *args):
+        # Una riga per richiesta, senza il formato di default di http.server
+        print(f"[daemon] {self.address_string()} {format % args}")
+
+
+def avvia_servizio(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_bytes: int = DEFAULT_MEMORY_BYTES):
+    """
+    Avvia il servizio e resta in ascolto fino a /shutdown o Ctrl+C.
+    Il token viene rigenerato ad ogni avvio (percorso_token) e rimosso all'arresto.
+    """
+    server = ThreadingHTTPServer((host, port), GestoreRichieste)
+    token = scrivi_token(port)
+    server.RequestHandlerClass = type(
+        "Gestore", (GestoreRichieste,), {"servizio": ServizioWorkbook(max_bytes), "token": token}
+    )
+    print(f"Servizio in ascolto su http://{host}:{port} (memoria max {max_bytes / 1024 / 1024:.0f} MB)")
+    print(f"Token in {percorso_token(port)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.remove(percorso_token(port))
+        except OSError:
+            pass
+
+
+# =============================================================================
+# CLIENT
+# =============================================================================
+def _chiama(metodo: str, percorso: str, dati: dict = None, host: str = DEFAULT_HOST,
+            port: int = DEFAULT_PORT, timeout: float = None) -> dict:
+    corpo = json.dumps(dati).encode("utf-8") if dati is not None else None
+    # Senza file del token (servizio non avviato da questo utente) solleva OSError
+    req = urllib.request.Request(
+        f"http://{host}:{port}{percorso}", data=corpo, method=metodo,
+        headers={"Content-Type": "application/json", TOKEN_HEADER: leggi_token(port)},
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        # Errore di elaborazione riportato dal servizio
+        try:
+            return json.loads(e.read().decode("utf-8"))
+        except ValueError:
+            return {"ok": False, "errore": f"HTTP {e.code}"}
+
+
+def stato_servizio(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """
+    Stato del servizio, oppure None se non è in esecuzione.
+    """
+    try:
+        return _chiama("GET", "/status", host=host, port=port, timeout=CONNECT_TIMEOUT)
+    except (OSError, ValueError):
+        return None
+
+
+def arresta_servizio(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> bool:
+    try:
+        return _chiama("POST", "/shutdown", {}, host=host, port=port, timeout=CONNECT_TIMEOUT).get("ok", False)
+    except (OSError, ValueError):
+        return False
+
+
+def genera(
+    excel_path: str,
+    sheet_name: str,
+    output_chart: str,
+    output_summary: str,
+    zone_order=None,
+    engine: str = "classic",
+    low_memory: bool = False,
+    reader: str = None,
+    output_formats=None,
+    usa_servizio: bool = True,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+) -> dict:
+    """
+    Genera i file tramite il servizio se è attivo e gli output sono nella cartella del workbook
+    (vedi output_consentito), altrimenti con un InterferenceProcessor nel processo corrente. Restituisce {"via": "daemon"/"locale", "residente", "secondi", "stats": RunStats}.
+    Gli errori di elaborazione sono sollevati come RuntimeError (servizio) o come nel processor (locale).
+    """
+    if (
+        usa_servizio
+        and output_consentito(output_chart, excel_path)
+        and output_consentito(output_summary, excel_path)
+        and stato_servizio(host, port) is not None
+    ):
+        richiesta = {
+            "excel_path": os.path.abspath(excel_path),
+            "sheet_name": sheet_name,
+            "output_chart": os.path.abspath(output_chart),
+            "output_summary": os.path.abspath(output_summary),
+            "zone_order": list(zone_order) if zone_order else None,
+            "engine": engine,
+            "low_memory": low_memory,
+            "reader": reader,
+            "output_formats": list(output_formats) if output_formats else None,
+        }
+        risposta = _chiama("POST", "/generate", richiesta, host=host, port=port)
+        if not risposta.get("ok"):
+            raise RuntimeError(risposta.get("errore", "Errore sconosciuto del servizio"))
+        risposta["via"] = "daemon"
+        risposta["stats"] = RunStats.from_dict(risposta["stats"])
+        return risposta
+
+    inizio = time.perf_counter()
+    processor = InterferenceProcessor(
+        excel_path=excel_path,
+        sheet_name=sheet_name,
+        output_chart=output_chart,
+        output_summary=output_summary,
+        zone_order=zone_order,
+        engine=engine,
+        low_memory=low_memory,
+        reader=reader,
+        output_formats=output_formats,
+    )
+    processor.run()
+    return {
+        "ok": True,
+        "via": "locale",
+        "residente": False,
+        "secondi": time.perf_counter() - inizio,
+        "stats": processor.stats,
+    }
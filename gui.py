@@ -1,8 +1,149 @@
 # gui.py
 
+import importlib
+import json
+import os
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import filedialog, messagebox
-from processor import InterferenceProcessor, DEFAULT_ZONE_ORDER
+from tkinter import filedialog, messagebox, ttk
+from zones import DEFAULT_ZONE_ORDER
+from cache import WorkbookCache
+from watcher import WorkbookWatcher
+
+# processor, incremental e daemon (quindi pandas e i motori Excel) non sono importati qui:
+# la finestra compare subito e i moduli vengono precaricati in background (vedi precarica_moduli)
+
+# Intervallo (ms) con cui la GUI legge i messaggi del thread di generazione
+POLL_MS = 100
+
+# Porzione della barra di avanzamento assegnata a ciascuna fase: (inizio, fine) in %
+FASI_PROGRESSO = {
+    "load": (0, 30, "Lettura Excel…"),
+    "filter": (30, 35, "Filtro DynamicInterference…"),
+    "process": (35, 90, "Elaborazione coppie motori…"),
+    "write": (90, 100, "Scrittura file…"),
+}
+
+# Anteprima dei risultati: righe del Treeview effettivamente create (le altre sono solo nell'indice)
+PREVIEW_ROWS = 15
+PREVIEW_COLUMNS = [("pagina", 120), ("nome", 90), ("Title", 140), ("FunctionType", 120), ("NoInterf1", 320)]
+
+# Misura dei tempi di avvio (vedi benchmark.py --startup): file JSON in cui scrivere i tempi
+# e workbook opzionale da generare subito dopo l'apertura della finestra
+STARTUP_PROBE_ENV = "INTERFERENCE_STARTUP_PROBE"
+STARTUP_WORKBOOK_ENV = "INTERFERENCE_STARTUP_WORKBOOK"
+
+
+def precarica_moduli():
+    """
+    Importa i moduli pesanti (processor/pandas, motori Excel, daemon) in un thread
+    in background, così la prima generazione non paga il costo degli import.
+    """
+    for nome in ("processor", "incremental", "daemon", "openpyxl", "xlrd"):
+        try:
+            importlib.import_module(nome)
+        except ImportError:
+            pass
+
+
+class PreviewPanel(tk.Frame):
+    """
+    Anteprima delle righe di chart_config con filtro durante la digitazione.
+    Treeview virtualizzato: esistono solo PREVIEW_ROWS item, riempiti con la finestra di righe
+    visibile; la scrollbar sposta la finestra sull'elenco filtrato dell'indice (query.IndiceRisultati),
+    così decine di migliaia di righe non rallentano l'interfaccia.
+    """
+
+    def __init__(self, master=None):
+        super().__init__(master)
+        self.indice = None
+        self.visibili = []  # posizioni nell'indice delle righe che passano il filtro, in ordine
+        self.inizio = 0     # prima riga visibile in self.visibili
+
+        tk.Label(self, text="Filter:").grid(row=0, column=0, sticky="w")
+        self.filtro = tk.StringVar()
+        self.filtro.trace_add("write", lambda *_: self.apply_filter())
+        tk.Entry(self, textvariable=self.filtro, width=40).grid(row=0, column=1, sticky="w", padx=5)
+        self.count_label = tk.Label(self, text="", anchor="e")
+        self.count_label.grid(row=0, column=2, sticky="e")
+
+        colonne = [nome for nome, _ in PREVIEW_COLUMNS] + ["zona"]
+        self.tree = ttk.Treeview(self, columns=colonne, show="headings", height=PREVIEW_ROWS, selectmode="browse")
+        for nome, larghezza in PREVIEW_COLUMNS + [("zona", 90)]:
+            self.tree.heading(nome, text="Zone" if nome == "zona" else nome)
+            self.tree.column(nome, width=larghezza, stretch=nome == "NoInterf1")
+        self.items = [self.tree.insert("", "end", values=()) for _ in range(PREVIEW_ROWS)]
+        self.tree.grid(row=1, column=0, columnspan=3, sticky="nsew")
+        self.scroll = tk.Scrollbar(self, orient="vertical", command=self.on_scroll)
+        self.scroll.grid(row=1, column=3, sticky="ns")
+        self.columnconfigure(2, weight=1)
+
+        for evento in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(evento, self.on_wheel)
+        self.render()
+
+    def set_index(self, indice, zone_order=None):
+        """Mostra un nuovo indice (ricevuto dal thread di generazione) con l'ordine di zone corrente."""
+        self.indice = indice
+        if zone_order:
+            indice.riordina(zone_order)
+        self.inizio = 0
+        self.apply_filter()
+
+    def reorder(self, zone_order):
+        """Riordina l'anteprima con il nuovo ordine delle zone (nessuna rilettura del foglio)."""
+        if self.indice is None or not zone_order:
+            return
+        self.indice.riordina(zone_order)
+        self.apply_filter(mantieni_posizione=True)
+
+    def apply_filter(self, mantieni_posizione=False):
+        if self.indice is None:
+            return
+        self.visibili = self.indice.cerca(self.filtro.get())
+        if not mantieni_posizione:
+            self.inizio = 0
+        self.render()
+
+    def render(self):
+        """Riempie i PREVIEW_ROWS item con la finestra di righe visibile."""
+        totale = len(self.visibili)
+        self.inizio = max(0, min(self.inizio, totale - PREVIEW_ROWS))
+        for n, item in enumerate(self.items):
+            i = self.inizio + n
+            if i < totale:
+                pos = self.visibili[i]
+                riga = self.indice.righe[pos]
+                valori = (riga.pagina, riga.nome, riga.motore, riga.function_type, riga.no_interf1,
+                          self.indice.zona_di(pos))
+            else:
+                valori = ()
+            self.tree.item(item, values=valori)
+        if totale:
+            self.scroll.set(self.inizio / totale, min(1.0, (self.inizio + PREVIEW_ROWS) / totale))
+        else:
+            self.scroll.set(0, 1)
+        if self.indice is not None:
+            self.count_label.config(text=f"{totale} / {len(self.indice)} rows")
+
+    def on_scroll(self, azione, quanto, unita=None):
+        if azione == "moveto":
+            self.inizio = int(float(quanto) * len(self.visibili))
+        elif azione == "scroll":
+            passo = PREVIEW_ROWS if unita == "pages" else 1
+            self.inizio += int(quanto) * passo
+        self.render()
+
+    def on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.inizio -= 3
+        else:
+            self.inizio += 3
+        self.render()
+        return "break"
+
 
 class App(tk.Frame):
     """
@@ -11,7 +152,10 @@ class App(tk.Frame):
     - inserire il nome del foglio
     - definire l'ordine delle zone (inserire nomi arbitrari e riordinare)
     - selezionare i percorsi di output per chart_config.txt e interferences_summary.txt
-    - avviare la generazione dei file
+    - usare (o svuotare) la cache dei fogli già letti e la lettura a basso consumo di memoria
+    - avviare la generazione dei file in un thread separato (con avanzamento e annullamento)
+    - controllare la coerenza del foglio (lint.py) e salvare il report
+    - vedere in anteprima le righe generate, filtrarle e riordinarle al cambio dell'ordine delle zone
     """
 
     def __init__(self, master=None):
@@ -20,6 +164,39 @@ class App(tk.Frame):
         self.master.title("Interference Generator")
         self.grid(padx=10, pady=10)
         self.create_widgets()
+        self.sonda = os.environ.get(STARTUP_PROBE_ENV)
+        self.tempi_avvio = {}
+        self.after_idle(self.finestra_pronta)
+
+    def finestra_pronta(self):
+        """Chiamata appena la finestra è disegnata: avvia il precaricamento dei moduli."""
+        threading.Thread(target=precarica_moduli, daemon=True).start()
+        if not self.sonda:
+            return
+        self.update_idletasks()
+        self.tempi_avvio["window"] = time.time()
+        workbook = os.environ.get(STARTUP_WORKBOOK_ENV)
+        if not workbook:
+            self.chiudi_sonda()
+            return
+        cartella = os.path.dirname(os.path.abspath(self.sonda))
+        for entry, valore in (
+            (self.excel_entry, workbook),
+            (self.chart_entry, os.path.join(cartella, "startup_chart_config.txt")),
+            (self.summary_entry, os.path.join(cartella, "startup_interferences_summary.txt")),
+        ):
+            entry.delete(0, tk.END)
+            entry.insert(0, valore)
+        self.use_cache.set(False)
+        self.use_daemon.set(False)
+        self.generate_files(notifica=False)
+
+    def chiudi_sonda(self, errore=None):
+        """Scrive i tempi di avvio nel file indicato da STARTUP_PROBE_ENV e chiude l'applicazione."""
+        self.tempi_avvio["error"] = errore
+        with open(self.sonda, "w", encoding="utf-8") as f:
+            json.dump(self.tempi_avvio, f)
+        self.master.destroy()
 
     def create_widgets(self):
         # Excel file
@@ -72,14 +249,65 @@ class App(tk.Frame):
         self.summary_entry.grid(row=5, column=1, padx=5, pady=2)
         tk.Button(self, text="Browse…", command=self.browse_summary).grid(row=5, column=2, padx=5)
 
-        # Pulsante "Generate"
-        self.generate_btn = tk.Button(self, text="Generate Files", command=self.generate_files)
-        self.generate_btn.grid(row=6, column=0, columnspan=3, pady=10)
+        # Cache dei fogli già letti
+        self.cache = WorkbookCache()
+        self.use_cache = tk.BooleanVar(value=True)
+        self.low_memory = tk.BooleanVar(value=False)
+        self.incremental = tk.BooleanVar(value=False)
+        opt_frame = tk.Frame(self)
+        opt_frame.grid(row=6, column=1, sticky="w", padx=5)
+        self.cache_check = tk.Checkbutton(opt_frame, text="Use workbook cache", variable=self.use_cache)
+        self.cache_check.pack(side="left")
+        tk.Checkbutton(opt_frame, text="Low memory load", variable=self.low_memory).pack(side="left")
+        tk.Checkbutton(opt_frame, text="Incremental", variable=self.incremental).pack(side="left")
+        # Servizio daemon.py: usato se in esecuzione, altrimenti elaborazione locale.
+        # Il servizio non usa la cache dei fogli e non si può annullare: la relativa casella è disattivata
+        self.use_daemon = tk.BooleanVar(value=False)
+        tk.Checkbutton(opt_frame, text="Use daemon", variable=self.use_daemon,
+                       command=self.toggle_daemon).pack(side="left")
+        # Rigenerazione automatica ad ogni salvataggio del workbook
+        self.watch = tk.BooleanVar(value=False)
+        tk.Checkbutton(opt_frame, text="Watch", variable=self.watch, command=self.toggle_watch).pack(side="left")
+        tk.Button(self, text="Clear cache", command=self.clear_cache).grid(row=6, column=2, padx=5)
+
+        # Pulsanti "Generate" / "Cancel"
+        run_frame = tk.Frame(self)
+        run_frame.grid(row=7, column=0, columnspan=3, pady=(10, 2))
+        self.generate_btn = tk.Button(run_frame, text="Generate Files", command=self.generate_files)
+        self.generate_btn.pack(side="left", padx=5)
+        self.cancel_btn = tk.Button(run_frame, text="Cancel", command=self.cancel_generation, state="disabled")
+        self.cancel_btn.pack(side="left", padx=5)
+        self.lint_btn = tk.Button(run_frame, text="Check Sheet", command=self.check_sheet)
+        self.lint_btn.pack(side="left", padx=5)
+
+        # Avanzamento
+        self.progress = ttk.Progressbar(self, orient="horizontal", mode="determinate", maximum=100)
+        self.progress.grid(row=8, column=0, columnspan=3, sticky="we", padx=5)
+        self.status_label = tk.Label(self, text="", anchor="w")
+        self.status_label.grid(row=9, column=0, columnspan=3, sticky="we", padx=5)
+
+        # Anteprima delle righe di chart_config dell'ultima generazione
+        self.preview = PreviewPanel(self)
+        self.preview.grid(row=10, column=0, columnspan=3, sticky="nsew", pady=(10, 0))
+
+        # Stato della generazione in background
+        self.msg_queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = None
+        self.notifica = True  # False nelle rigenerazioni automatiche: nessuna finestra di dialogo
+        self.watcher = None
+        self.watch_queue = queue.Queue()
+        self.watch_pending = False
+        self.servizio_watch = None  # daemon.ServizioWorkbook del watch: foglio residente tra i salvataggi
 
     def browse_excel(self):
         path = filedialog.askopenfilename(
             title="Select Excel file",
-            filetypes=[("Excel files", "*.xlsx;*.xls")]
+            filetypes=[
+                ("Excel files", "*.xlsx;*.xlsm;*.xls;*.xlsb"),
+                ("OpenDocument", "*.ods"),
+                ("CSV/TSV exports", "*.csv;*.tsv;*.txt"),
+            ]
         )
         if path:
             self.excel_entry.delete(0, tk.END)
@@ -115,6 +343,7 @@ class App(tk.Frame):
             messagebox.showwarning("Warning", f"Zona '{zone}' già presente.")
         else:
             self.zone_listbox.insert("end", zone)
+            self.preview.reorder(self.get_zone_order())
         self.zone_entry.delete(0, tk.END)
 
     def move_up(self):
@@ -129,6 +358,7 @@ class App(tk.Frame):
         self.zone_listbox.delete(idx)
         self.zone_listbox.insert(idx - 1, text)
         self.zone_listbox.selection_set(idx - 1)
+        self.preview.reorder(self.get_zone_order())
 
     def move_down(self):
         """Sposta la voce selezionata giù di un posto."""
@@ -143,6 +373,7 @@ class App(tk.Frame):
         self.zone_listbox.delete(idx)
         self.zone_listbox.insert(idx + 1, text)
         self.zone_listbox.selection_set(idx + 1)
+        self.preview.reorder(self.get_zone_order())
 
     def remove_zone(self):
         """Rimuove la voce selezionata dalla listbox."""
@@ -151,12 +382,30 @@ class App(tk.Frame):
             return
         idx = sel[0]
         self.zone_listbox.delete(idx)
+        self.preview.reorder(self.get_zone_order())
+
+    def clear_cache(self):
+        """Svuota la cache dei fogli Excel già letti."""
+        n = self.cache.clear()
+        messagebox.showinfo("Cache", f"Voci eliminate dalla cache: {n}")
 
     def get_zone_order(self):
         """Restituisce la lista di zone dall’alto in basso nella listbox."""
         return list(self.zone_listbox.get(0, "end"))
 
-    def generate_files(self):
+    def toggle_daemon(self):
+        """La cache dei fogli non è usata dal servizio: la casella è attiva solo senza daemon."""
+        self.cache_check.config(state="disabled" if self.use_daemon.get() else "normal")
+
+    def generate_files(self, notifica=True, watch=False):
+        """
+        Avvia la generazione nel thread di lavoro.
+        watch=True (rigenerazioni del watcher): il foglio resta in memoria in self.servizio_watch.
+        """
+        if self.worker is not None and self.worker.is_alive():
+            return
+        self.notifica = notifica
+
         excel_path = self.excel_entry.get().strip()
         sheet_name = self.sheet_entry.get().strip()
         chart_out = self.chart_entry.get().strip()
@@ -164,22 +413,280 @@ class App(tk.Frame):
         zone_order = self.get_zone_order()
 
         if not excel_path or not sheet_name or not chart_out or not summary_out:
-            messagebox.showerror("Error", "Tutti i campi devono essere compilati.")
+            self.segnala_errore("Error", "Tutti i campi devono essere compilati.")
             return
 
         if not zone_order:
-            messagebox.showerror("Error", "Devi definire almeno una zona.")
+            self.segnala_errore("Error", "Devi definire almeno una zona.")
+            return
+
+        self.cancel_event = threading.Event()
+        parametri = dict(
+            excel_path=excel_path,
+            sheet_name=sheet_name,
+            output_chart=chart_out,
+            output_summary=summary_out,
+            zone_order=zone_order,
+            cache=self.cache if self.use_cache.get() else None,
+            low_memory=self.low_memory.get(),
+        )
+
+        self.generate_btn.config(state="disabled")
+        self.cancel_btn.config(state="normal")
+        self.lint_btn.config(state="disabled")
+        self.progress["value"] = 0
+        self.status_label.config(text="Avvio…")
+
+        incrementale = self.incremental.get()
+        usa_servizio = self.use_daemon.get() and not incrementale
+        self.worker = threading.Thread(
+            target=self._run_worker, args=(parametri, incrementale, usa_servizio, watch and not incrementale),
+            daemon=True
+        )
+        self.worker.start()
+        self.after(POLL_MS, self._poll_queue)
+
+    def segnala_errore(self, titolo, testo):
+        """
+        Errore di una generazione: finestra di dialogo solo se l'ha avviata l'utente,
+        nelle rigenerazioni automatiche (watch, sonda di avvio) solo nella barra di stato.
+        """
+        if self.notifica:
+            self.status_label.config(text="Errore.")
+            messagebox.showerror(titolo, testo)
+        else:
+            self.status_label.config(text=f"Errore: {testo}")
+
+    def _run_worker(self, parametri, incrementale=False, usa_servizio=False, watch=False):
+        """
+        Eseguito nel thread di generazione: comunica con la GUI solo tramite msg_queue.
+        I moduli pesanti (pandas, processor) sono importati qui, mai nel thread della GUI.
+        """
+        try:
+            from processor import InterferenceProcessor, ElaborazioneAnnullata, RunStats
+            from incremental import IncrementalProcessor
+            from query import IndiceRisultati
+            import daemon
+        except Exception as e:
+            self.msg_queue.put(("error", str(e)))
             return
 
+        progresso = lambda fase, cur, tot: self.msg_queue.put(("progress", fase, cur, tot))
         try:
-            processor = InterferenceProcessor(
-                excel_path=excel_path,
-                sheet_name=sheet_name,
-                output_chart=chart_out,
-                output_summary=summary_out,
-                zone_order=zone_order,
+            if watch:
+                # Watch: stesso stato caldo di "cli.py watch", il foglio è riletto solo se il file è cambiato
+                if self.servizio_watch is None:
+                    self.servizio_watch = daemon.ServizioWorkbook()
+                richiesta = {k: parametri[k] for k in
+                             ("excel_path", "sheet_name", "output_chart", "output_summary", "zone_order", "low_memory")}
+                esito = self.servizio_watch.genera(richiesta, progress_callback=progresso,
+                                                   cancel_event=self.cancel_event)
+                try:
+                    indice = IndiceRisultati.da_file(parametri["output_chart"], parametri["zone_order"])
+                    self.msg_queue.put(("preview", indice))
+                except (OSError, ValueError):
+                    pass
+                self.msg_queue.put(("done", "", RunStats.from_dict(esito["stats"])))
+                return
+            if usa_servizio and daemon.stato_servizio() is not None:
+                # Il servizio tiene il foglio in memoria: nessun avanzamento intermedio né annullamento
+                self.msg_queue.put(("servizio",))
+                self.msg_queue.put(("progress", "process", 0, 1))
+                esito = daemon.genera(
+                    parametri["excel_path"],
+                    parametri["sheet_name"],
+                    parametri["output_chart"],
+                    parametri["output_summary"],
+                    zone_order=parametri["zone_order"],
+                    low_memory=parametri["low_memory"],
+                )
+                # Il servizio non restituisce le righe: l'anteprima le rilegge dal file scritto
+                try:
+                    indice = IndiceRisultati.da_file(parametri["output_chart"], parametri["zone_order"])
+                    self.msg_queue.put(("preview", indice))
+                except (OSError, ValueError):
+                    pass
+                self.msg_queue.put(("done", "", esito["stats"]))
+                return
+            processor_cls = IncrementalProcessor if incrementale else InterferenceProcessor
+            processor = processor_cls(
+                **parametri,
+                progress_callback=progresso,
+                cancel_event=self.cancel_event,
             )
             processor.run()
-            messagebox.showinfo("Success", "File generati correttamente.")
+            self.msg_queue.put(("preview", processor.indice_risultati()))
+            dettaglio = processor.descrivi_report() if incrementale else ""
+            self.msg_queue.put(("done", dettaglio, processor.stats))
+        except ElaborazioneAnnullata:
+            self.msg_queue.put(("cancelled",))
+        except Exception as e:
+            self.msg_queue.put(("error", str(e)))
+
+    def check_sheet(self):
+        """Avvia il controllo di coerenza del foglio (lint.py) nel thread di lavoro."""
+        if self.worker is not None and self.worker.is_alive():
+            return
+        excel_path = self.excel_entry.get().strip()
+        sheet_name = self.sheet_entry.get().strip()
+        if not excel_path or not sheet_name:
+            messagebox.showerror("Error", "Indica il file Excel e il nome del foglio.")
+            return
+
+        self.notifica = True
+        self.cancel_event = threading.Event()
+        self.generate_btn.config(state="disabled")
+        self.lint_btn.config(state="disabled")
+        self.progress["value"] = 0
+        self.status_label.config(text="Controllo del foglio…")
+        self.worker = threading.Thread(
+            target=self._run_lint, args=(excel_path, sheet_name, self.low_memory.get()), daemon=True
+        )
+        self.worker.start()
+        self.after(POLL_MS, self._poll_queue)
+
+    def _run_lint(self, excel_path, sheet_name, low_memory):
+        """Eseguito nel thread di lavoro: legge il foglio ed esegue i controlli di lint.py."""
+        try:
+            from lint import SheetLinter
+
+            linter = SheetLinter.da_workbook(excel_path, sheet_name, low_memory=low_memory)
+            linter.esegui()
+            self.msg_queue.put(("lint", linter))
         except Exception as e:
-            messagebox.showerror("Generation Error", str(e))
+            self.msg_queue.put(("error", str(e)))
+
+    def show_lint_report(self, linter):
+        """Finestra con il riepilogo dei controlli e salvataggio del report completo."""
+        finestra = tk.Toplevel(self)
+        finestra.title("Sheet check")
+        testo = tk.Text(finestra, width=110, height=30, wrap="none")
+        scroll = tk.Scrollbar(finestra, command=testo.yview)
+        testo.config(yscrollcommand=scroll.set)
+        testo.grid(row=0, column=0, sticky="nsew")
+        scroll.grid(row=0, column=1, sticky="ns")
+        finestra.rowconfigure(0, weight=1)
+        finestra.columnconfigure(0, weight=1)
+        testo.insert("1.0", linter.riepilogo())
+        testo.config(state="disabled")
+
+        def salva():
+            path = filedialog.asksaveasfilename(
+                parent=finestra,
+                title="Save report as…",
+                defaultextension=".txt",
+                filetypes=[("Text files", "*.txt")]
+            )
+            if path:
+                try:
+                    linter.scrivi_report(path)
+                except Exception as e:
+                    messagebox.showerror("Error", str(e), parent=finestra)
+
+        tk.Button(finestra, text="Save report…", command=salva).grid(row=1, column=0, columnspan=2, pady=5)
+
+    def cancel_generation(self):
+        """Richiede l'interruzione della generazione in corso."""
+        self.cancel_event.set()
+        self.cancel_btn.config(state="disabled")
+        self.status_label.config(text="Annullamento in corso…")
+
+    def _poll_queue(self):
+        """Legge i messaggi del thread di generazione (chiamata periodicamente con after())."""
+        finito = False
+        while True:
+            try:
+                msg = self.msg_queue.get_nowait()
+            except queue.Empty:
+                break
+            tipo = msg[0]
+            if tipo == "progress":
+                _, fase, cur, tot = msg
+                inizio, fine, testo = FASI_PROGRESSO.get(fase, (0, 100, fase))
+                frazione = cur / tot if tot else 1
+                self.progress["value"] = inizio + (fine - inizio) * frazione
+                if not self.cancel_event.is_set():
+                    self.status_label.config(text=testo)
+            elif tipo == "servizio":
+                self.cancel_btn.config(state="disabled")
+                self.status_label.config(text="Generazione tramite il servizio (non annullabile)…")
+            elif tipo == "preview":
+                self.preview.set_index(msg[1], self.get_zone_order())
+            elif tipo == "done":
+                finito = True
+                stats = msg[2]
+                self.progress["value"] = 100
+                self.status_label.config(
+                    text=f"Completato in {stats.total_seconds:.2f} s: "
+                         f"{stats.charts_generated} grafici, {stats.pairs_processed} coppie, "
+                         f"{stats.malformed_roots} root non conformi."
+                )
+                testo = "File generati correttamente."
+                if msg[1]:
+                    testo += f"\n{msg[1]}"
+                if self.notifica:
+                    messagebox.showinfo("Success", testo)
+                if self.sonda:
+                    self.tempi_avvio["generation"] = time.time()
+                    self.chiudi_sonda()
+                    return
+            elif tipo == "lint":
+                finito = True
+                problemi = msg[1].problemi
+                self.progress["value"] = 100
+                self.status_label.config(
+                    text="Nessun problema trovato nel foglio." if problemi.empty
+                    else f"{len(problemi)} problemi trovati nel foglio."
+                )
+                self.show_lint_report(msg[1])
+            elif tipo == "cancelled":
+                finito = True
+                self.status_label.config(text="Generazione annullata.")
+            elif tipo == "error":
+                finito = True
+                self.segnala_errore("Generation Error", msg[1])
+                if self.sonda:
+                    self.chiudi_sonda(msg[1])
+                    return
+
+        if finito:
+            self.generate_btn.config(state="normal")
+            self.cancel_btn.config(state="disabled")
+            self.lint_btn.config(state="normal")
+        else:
+            self.after(POLL_MS, self._poll_queue)
+
+    def toggle_watch(self):
+        """Avvia/arresta la sorveglianza del workbook indicato in excel_entry."""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        if not self.watch.get():
+            self.servizio_watch = None  # libera il foglio residente
+            self.status_label.config(text="Watch disattivato.")
+            return
+
+        excel_path = self.excel_entry.get().strip()
+        if not excel_path or not os.path.isfile(excel_path):
+            messagebox.showerror("Error", f"File non trovato: '{excel_path}'")
+            self.watch.set(False)
+            return
+        self.watcher = WorkbookWatcher(excel_path, lambda: self.watch_queue.put(excel_path))
+        self.watcher.start()
+        self.status_label.config(text=f"In attesa di modifiche a {os.path.basename(excel_path)}…")
+        self.after(POLL_MS, self._poll_watch)
+
+    def _poll_watch(self):
+        """Avvia la rigenerazione richiesta dal watcher appena il thread di generazione è libero."""
+        if self.watcher is None:
+            return
+        while True:
+            try:
+                self.watch_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.watch_pending = True
+        if self.watch_pending and (self.worker is None or not self.worker.is_alive()):
+            self.watch_pending = False
+            self.generate_files(notifica=False, watch=True)
+        self.after(POLL_MS, self._poll_watch)
@@ -0,0 +1,239 @@
+# incremental.py
+
+import hashlib
+import json
+import os
+import tempfile
+
+from processor import InterferenceProcessor, CHART_NAMES, PROCESSOR_VERSION, REQUIRED_COLS
+from records import RigaChart, RigaSummary
+
+
+class IncrementalProcessor(InterferenceProcessor):
+    """
+    Variante di InterferenceProcessor che ricalcola solo le pagine cambiate.
+    - ad ogni run salva un manifest (JSON) che associa ad ogni "New Page"
+      l'impronta delle righe che la generano e le righe chart/summary prodotte
+    - al run successivo ricalcola solo le pagine con impronta diversa,
+      riusa le altre dal manifest e ricompone l'ordinamento (zone_idx, idx_num)
+    - il risultato è identico a una rigenerazione completa
+    Le righe che contribuiscono a una pagina sono le sue righe DynamicInterference
+    e tutte le righe StartNo/EndNo dei root dei suoi motori (con e senza underscore).
+    """
+
+    def __init__(self, *args, manifest_path: str = None, report_path: str = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manifest_path = manifest_path or self.output_chart + ".manifest.json"
+        self.report_path = report_path  # se indicato, run() vi scrive l'elenco delle pagine cambiate
+        self.pagine = {}    # pagina -> {"fingerprint", "charts": [[j, k, riga]], "summary": [[j, k, testo]]}
+        self.report = {}    # esito dell'ultimo process(): pagine nuove/modificate/rimosse/invariate
+
+    # -------------------------------------------------------------------------
+    # Manifest
+    # -------------------------------------------------------------------------
+    def carica_manifest(self) -> dict:
+        """
+        Restituisce le pagine del manifest precedente, oppure {} se assente,
+        illeggibile o prodotto da un'altra versione della logica di generazione.
+        """
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != PROCESSOR_VERSION:
+            return {}
+        return manifest.get("pages", {})
+
+    def salva_manifest(self):
+        """
+        Scrive il manifest su file temporaneo e lo sostituisce in modo atomico.
+        """
+        cartella = os.path.dirname(os.path.abspath(self.manifest_path))
+        fd, tmp = tempfile.mkstemp(dir=cartella, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": PROCESSOR_VERSION, "pages": self.pagine}, f, ensure_ascii=False)
+            os.replace(tmp, self.manifest_path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    # -------------------------------------------------------------------------
+    # Impronte delle pagine
+    # -------------------------------------------------------------------------
+    def righe_per_pagina(self) -> dict:
+        """
+        Raggruppa le posizioni (in df_dyn) delle righe DynamicInterference per pagina,
+        con la stessa normalizzazione di process(): str(New Page).strip(), pagine vuote escluse.
+        """
+        pagine = {}
+        for seq, valore in enumerate(self.df_dyn["New Page"].tolist()):
+            pagina = str(valore).strip()
+            if pagina:
+                pagine.setdefault(pagina, []).append(seq)
+        return pagine
+
+    def impronta_pagina(self, pagina: str, posizioni: list, valori: list) -> str:
+        """
+        SHA-256 delle righe DynamicInterference della pagina (in ordine di foglio)
+        e delle righe StartNo/EndNo dei root coinvolti.
+        valori: righe di df_dyn come tuple di REQUIRED_COLS.
+        """
+        h = hashlib.sha256()
+        h.update(pagina.encode("utf-8"))
+        radici = []
+        for seq in posizioni:
+            riga = valori[seq]
+            h.update(("\x1e" + "\x1f".join(str(v) for v in riga)).encode("utf-8"))
+            try:
+                prefix, motA, motB = self.estrai_motori_da_root(riga[0])
+            except ValueError:
+                continue
+            for motore in (motA, motB):
+                for root in (f"{prefix}_{motore}", f"{prefix}_{motore.replace('_', '')}"):
+                    if root not in radici:
+                        radici.append(root)
+
+        for root in radici:
+            h.update(("\x1d" + root).encode("utf-8"))
+            for _, is_start, ordinal, idx_val, descr, tag in self.indice_zone.get(root, ()):
+                h.update(f"\x1e{is_start}\x1f{ordinal}\x1f{idx_val}\x1f{descr}\x1f{tag}".encode("utf-8"))
+        return h.hexdigest()
+
+    def voci_pagina(self, posizioni: list, radici: list) -> list:
+        """
+        Per ogni grafico della pagina, nell'ordine in cui process() li genera,
+        restituisce (j, k, is_summary): j = riga della pagina, k = 0 per motA / 1 per motB.
+        radici: colonna DescrizioneRadice di df_dyn.
+        """
+        voci = []
+        for j, seq in enumerate(posizioni):
+            try:
+                _, motA, motB = self.estrai_motori_da_root(radici[seq])
+            except ValueError:
+                continue
+            voci.append((j, 0, True))
+            voci.append((j, 1, motB == motA))
+        return voci[: len(CHART_NAMES)]
+
+    # -------------------------------------------------------------------------
+    # Elaborazione
+    # -------------------------------------------------------------------------
+    def process(self):
+        """
+        Come InterferenceProcessor.process(), ma rielabora solo le pagine
+        la cui impronta è cambiata rispetto al manifest precedente.
+        """
+        self.filter_dynamic_interference()
+        self.inter_grouped.clear()
+        self.summary_grouped.clear()
+        if self.indice_zone is None:
+            self.costruisci_indice_zone()
+
+        righe = self.righe_per_pagina()
+        valori = list(zip(*(self.df_dyn[c].tolist() for c in REQUIRED_COLS)))
+        impronte = {pagina: self.impronta_pagina(pagina, pos, valori) for pagina, pos in righe.items()}
+        precedenti = self.carica_manifest()
+
+        da_rifare = [p for p in righe if precedenti.get(p, {}).get("fingerprint") != impronte[p]]
+        self.report = {
+            "nuove": [p for p in da_rifare if p not in precedenti],
+            "modificate": [p for p in da_rifare if p in precedenti],
+            "rimosse": sorted(p for p in precedenti if p not in righe),
+            "invariate": len(righe) - len(da_rifare),
+        }
+
+        nuove = self.elabora_pagine(da_rifare, righe) if da_rifare else {}
+        self.pagine = {
+            pagina: dict(nuove[pagina], fingerprint=impronte[pagina]) if pagina in nuove else precedenti[pagina]
+            for pagina in righe
+        }
+        self.componi_risultati(righe)
+
+    def elabora_pagine(self, pagine: list, righe: dict) -> dict:
+        """
+        Esegue il motore configurato solo sulle righe delle pagine indicate
+        e associa ogni riga prodotta alla sua (j, k) di origine.
+        """
+        df_completo = self.df_dyn
+        self.df_dyn = df_completo.iloc[sorted(seq for p in pagine for seq in righe[p])]
+        try:
+            if self.engine == "vectorized":
+                self.process_vettoriale()
+            else:
+                self.process_classico()
+        finally:
+            self.df_dyn = df_completo
+
+        charts = {p: [] for p in pagine}
+        summary = {p: [] for p in pagine}
+        for riga in self.inter_grouped:
+            charts[riga.pagina].append(riga.campi())
+        for riga in self.summary_grouped:
+            summary[riga.pagina].append(riga.testo)
+        self.inter_grouped.clear()
+        self.summary_grouped.clear()
+
+        radici = self.df_dyn["DescrizioneRadice"].tolist()
+        risultato = {}
+        for pagina in pagine:
+            voci = self.voci_pagina(righe[pagina], radici)
+            voci_summary = [(j, k) for j, k, is_summary in voci if is_summary]
+            if len(voci) != len(charts[pagina]) or len(voci_summary) != len(summary[pagina]):
+                raise RuntimeError(f"Incoerenza nella rielaborazione della pagina '{pagina}'")
+            risultato[pagina] = {
+                "charts": [[j, k, riga] for (j, k, _), riga in zip(voci, charts[pagina])],
+                "summary": [[j, k, testo] for (j, k), testo in zip(voci_summary, summary[pagina])],
+            }
+        return risultato
+
+    def componi_risultati(self, righe: dict):
+        """
+        Ricompone inter_grouped e summary_grouped da self.pagine nell'ordine di una
+        rigenerazione completa: (zone_idx, idx_num), poi ordine di riga nel foglio e motore.
+        """
+        charts = []
+        summary = []
+        for pagina, dati in self.pagine.items():
+            zone_idx, idx_num = self.parse_zone_and_index(pagina)
+            posizioni = righe[pagina]
+            for j, k, riga in dati["charts"]:
+                charts.append((zone_idx, idx_num, posizioni[j], k, riga))
+            for j, k, testo in dati["summary"]:
+                summary.append((zone_idx, idx_num, posizioni[j], k, pagina, testo))
+
+        charts.sort(key=lambda x: x[:4])
+        summary.sort(key=lambda x: x[:4])
+        self.inter_grouped.extend(RigaChart.da_campi(z, i, riga) for z, i, _, _, riga in charts)
+        self.summary_grouped.extend(RigaSummary(z, i, pagina, testo) for z, i, _, _, pagina, testo in summary)
+
+    def scrivi_report(self, path: str):
+        """
+        Scrive l'elenco delle pagine nuove, modificate e rimosse (utile per la revisione del documento Word).
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            for chiave in ("nuove", "modificate", "rimosse"):
+                for pagina in self.report.get(chiave, []):
+                    f.write(f"{chiave}\t{pagina}\n")
+
+    def run(self):
+        """
+        Flusso completo di InterferenceProcessor.run(); il manifest (ed eventuale report)
+        viene salvato solo dopo la scrittura di entrambi i file di output.
+        """
+        super().run()
+        self.salva_manifest()
+        if self.report_path:
+            self.scrivi_report(self.report_path)
+
+    def descrivi_report(self) -> str:
+        """
+        Riepilogo di una riga dell'ultimo process().
+        """
+        r = self.report
+        return (
+            f"pagine nuove: {len(r.get('nuove', []))}, modificate: {len(r.get('modificate', []))}, "
+            f"rimosse: {len(r.get('rimosse', []))}, invariate: {r.get('invariate', 0)}"
+        )
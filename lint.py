@@ -0,0 +1,265 @@
+# lint.py
+
+import numpy as np
+import pandas as pd
+
+from processor import InterferenceProcessor, CHART_NAMES
+from writers import scrivi_tabella
+
+# Controlli eseguiti, nell'ordine del report
+CONTROLLI = {
+    "start_end": "Start/End senza coppia",
+    "ordinali": "Ordinali mancanti o ignorati",
+    "capacita": "Pagine oltre i 3 grafici",
+    "root": "Root non conformi",
+    "tag_duplicati": "Tag PLC duplicati",
+}
+
+# Colonne del report (una riga per problema)
+LINT_HEADER = ["controllo", "riga", "root", "pagina", "dettaglio"]
+
+# Righe mostrate per controllo nel riepilogo testuale (il file di report le contiene tutte)
+MAX_RIGHE_RIEPILOGO = 20
+
+# Prima riga dati del foglio (riga 1 = intestazione)
+PRIMA_RIGA = 2
+
+
+class SheetLinter:
+    """
+    Controlli di coerenza del foglio "Variabili" in un'unica passata colonnare,
+    per capire perché un grafico manca senza cercare a mano tra le righe:
+    - start_end: Start/End senza coppia tra le righe che il generatore cerca per ogni coppia di motori
+      (righe_zone_motore/raccogli_zone_no_interf: l'i-esimo Start con l'i-esimo End, il resto è scartato)
+    - ordinali: zone con ordinali non consecutivi (es. 1st e 3rd senza 2nd) o >= 3, ignorati dal generatore
+    - capacita: pagine con più motori dei grafici disponibili (ChartLeft/Right/Center)
+    - root: righe DynamicInterference con root che estrai_motori_da_root() rifiuta
+    - tag_duplicati: stesso tag PLC <ObjectType>_<DescrizioneEstensione>_<Index> su più righe
+    Le righe sono numerate come nel foglio Excel (1 = intestazione), anche con low_memory
+    (i lettori mantengono le righe vuote intermedie, vedi readers.righe_obbligatorie).
+    """
+
+    def __init__(self, processor: InterferenceProcessor):
+        self.processor = processor
+        self.problemi = None
+
+    @classmethod
+    def da_workbook(cls, excel_path: str, sheet_name: str, low_memory: bool = False, reader: str = None):
+        processor = InterferenceProcessor(excel_path, sheet_name, "", "", low_memory=low_memory, reader=reader)
+        processor.load_data()
+        return cls(processor)
+
+    def esegui(self) -> pd.DataFrame:
+        """
+        Esegue tutti i controlli e restituisce i problemi (colonne LINT_HEADER),
+        ordinati per controllo e riga.
+        """
+        p = self.processor
+        if p.tabella_zone is None:
+            p.costruisci_tabella_zone()
+        df = p.df_vars
+        descr = df["DescrizioneEstensione"]
+
+        # Riga Excel di ogni riga StartNo/EndNo (stesso ordine di tabella_zone)
+        is_zona = descr.str.startswith("StartNo", na=False) | descr.str.startswith("EndNo", na=False)
+        zone = p.tabella_zone.assign(riga=np.flatnonzero(is_zona.to_numpy()) + PRIMA_RIGA)
+        # Zona = DescrizioneEstensione senza "StartNo"/"EndNo" e senza ordinale, calcolata per valore distinto
+        codici, distinte = pd.factorize(zone["descr"])
+        chiavi = (
+            pd.Series(distinte, dtype=object)
+            .str.replace(r"^(?:StartNo|EndNo)", "", regex=True)
+            .str.replace(r"(?i)\d+(?:st|nd|rd|th)", "", n=1, regex=True)
+        )
+        zone["chiave"] = chiavi.to_numpy()[codici]
+
+        # Righe DynamicInterference come in filter_dynamic_interference()
+        is_dyn = (df["DataType"] == "BOOL") & descr.str.contains("DynamicInterference", na=False)
+        dyn = pd.DataFrame({
+            "riga": np.flatnonzero(is_dyn.to_numpy()) + PRIMA_RIGA,
+            "root": df["DescrizioneRadice"][is_dyn].astype(object).to_numpy(),
+            "pagina": df["New Page"][is_dyn].astype(object).map(str).str.strip().to_numpy(),
+        })
+        dyn["errore_root"] = dyn["root"].map(self.errori_root(dyn["root"]))
+
+        parti = [
+            self.controlla_start_end(zone, dyn),
+            self.controlla_ordinali(zone),
+            self.controlla_capacita(dyn),
+            self.controlla_root(dyn),
+            self.controlla_tag_duplicati(zone),
+        ]
+        problemi = pd.concat([pd.DataFrame(columns=LINT_HEADER)] + [x for x in parti if not x.empty], ignore_index=True)
+        ordine = {c: i for i, c in enumerate(CONTROLLI)}
+        problemi = problemi.assign(_ordine=problemi["controllo"].map(ordine)).sort_values(
+            ["_ordine", "riga"], kind="stable"
+        ).drop(columns="_ordine").reset_index(drop=True)
+        problemi["riga"] = problemi["riga"].astype("int64")
+        self.problemi = problemi[LINT_HEADER]
+        return self.problemi
+
+    @staticmethod
+    def errori_root(roots: pd.Series) -> dict:
+        """
+        {root: messaggio} per le root distinte rifiutate da estrai_motori_da_root (una chiamata per valore unico).
+        """
+        errori = {}
+        for root in pd.unique(roots):
+            if not isinstance(root, str):
+                errori[root] = "Root mancante"
+                continue
+            try:
+                InterferenceProcessor.estrai_motori_da_root(root)
+            except ValueError as e:
+                errori[root] = str(e)
+        return errori
+
+    def controlla_start_end(self, zone: pd.DataFrame, dyn: pd.DataFrame) -> pd.DataFrame:
+        """
+        Per ogni coppia di motori delle righe DynamicInterference elaborate, le stesse righe
+        StartNo/EndNo che il generatore considera (righe_zone_motore) confrontate con le coppie
+        che forma davvero (raccogli_zone_no_interf): Start/End in eccesso per ordinale 1 e 2.
+        """
+        p = self.processor
+        righe_excel = zone["riga"].to_numpy()
+        validi = dyn[dyn["errore_root"].isna() & (dyn["pagina"] != "")]
+        visti = set()
+        problemi = []
+        for root in pd.unique(validi["root"]):
+            prefix, motA, motB = p.estrai_motori_da_root(root)
+            for motX, motY in ((motA, motB), (motB, motA)):
+                if (prefix, motX, motY) in visti:
+                    continue
+                visti.add((prefix, motX, motY))
+                righe = p.righe_zone_motore(motX, motY, prefix)
+                if not righe:
+                    continue
+                for ordinale, coppie in zip((1, 2), p.raccogli_zone_no_interf(motX, motY, prefix)):
+                    sel = [r for r in righe if r[2] == ordinale]
+                    scartate = len(sel) - 2 * len(coppie)
+                    if not scartate:
+                        continue
+                    n_start = sum(1 for r in sel if r[1])
+                    pos, descr = sel[0][0], sel[0][4]
+                    problemi.append((
+                        righe_excel[pos], zone["root"].iat[pos],
+                        f"{n_start} Start / {len(sel) - n_start} End per '{motY}' (ordinale {ordinale}, "
+                        f"es. '{descr}'): {scartate} senza coppia, ignorati",
+                    ))
+        if not problemi:
+            return pd.DataFrame(columns=LINT_HEADER)
+        riga, root, dettaglio = zip(*problemi)
+        return pd.DataFrame({
+            "controllo": "start_end",
+            "riga": riga,
+            "root": root,
+            "pagina": "",
+            "dettaglio": dettaglio,
+        })
+
+    @staticmethod
+    def controlla_ordinali(zone: pd.DataFrame) -> pd.DataFrame:
+        g = zone.groupby(["root", "chiave"], sort=False, dropna=False).agg(
+            riga=("riga", "min"), massimo=("ordinal", "max"), minimo=("ordinal", "min"), distinti=("ordinal", "nunique"),
+        ).reset_index()
+        # Ordinali consecutivi 1..max: minimo 1 e tanti valori distinti quanto il massimo
+        buco = (g["minimo"] != 1) | (g["distinti"] != g["massimo"])
+        oltre = g["massimo"] >= 3
+        g = g.assign(buco=buco, oltre=oltre)[buco | oltre]
+        if g.empty:
+            return pd.DataFrame(columns=LINT_HEADER)
+
+        # Elenco degli ordinali solo per i gruppi segnalati
+        sel = zone.merge(g[["root", "chiave"]], on=["root", "chiave"])
+        ordinali = sel.drop_duplicates(["root", "chiave", "ordinal"]).sort_values("ordinal").groupby(
+            ["root", "chiave"], sort=False, dropna=False
+        )["ordinal"].agg(list)
+        g = g.merge(ordinali.rename("ordinali").reset_index(), on=["root", "chiave"], how="left")
+        g["ordinali"] = g["ordinali"].map(lambda o: ",".join(map(str, o)))
+        dettaglio = "Ordinali presenti: " + g["ordinali"] + " (zona '" + g["chiave"].astype(str) + "')"
+        dettaglio = dettaglio + np.where(g["buco"], "; sequenza non consecutiva da 1", "")
+        dettaglio = dettaglio + np.where(g["oltre"], "; ordinali >= 3 ignorati dal generatore", "")
+        return pd.DataFrame({
+            "controllo": "ordinali",
+            "riga": g["riga"],
+            "root": g["root"],
+            "pagina": "",
+            "dettaglio": dettaglio,
+        })
+
+    @staticmethod
+    def controlla_capacita(dyn: pd.DataFrame) -> pd.DataFrame:
+        validi = dyn[dyn["errore_root"].isna() & (dyn["pagina"] != "")]
+        g = validi.groupby("pagina", sort=False).agg(riga=("riga", "min"), coppie=("riga", "size")).reset_index()
+        g["motori"] = g["coppie"] * 2
+        g = g[g["motori"] > len(CHART_NAMES)]
+        if g.empty:
+            return pd.DataFrame(columns=LINT_HEADER)
+        return pd.DataFrame({
+            "controllo": "capacita",
+            "riga": g["riga"],
+            "root": "",
+            "pagina": g["pagina"],
+            "dettaglio": (
+                g["motori"].astype(str) + f" motori per {len(CHART_NAMES)} grafici: "
+                + (g["motori"] - len(CHART_NAMES)).astype(str) + " scartati"
+            ),
+        })
+
+    @staticmethod
+    def controlla_root(dyn: pd.DataFrame) -> pd.DataFrame:
+        errati = dyn[dyn["errore_root"].notna()]
+        if errati.empty:
+            return pd.DataFrame(columns=LINT_HEADER)
+        return pd.DataFrame({
+            "controllo": "root",
+            "riga": errati["riga"],
+            "root": errati["root"].map(lambda r: r if isinstance(r, str) else ""),
+            "pagina": errati["pagina"],
+            "dettaglio": errati["errore_root"],
+        })
+
+    @staticmethod
+    def controlla_tag_duplicati(zone: pd.DataFrame) -> pd.DataFrame:
+        con_tag = zone[zone["tag"] != ""]
+        dup = con_tag[con_tag["tag"].duplicated(keep=False)]
+        if dup.empty:
+            return pd.DataFrame(columns=LINT_HEADER)
+        g = dup.groupby("tag", sort=False).agg(
+            riga=("riga", "min"), root=("root", "first"), n=("riga", "size"), righe=("riga", list),
+        ).reset_index()
+        g["righe"] = g["righe"].map(lambda r: ", ".join(map(str, r[:10])) + (", …" if len(r) > 10 else ""))
+        return pd.DataFrame({
+            "controllo": "tag_duplicati",
+            "riga": g["riga"],
+            "root": g["root"],
+            "pagina": "",
+            "dettaglio": "Tag '" + g["tag"] + "' su " + g["n"].astype(str) + " righe (" + g["righe"] + ")",
+        })
+
+    def riepilogo(self, max_righe: int = MAX_RIGHE_RIEPILOGO) -> str:
+        """
+        Riepilogo testuale: numero di problemi per controllo e le prime righe di ciascuno.
+        """
+        if self.problemi is None:
+            self.esegui()
+        righe = []
+        for controllo, titolo in CONTROLLI.items():
+            sel = self.problemi[self.problemi["controllo"] == controllo]
+            righe.append(f"{'[OK]    ' if sel.empty else '[ERRORE]'} {titolo}: {len(sel)}")
+            for r in sel.head(max_righe).itertuples(index=False):
+                dove = " ".join(x for x in (f"root '{r.root}'" if r.root else "", f"pagina '{r.pagina}'" if r.pagina else "") if x)
+                righe.append(f"    riga {r.riga}: {dove + ' - ' if dove else ''}{r.dettaglio}")
+            if len(sel) > max_righe:
+                righe.append(f"    … altri {len(sel) - max_righe}")
+        return "\n".join(righe)
+
+    def scrivi_report(self, path: str, formati=()):
+        """
+        Scrive tutti i problemi nel file di testo tab-separated `path` (più i formati aggiuntivi, vedi writers.py).
+        """
+        if self.problemi is None:
+            self.esegui()
+        scrivi_tabella(
+            path, LINT_HEADER,
+            (tuple(map(str, r)) for r in self.problemi.itertuples(index=False, name=None)), formati,
+        )
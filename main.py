@@ -1,12 +1,20 @@
 # main.py
 
+import multiprocessing
+import sys
 import tkinter as tk
 from gui import App
 
 def main():
+    # Con argomenti (es. "main.py batch progetti/") si usa la modalità a riga di comando
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
     root = tk.Tk()
     app = App(master=root)
     app.mainloop()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
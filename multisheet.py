@@ -0,0 +1,220 @@
+# multisheet.py
+
+import fnmatch
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from processor import InterferenceProcessor, CHART_HEADER
+from readers import seleziona_lettore
+from records import SUMMARY_HEADER
+from writers import verifica_formati, scrivi_tabella
+
+COMBINED_CHART = "chart_config.txt"
+COMBINED_SUMMARY = "interferences_summary.txt"
+
+
+def seleziona_fogli(disponibili: list, fogli=None, pattern: str = None) -> list:
+    """
+    Fogli da elaborare, nell'ordine del workbook:
+    - fogli: nomi espliciti (errore se uno non esiste)
+    - pattern: pattern stile glob sul nome (es. "Variabili*"), case-insensitive
+    - nessuno dei due: tutti i fogli
+    """
+    if fogli:
+        mancanti = [f for f in fogli if f not in disponibili]
+        if mancanti:
+            raise ValueError(f"Fogli non trovati nel workbook: {mancanti}")
+        richiesti = set(fogli)
+        selezionati = [f for f in disponibili if f in richiesti]
+    else:
+        selezionati = list(disponibili)
+    if pattern:
+        selezionati = [f for f in selezionati if fnmatch.fnmatch(f.lower(), pattern.lower())]
+    return selezionati
+
+
+def leggi_fogli(excel_path: str, fogli=None, pattern: str = None, low_memory: bool = False,
+                reader: str = None) -> dict:
+    """
+    Apre il workbook una sola volta e legge tutti i fogli selezionati.
+    Restituisce {foglio: DataFrame oppure eccezione}: un foglio non valido
+    (es. senza colonne obbligatorie) non impedisce la lettura degli altri.
+    Il lettore è scelto come in InterferenceProcessor.load_data (vedi readers.py).
+    """
+    if not os.path.isfile(excel_path):
+        raise FileNotFoundError(f"File non trovato: '{excel_path}'")
+    lettore = seleziona_lettore(excel_path, reader)
+    return lettore.leggi_fogli(excel_path, lambda nomi: seleziona_fogli(nomi, fogli, pattern), low_memory)
+
+
+class ProcessorFoglio(InterferenceProcessor):
+    """
+    InterferenceProcessor su un foglio già letto: load_data() adotta il DataFrame
+    ricevuto invece di riaprire il workbook.
+    """
+
+    def __init__(self, df_vars: pd.DataFrame, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.df_foglio = df_vars
+
+    def load_data(self):
+        self.imposta_foglio(self.df_foglio)
+
+
+def elabora_foglio(foglio: str, df_vars: pd.DataFrame, parametri: dict) -> dict:
+    """
+    Elabora un foglio (chiamata nei processi del pool).
+    Con output_chart/output_summary None non scrive file e restituisce le righe
+    generate (per l'output combinato).
+    """
+    inizio = time.perf_counter()
+    righe_chart, righe_summary = [], []
+    try:
+        scrivi = parametri.get("output_chart") is not None
+        if scrivi:
+            for chiave in ("output_chart", "output_summary"):
+                cartella = os.path.dirname(parametri[chiave])
+                if cartella:
+                    os.makedirs(cartella, exist_ok=True)
+        processor = ProcessorFoglio(df_vars, sheet_name=foglio, **parametri)
+        if scrivi:
+            processor.run()
+        else:
+            processor.load_data()
+            processor.process()
+            righe_chart = [riga.campi() for riga in processor.inter_grouped]
+            righe_summary = [riga.campi() for riga in processor.summary_grouped]
+        errore = None
+    except Exception as e:
+        errore = f"{type(e).__name__}: {e}"
+    return {
+        "foglio": foglio,
+        "ok": errore is None,
+        "errore": errore,
+        "charts": righe_chart,
+        "summary": righe_summary,
+        "secondi": time.perf_counter() - inizio,
+    }
+
+
+class MultiSheetProcessor:
+    """
+    Elabora più fogli dello stesso workbook aprendo il file una sola volta.
+    - fogli / pattern: selezione dei fogli (vedi seleziona_fogli); default tutti
+    - ogni foglio è elaborato in modo indipendente, in parallelo su più processi
+    - output per foglio in <out_dir>/<foglio>/chart_config.txt e interferences_summary.txt,
+      oppure (combina=True) un unico chart_config.txt / interferences_summary.txt
+      in out_dir con la colonna "foglio" in testa
+    - formati: formati aggiuntivi scritti accanto ai file di testo (vedi writers.py)
+    """
+
+    def __init__(
+        self,
+        excel_path: str,
+        fogli=None,
+        pattern: str = None,
+        out_dir: str = None,
+        zone_order=None,
+        engine: str = "classic",
+        low_memory: bool = False,
+        reader: str = None,
+        jobs: int = None,
+        combina: bool = False,
+        formati=None,
+    ):
+        self.excel_path = excel_path
+        self.fogli = fogli
+        self.pattern = pattern
+        self.out_dir = out_dir or os.path.join(
+            os.path.dirname(os.path.abspath(excel_path)),
+            os.path.splitext(os.path.basename(excel_path))[0],
+        )
+        self.zone_order = zone_order
+        self.engine = engine
+        self.low_memory = low_memory
+        self.reader = reader
+        self.jobs = jobs
+        self.combina = combina
+        self.formati = verifica_formati(formati)
+        self.esiti = []  # un dizionario per foglio, nell'ordine del workbook
+
+    def percorsi_output(self, foglio: str):
+        """
+        (chart_config, summary) del foglio; (None, None) con output combinato.
+        """
+        if self.combina:
+            return None, None
+        cartella = os.path.join(self.out_dir, foglio.strip())
+        return os.path.join(cartella, "chart_config.txt"), os.path.join(cartella, "interferences_summary.txt")
+
+    def parametri(self, foglio: str) -> dict:
+        output_chart, output_summary = self.percorsi_output(foglio)
+        return {
+            "excel_path": self.excel_path,
+            "output_chart": output_chart,
+            "output_summary": output_summary,
+            "zone_order": self.zone_order,
+            "engine": self.engine,
+            "output_formats": self.formati,
+        }
+
+    def run(self, stampa=print) -> list:
+        """
+        Legge i fogli, li elabora e scrive gli output. Restituisce gli esiti per foglio.
+        """
+        letti = leggi_fogli(self.excel_path, self.fogli, self.pattern, self.low_memory, self.reader)
+        if not letti:
+            raise ValueError(f"Nessun foglio selezionato in '{self.excel_path}'")
+
+        esiti = {}
+        da_elaborare = []
+        for foglio, df in letti.items():
+            if isinstance(df, Exception):
+                esiti[foglio] = {
+                    "foglio": foglio, "ok": False, "errore": f"{type(df).__name__}: {df}",
+                    "charts": [], "summary": [], "secondi": 0.0,
+                }
+            else:
+                da_elaborare.append((foglio, df))
+
+        jobs = self.jobs or os.cpu_count() or 1
+        if jobs == 1 or len(da_elaborare) <= 1:
+            for foglio, df in da_elaborare:
+                esiti[foglio] = elabora_foglio(foglio, df, self.parametri(foglio))
+        else:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(da_elaborare))) as pool:
+                futures = [pool.submit(elabora_foglio, f, df, self.parametri(f)) for f, df in da_elaborare]
+                for fut in as_completed(futures):
+                    r = fut.result()
+                    esiti[r["foglio"]] = r
+
+        self.esiti = [esiti[f] for f in letti]
+        if self.combina:
+            self.scrivi_combinato()
+        for r in self.esiti:
+            stampa(formatta_esito(r))
+        return self.esiti
+
+    def scrivi_combinato(self):
+        """
+        Scrive chart_config.txt e interferences_summary.txt unici con la colonna "foglio",
+        fogli nell'ordine del workbook e righe nell'ordine di ciascun foglio.
+        """
+        os.makedirs(self.out_dir, exist_ok=True)
+        scrivi_tabella(
+            os.path.join(self.out_dir, COMBINED_CHART), ["foglio"] + CHART_HEADER,
+            ((r["foglio"], *riga) for r in self.esiti for riga in r["charts"]), self.formati,
+        )
+        scrivi_tabella(
+            os.path.join(self.out_dir, COMBINED_SUMMARY), ["foglio"] + SUMMARY_HEADER,
+            ((r["foglio"], *riga) for r in self.esiti for riga in r["summary"]), self.formati,
+        )
+
+
+def formatta_esito(r: dict) -> str:
+    if r["ok"]:
+        return f"[OK]     foglio '{r['foglio']}' ({r['secondi']:.2f} s)"
+    return f"[ERRORE] foglio '{r['foglio']}' ({r['secondi']:.2f} s): {r['errore']}"
@@ -1,22 +1,96 @@
 # processor.py
 
+import numpy as np
 import pandas as pd
+import json
 import os
 import re
+import time
+from contextlib import contextmanager
+
+from zones import DEFAULT_ZONE_ORDER, classificatore_zone
+from readers import REQUIRED_COLS, READER_NAMES, seleziona_lettore
+from records import CHART_NAMES, CHART_HEADER, SUMMARY_HEADER, RigaChart, RigaSummary, ordina_righe
+from writers import verifica_formati, scrivi_tabella
+from query import IndiceRisultati
 
 # =============================================================================
 # CONFIGURAZIONE DI DEFAULT
 # =============================================================================
-DEFAULT_ZONE_ORDER = [
-    "Infeed",
-    "Wheel1",
-    "Wheel2",
-    "Wheel3",
-    "Exit",
-    "Stamp",
-    "InnerLiner",
-    "OuterLiner",
-]
+# Versione della logica di generazione: va incrementata quando cambia il contenuto dei file di output
+PROCESSOR_VERSION = 1
+
+# Motori di elaborazione disponibili per process()
+ENGINES = ("classic", "vectorized")
+
+
+# Modalità di profilazione disponibili per run()
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+
+class RunStats:
+    """
+    Statistiche strutturate di un'esecuzione di InterferenceProcessor:
+    tempi per fase e contatori raccolti durante load/filter/process/write.
+    """
+
+    def __init__(self):
+        self.stage_seconds = {}        # fase -> secondi
+        self.rows_read = 0             # righe lette dal foglio
+        self.dynamic_rows = 0          # righe DynamicInterference trovate
+        self.pairs_processed = 0       # coppie motori elaborate (root valida, pagina non vuota)
+        self.pages_skipped = 0         # righe DynamicInterference saltate per pagina vuota
+        self.charts_skipped = 0        # motori scartati perché la pagina ha già 3 grafici
+        self.malformed_roots = 0       # root scartate da estrai_motori_da_root
+        self.charts_generated = 0      # righe di chart_config
+        self.zone_lookups = 0          # chiamate a raccogli_zone_no_interf (o terne nel motore vettoriale)
+        self.zone_lookup_seconds = 0.0 # tempo speso nella ricerca delle zone di no-interferenza
+        self.peak_memory_bytes = None  # solo con profile="tracemalloc"
+        self.reader = None             # backend che ha letto il foglio (readers.py)
+
+    def reset_process(self):
+        """Azzera i contatori di process() (richiamabile più volte sullo stesso processor)."""
+        self.pairs_processed = 0
+        self.pages_skipped = 0
+        self.charts_skipped = 0
+        self.malformed_roots = 0
+        self.charts_generated = 0
+        self.zone_lookups = 0
+        self.zone_lookup_seconds = 0.0
+
+    @contextmanager
+    def fase(self, nome: str):
+        """Cronometra il blocco e somma il tempo in stage_seconds[nome]."""
+        inizio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[nome] = self.stage_seconds.get(nome, 0.0) + time.perf_counter() - inizio
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.stage_seconds.values())
+
+    def to_dict(self) -> dict:
+        d = dict(vars(self))
+        d["stage_seconds"] = dict(self.stage_seconds)
+        d["total_seconds"] = self.total_seconds
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict):
+        """Ricostruisce le statistiche da to_dict() (es. ricevute dal servizio daemon.py)."""
+        stats = cls()
+        for nome in vars(stats):
+            if nome in d:
+                setattr(stats, nome, d[nome])
+        return stats
+
+
+class ElaborazioneAnnullata(RuntimeError):
+    """
+    Sollevata quando l'elaborazione viene interrotta tramite cancel_event.
+    """
 
 
 class InterferenceProcessor:
@@ -39,51 +113,119 @@ class InterferenceProcessor:
         output_chart: str,
         output_summary: str,
         zone_order=None,
+        engine: str = "classic",
+        cache=None,
+        low_memory: bool = False,
+        reader: str = None,
+        progress_callback=None,
+        cancel_event=None,
+        stats_log: str = None,
+        profile: str = None,
+        output_formats=None,
     ):
+        if engine not in ENGINES:
+            raise ValueError(f"Engine non supportato: '{engine}'. Usa uno tra {list(ENGINES)}")
+        if reader not in (None, "auto") and reader not in READER_NAMES:
+            raise ValueError(f"Lettore non supportato: '{reader}'. Usa uno tra {READER_NAMES}")
+        if profile is not None and profile not in PROFILE_MODES:
+            raise ValueError(f"Profilazione non supportata: '{profile}'. Usa uno tra {list(PROFILE_MODES)}")
+
         self.excel_path = excel_path
         self.sheet_name = sheet_name
         self.output_chart = output_chart
         self.output_summary = output_summary
-        self.zone_order = zone_order or DEFAULT_ZONE_ORDER
+        self.zone_order = zone_order or DEFAULT_ZONE_ORDER  # imposta anche il ZoneClassifier (vedi setter)
+        self.engine = engine
+        self.cache = cache        # WorkbookCache opzionale (vedi cache.py)
+        self.low_memory = low_memory
+        self.reader = reader      # backend di lettura (readers.py); None = scelta automatica
+        self.progress_callback = progress_callback  # f(fase, corrente, totale), fasi: load/filter/process/write
+        self.cancel_event = cancel_event            # threading.Event: se impostato interrompe l'elaborazione
+        self.stats_log = stats_log  # file JSON Lines a cui run() aggiunge le statistiche di ogni esecuzione
+        self.profile = profile      # None, "cprofile" o "tracemalloc": profilo scritto accanto agli output
+        self.output_formats = verifica_formati(output_formats)  # formati aggiuntivi (writers.OUTPUT_FORMATS)
+        self.stats = RunStats()
 
         self.df_vars = None
         self.df_dyn = None
-        self.inter_grouped = []   # lista di tuple (zone_idx, idx_num, riga_chart)
-        self.summary_grouped = [] # lista di tuple (zone_idx, idx_num, pagina, "Interferences : A/B")
+        self.tabella_zone = None  # DataFrame righe StartNo/EndNo con ordinal e tag (vedi costruisci_tabella_zone)
+        self.indice_zone = None   # dict DescrizioneRadice -> righe StartNo/EndNo (vedi costruisci_indice_zone)
+        self.inter_grouped = []   # lista di RigaChart (vedi records.py)
+        self.summary_grouped = [] # lista di RigaSummary
+
+    @property
+    def zone_order(self) -> list:
+        return self._zone_order
+
+    @zone_order.setter
+    def zone_order(self, zone_order):
+        # Il classificatore è scelto una volta per ordine di zone, non ad ogni parse_zone_and_index
+        self._zone_order = list(zone_order)
+        self._classificatore = classificatore_zone(self._zone_order)
+
+    def notifica_progresso(self, fase: str, corrente: int, totale: int):
+        """
+        Inoltra l'avanzamento a progress_callback (se presente).
+        """
+        if self.progress_callback is not None:
+            self.progress_callback(fase, corrente, totale)
+
+    def avvisa(self, testo: str):
+        """
+        Avviso di process() (es. pagina con più di 3 grafici): stampato su stdout.
+        Le sottoclassi possono anche registrarlo (vedi store.StoreProcessor).
+        """
+        print(testo)
+
+    def controlla_annullamento(self):
+        """
+        Solleva ElaborazioneAnnullata se è stato richiesto l'annullamento.
+        """
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ElaborazioneAnnullata("Elaborazione annullata dall'utente.")
 
     def load_data(self):
         """
-        Legge il file Excel (supporta .xlsx e .xls) e verifica la presenza delle colonne obbligatorie.
+        Legge il foglio con il lettore scelto da readers.seleziona_lettore (automatico in base
+        all'estensione e ai backend installati, oppure self.reader) e verifica le colonne obbligatorie.
+        Se è configurata una cache e il file non è cambiato, il foglio viene letto dalla cache.
+        Con low_memory=True legge solo le colonne obbligatorie.
         """
         if not os.path.isfile(self.excel_path):
             raise FileNotFoundError(f"File non trovato: '{self.excel_path}'")
 
-        ext = os.path.splitext(self.excel_path)[1].lower()
-        if ext == ".xlsx":
-            engine = "openpyxl"
-        elif ext == ".xls":
-            engine = "xlrd"
-        else:
-            raise ValueError(f"Formato non supportato: '{ext}'. Usa .xlsx o .xls")
+        lettore = seleziona_lettore(self.excel_path, self.reader)
+        self.stats.reader = lettore.nome
+        variante = ("low_memory:" if self.low_memory else "") + lettore.nome
+        self.df_vars = None
+        if self.cache is not None:
+            self.df_vars = self.cache.carica(self.excel_path, self.sheet_name, variante)
 
-        try:
-            self.df_vars = pd.read_excel(
-                self.excel_path, sheet_name=self.sheet_name, engine=engine
-            )
-        except Exception as e:
-            raise ValueError(f"Errore apertura foglio '{self.sheet_name}' ({ext}): {e}")
-
-        required_cols = [
-            "DescrizioneRadice",
-            "DescrizioneEstensione",
-            "DataType",
-            "ObjectType",
-            "Index",
-            "New Page",
-        ]
-        missing = [c for c in required_cols if c not in self.df_vars.columns]
+        if self.df_vars is None:
+            self.df_vars = lettore.leggi(self.excel_path, self.sheet_name, self.low_memory)
+
+            if self.cache is not None:
+                try:
+                    self.cache.salva(self.excel_path, self.sheet_name, self.df_vars, variante)
+                except (OSError, ValueError, RuntimeError) as e:
+                    print(f"[WARNING] Impossibile salvare il foglio in cache: {e}")
+
+        self.imposta_foglio(self.df_vars)
+
+    def imposta_foglio(self, df: pd.DataFrame):
+        """
+        Adotta df come foglio variabili (letto da load_data o già in memoria):
+        verifica le colonne obbligatorie e invalida tabella e indice delle zone.
+        """
+        missing = [c for c in REQUIRED_COLS if c not in df.columns]
         if missing:
             raise ValueError(f"Mancano colonne nel foglio '{self.sheet_name}': {missing}")
+        self.df_vars = df
+        self.stats.rows_read = len(df)
+
+        # Il foglio è cambiato: tabella e indice verranno ricostruiti al primo utilizzo
+        self.tabella_zone = None
+        self.indice_zone = None
 
     def filter_dynamic_interference(self):
         """
@@ -93,6 +235,7 @@ class InterferenceProcessor:
             (self.df_vars["DataType"] == "BOOL")
             & (self.df_vars["DescrizioneEstensione"].str.contains("DynamicInterference", na=False))
         ].copy()
+        self.stats.dynamic_rows = len(self.df_dyn)
 
         if self.df_dyn.empty:
             raise RuntimeError("Nessuna riga con DynamicInterference trovata.")
@@ -129,6 +272,104 @@ class InterferenceProcessor:
             return ""
         return f"{primo_tipo}_{descr_ext}_{idx_int}"
 
+    @staticmethod
+    def genera_tag_plc_vett(obj_type: pd.Series, descr_ext: pd.Series, idx_val: pd.Series) -> pd.Series:
+        """
+        Versione colonnare di genera_tag_plc(): stesso formato <ObjectType>_<DescrizioneEstensione>_<IndexInt>,
+        stringa vuota dove Index è NaN o non convertibile.
+        """
+        if pd.api.types.is_numeric_dtype(obj_type):
+            primo_tipo = pd.Series("", index=obj_type.index, dtype=object)
+        else:
+            primo_tipo = obj_type.astype(object).str.split(";").str[0].str.strip().fillna("")
+
+        if pd.api.types.is_integer_dtype(idx_val) or pd.api.types.is_bool_dtype(idx_val):
+            valido = pd.Series(True, index=idx_val.index)
+            idx_str = idx_val.astype("int64").astype(str)
+        elif pd.api.types.is_float_dtype(idx_val):
+            valori = idx_val.to_numpy(dtype="float64", na_value=np.nan)
+            valido = pd.Series(np.isfinite(valori), index=idx_val.index)
+            idx_str = pd.Series(np.where(valido, valori, 0).astype("int64"), index=idx_val.index).astype(str)
+        else:
+            # Colonna mista (testo/numeri): conversione riga per riga come genera_tag_plc
+            tags = [
+                InterferenceProcessor.genera_tag_plc(o, d, i)
+                for o, d, i in zip(obj_type, descr_ext, idx_val)
+            ]
+            return pd.Series(tags, index=idx_val.index, dtype=object)
+
+        tag = primo_tipo.astype(object) + "_" + descr_ext.astype(object) + "_" + idx_str.astype(object)
+        return tag.where(valido, "")
+
+    def costruisci_tabella_zone(self):
+        """
+        Estrae una sola volta da df_vars tutte le righe "StartNo…"/"EndNo…" in un DataFrame colonnare:
+          root, is_start, ordinal, Index, descr, tag, pos (posizione nel foglio).
+        Ordinali e tag PLC sono calcolati in blocco (vedi genera_tag_plc_vett).
+        """
+        descr = self.df_vars["DescrizioneEstensione"]
+        is_start = descr.str.startswith("StartNo", na=False)
+        is_end = descr.str.startswith("EndNo", na=False)
+        df_zone = self.df_vars[is_start | is_end]
+
+        # Ordinale: primo "1st"/"2nd"/"3rd"… nel nome, altrimenti 1
+        ordinal = df_zone["DescrizioneEstensione"].str.extract(r"(?i)(\d+)(?:st|nd|rd|th)", expand=False)
+
+        self.tabella_zone = pd.DataFrame({
+            "root": df_zone["DescrizioneRadice"].to_numpy(),
+            "is_start": is_start[is_start | is_end].to_numpy(),
+            "ordinal": ordinal.fillna("1").astype("int64").to_numpy(),
+            "Index": df_zone["Index"].to_numpy(),
+            "descr": df_zone["DescrizioneEstensione"].to_numpy(),
+            "tag": self.genera_tag_plc_vett(
+                df_zone["ObjectType"], df_zone["DescrizioneEstensione"], df_zone["Index"]
+            ).to_numpy(),
+            "pos": np.arange(len(df_zone)),
+        })
+        return self.tabella_zone
+
+    def costruisci_indice_zone(self):
+        """
+        Costruisce una sola volta (dopo load_data) l'indice delle righe "StartNo…"/"EndNo…":
+          { DescrizioneRadice: [(posizione, is_start, ordinal, Index, DescrizioneEstensione, tag), …] }
+        Le liste mantengono l'ordine del foglio, così raccogli_zone_no_interf()
+        diventa un accesso a dizionario invece di una scansione di df_vars per ogni motore.
+        """
+        if self.tabella_zone is None:
+            self.costruisci_tabella_zone()
+        t = self.tabella_zone
+
+        indice = {}
+        for root, *record in zip(
+            t["root"], t["pos"].tolist(), t["is_start"].tolist(), t["ordinal"].tolist(),
+            t["Index"], t["descr"], t["tag"],
+        ):
+            indice.setdefault(root, []).append(tuple(record))
+
+        self.indice_zone = indice
+        return indice
+
+    def righe_zone_motore(self, motX: str, motY: str, prefix: str) -> list:
+        """
+        Righe StartNo/EndNo del root "<prefix>_<motX>" (con o senza underscore) la cui
+        DescrizioneEstensione contiene motY, in ordine di foglio, come record di self.indice_zone
+        (costruito alla prima chiamata). Sono le righe tra cui raccogli_zone_no_interf() forma le coppie.
+        """
+        if self.indice_zone is None:
+            self.costruisci_indice_zone()
+
+        motX_no_us = motX.replace("_", "")
+        root_with = f"{prefix}_{motX}"
+        root_without = f"{prefix}_{motX_no_us}"
+
+        # Righe che appartengono al root (con o senza underscore), in ordine di foglio
+        roots = [root_with] if root_with == root_without else [root_with, root_without]
+        righe = [r for root in roots for r in self.indice_zone.get(root, ())]
+        if len(roots) > 1:
+            righe.sort(key=lambda r: r[0])
+        pattern = re.compile(motY)
+        return [r for r in righe if pattern.search(r[4])]
+
     def raccogli_zone_no_interf(self, motX: str, motY: str, prefix: str):
         """
         Estrae due liste di coppie (tag_start, tag_end) per le prime due “zone”:
@@ -138,45 +379,13 @@ class InterferenceProcessor:
             * Se non trova “1st”/“2nd”/“3rd”, assume ordinal=1.
           - Restituisce due liste: (zone1_list, zone2_list), ognuna come [(tag_s, tag_e), …],
             con ordinal == 1 e ordinal == 2. Eventuali ordinal >= 3 vengono ignorati.
+        Le righe vengono lette da self.indice_zone (vedi righe_zone_motore).
         """
-        motX_no_us = motX.replace("_", "")
-        root_with = f"{prefix}_{motX}"
-        root_without = f"{prefix}_{motX_no_us}"
-
-        # Filtra le righe che appartenengono al root (con o senza underscore)
-        mask_base = (
-            ((self.df_vars["DescrizioneRadice"] == root_with)
-             | (self.df_vars["DescrizioneRadice"] == root_without))
-            & (self.df_vars["DescrizioneEstensione"].str.contains(motY, na=False))
-        )
-        df_base = self.df_vars[mask_base].copy()
-
-        # Seleziona tutte le righe "StartNo..." e "EndNo..."
-        df_start = df_base[df_base["DescrizioneEstensione"].str.startswith("StartNo", na=False)].copy()
-        df_end   = df_base[df_base["DescrizioneEstensione"].str.startswith("EndNo", na=False)].copy()
-
-        # Funzione per estrarre ordinal: cerca "1st", "2nd", "3rd" (case-insensitive),
-        # altrimenti ritorna 1.
-        def estrai_ordinal(descr_ext: str) -> int:
-            m = re.search(r"(?i)(\d+)(?:st|nd|rd|th)", descr_ext)
-            if m:
-                try:
-                    return int(m.group(1))
-                except:
-                    return 1
-            # Se non trova suffisso numerico, consideralo prima zona (ordinal=1)
-            return 1
+        righe = self.righe_zone_motore(motX, motY, prefix)
 
         # Costruisci lista di tuple (ordinal, index, tag) per start ed end
-        starts = []
-        for _, r in df_start.iterrows():
-            ord_val = estrai_ordinal(r["DescrizioneEstensione"])
-            starts.append((ord_val, r["Index"], r))
-
-        ends = []
-        for _, r in df_end.iterrows():
-            ord_val = estrai_ordinal(r["DescrizioneEstensione"])
-            ends.append((ord_val, r["Index"], r))
+        starts = [(r[2], r[3], r[5]) for r in righe if r[1]]
+        ends = [(r[2], r[3], r[5]) for r in righe if not r[1]]
 
         # Ordina per ordinal ASC, poi per Index ASC
         starts.sort(key=lambda x: (x[0], x[1]))
@@ -189,17 +398,13 @@ class InterferenceProcessor:
         # Per ogni ordinal 1 o 2, prendi la prima coppia start/end se esistono
         for ordinal_target, zone_list in [(1, zone1), (2, zone2)]:
             # Filtra tutti i start con quell'ordinal_target
-            starts_ord = [row for (ordv, _, row) in starts if ordv == ordinal_target]
-            ends_ord   = [row for (ordv, _, row) in ends   if ordv == ordinal_target]
+            starts_ord = [tag for (ordv, _, tag) in starts if ordv == ordinal_target]
+            ends_ord   = [tag for (ordv, _, tag) in ends   if ordv == ordinal_target]
 
             # Prendi il minimo tra len(starts_ord) e len(ends_ord)
             n_coppie = min(len(starts_ord), len(ends_ord))
             for i in range(n_coppie):
-                r_s = starts_ord[i]
-                r_e = ends_ord[i]
-                tag_s = self.genera_tag_plc(r_s["ObjectType"], r_s["DescrizioneEstensione"], r_s["Index"])
-                tag_e = self.genera_tag_plc(r_e["ObjectType"], r_e["DescrizioneEstensione"], r_e["Index"])
-                zone_list.append((tag_s, tag_e))
+                zone_list.append((starts_ord[i], ends_ord[i]))
 
         return zone1, zone2
 
@@ -208,19 +413,10 @@ class InterferenceProcessor:
         Restituisce (zone_idx, index_num) basato su self.zone_order e numero finale.
         - Se es. 'Wheel1' senza indice => (idx di Wheel1, 1)
         - Se manca completamente => (len(zone_order), 1)
+        La classificazione è delegata al ZoneClassifier (zones.py) scelto quando
+        viene impostato zone_order, con memo per nome pagina.
         """
-        p_lower = page_name.lower()
-        for idx, zone in enumerate(self.zone_order):
-            zone_lower = zone.lower()
-            if zone_lower in p_lower:
-                match = re.search(rf"{zone_lower}[_\-]?(\d+)", p_lower, re.IGNORECASE)
-                if match:
-                    try:
-                        return idx, int(match.group(1))
-                    except:
-                        return idx, 1
-                return idx, 1
-        return len(self.zone_order), 1
+        return self._classificatore.classifica(page_name)
 
     def process(self):
         """
@@ -229,47 +425,70 @@ class InterferenceProcessor:
         - Per ogni coppia motori genera fino a 3 grafici (ChartLeft/Right/Center)
         - Monta NoInterf1 come concatenazione di tutti i tag 1st e 2nd
         - Ordina in base a (zone_idx, idx_num)
+        Il lavoro per riga è svolto dal motore scelto in self.engine:
+        "classic" (ciclo riga per riga) oppure "vectorized" (operazioni colonnari pandas/NumPy).
         """
-        self.filter_dynamic_interference()
+        with self.stats.fase("filter_dynamic_interference"):
+            self.filter_dynamic_interference()
         self.inter_grouped.clear()
         self.summary_grouped.clear()
+        self.stats.reset_process()
+
+        if self.engine == "vectorized":
+            self.process_vettoriale()
+        else:
+            self.process_classico()
+
+    def process_classico(self):
+        """
+        Motore "classic": scorre df_dyn riga per riga e accumula inter_grouped / summary_grouped.
+        """
+        if self.indice_zone is None:
+            self.costruisci_indice_zone()
 
         page_chart_counter = {}
+        totale = len(self.df_dyn)
+        passo = max(1, totale // 100)
+
+        for n_riga, (_, row) in enumerate(self.df_dyn.iterrows()):
+            if n_riga % passo == 0:
+                self.controlla_annullamento()
+                self.notifica_progresso("process", n_riga, totale)
 
-        for _, row in self.df_dyn.iterrows():
             root = row["DescrizioneRadice"]
             pagina = str(row["New Page"]).strip()
             if not pagina:
+                self.stats.pages_skipped += 1
                 continue
 
             try:
                 prefix, motA, motB = self.estrai_motori_da_root(root)
             except ValueError:
+                self.stats.malformed_roots += 1
                 continue
+            self.stats.pairs_processed += 1
 
             # Itera sui due motori: per ognuno assegna il grafico in base a quante volte compare pagina
-            for motore, function_type in [(motA, "Axe1_RefPosition"), (motB, "Axe2_RefPosition")]:
+            for asse, motore in enumerate((motA, motB)):
                 if pagina not in page_chart_counter:
                     page_chart_counter[pagina] = 0
 
                 idx_counter = page_chart_counter[pagina]
-                if idx_counter == 0:
-                    chart_name = "ChartLeft"
-                elif idx_counter == 1:
-                    chart_name = "ChartRight"
-                elif idx_counter == 2:
-                    chart_name = "ChartCenter"
-                else:
+                if idx_counter >= len(CHART_NAMES):
                     # Ignora motori oltre il terzo per la stessa pagina
-                    print(
+                    self.avvisa(
                         f"[WARNING] Pagina '{pagina}' già ha 3 grafici; "
                         f"skipping motore '{motore}'."
                     )
+                    self.stats.charts_skipped += 1
                     continue
 
                 # Raccogli tag 1st e 2nd (nomi arbitrari "No…") e concatena in NoInterf1
                 motY = motB if motore == motA else motA
+                inizio = time.perf_counter()
                 zone1, zone2 = self.raccogli_zone_no_interf(motore, motY, prefix)
+                self.stats.zone_lookup_seconds += time.perf_counter() - inizio
+                self.stats.zone_lookups += 1
 
                 all_zones = zone1 + zone2
 
@@ -285,64 +504,194 @@ class InterferenceProcessor:
                     return ",".join(flat)
 
                 no_interf1 = monta(all_zones)
-                no_interf2 = ""  # rimane vuoto
-
-                riga_chart = [
-                    pagina,        # pagina
-                    chart_name,    # nome: ChartLeft/ChartRight/ChartCenter
-                    "",            # visiblePlc (vuoto)
-                    "Doughnut",    # Type
-                    "0",           # Rotation
-                    "360",         # Period
-                    motore,        # Title
-                    function_type, # FunctionType
-                    no_interf1,    # NoInterf1 (1st+2nd tag)
-                    no_interf2,    # NoInterf2 (vuoto)
-                ]
 
+                # Slot -> ChartLeft/ChartRight/ChartCenter, asse -> Axe1/Axe2_RefPosition
                 zone_idx, idx_num = self.parse_zone_and_index(pagina)
-                self.inter_grouped.append((zone_idx, idx_num, riga_chart))
+                self.inter_grouped.append(
+                    RigaChart(zone_idx, idx_num, pagina, idx_counter, motore, asse, no_interf1)
+                )
 
                 # Aggiungi summary **solo** per motA (per evitare duplicati)
                 if motore == motA:
                     summary_str = f"Interferences : {motA}/{motB}"
-                    self.summary_grouped.append((zone_idx, idx_num, pagina, summary_str))
+                    self.summary_grouped.append(RigaSummary(zone_idx, idx_num, pagina, summary_str))
 
                 page_chart_counter[pagina] += 1
 
+        self.notifica_progresso("process", totale, totale)
+
         # Ordina i risultati
-        self.inter_grouped.sort(key=lambda x: (x[0], x[1]))
-        self.summary_grouped.sort(key=lambda x: (x[0], x[1]))
+        self.inter_grouped[:] = ordina_righe(self.inter_grouped)
+        self.summary_grouped[:] = ordina_righe(self.summary_grouped)
+        self.stats.charts_generated += len(self.inter_grouped)
+
+    def process_vettoriale(self):
+        """
+        Motore "vectorized": stesso risultato di process_classico() ma con operazioni in blocco.
+        - split delle root una sola volta per valore unico (estrai_motori_da_root)
+        - assegnazione ChartLeft/Right/Center con cumcount per pagina
+        - NoInterf1 calcolato per terna unica (motore, motY, prefix) con join sulla tabella zone
+        - ordinamento stabile finale su (zone_idx, idx_num)
+        """
+        if self.tabella_zone is None:
+            self.costruisci_tabella_zone()
+        self.controlla_annullamento()
+        self.notifica_progresso("process", 0, 3)
+
+        base = pd.DataFrame({
+            "seq": np.arange(len(self.df_dyn)),
+            "root": self.df_dyn["DescrizioneRadice"].to_numpy(),
+            "pagina": self.df_dyn["New Page"].astype(object).map(str).str.strip().to_numpy(),
+        })
+        pagina_vuota = base["pagina"] == ""
+        self.stats.pages_skipped += int(pagina_vuota.sum())
+        base = base[~pagina_vuota]
+
+        # Split delle root: una chiamata per root distinta, le root non conformi vengono scartate
+        parti = []
+        for root in pd.unique(base["root"]):
+            try:
+                parti.append((root, *self.estrai_motori_da_root(root)))
+            except ValueError:
+                continue
+        df_parti = pd.DataFrame(parti, columns=["root", "prefix", "motA", "motB"], dtype=object)
+        n_valide = len(base)
+        base = base.astype({"root": object}).merge(df_parti, on="root", how="inner")
+        self.stats.malformed_roots += n_valide - len(base)
+        self.stats.pairs_processed += len(base)
+
+        # Due righe per coppia: motA (Axe1) e motB (Axe2), nell'ordine del ciclo classico
+        motori = pd.concat([
+            base.assign(k=0, motore=base["motA"], motY=base["motB"]),
+            base.assign(k=1, motore=base["motB"], motY=base["motA"]),
+        ], ignore_index=True).sort_values(["seq", "k"], kind="stable", ignore_index=True)
+
+        # Slot del grafico in base a quante volte la pagina è già comparsa
+        motori["slot"] = motori.groupby("pagina", sort=False).cumcount()
+        extra = motori[motori["slot"] >= len(CHART_NAMES)]
+        for pagina, motore in zip(extra["pagina"], extra["motore"]):
+            self.avvisa(
+                f"[WARNING] Pagina '{pagina}' già ha 3 grafici; "
+                f"skipping motore '{motore}'."
+            )
+        self.stats.charts_skipped += len(extra)
+        motori = motori[motori["slot"] < len(CHART_NAMES)].copy()
+        if motori.empty:
+            return
+
+        self.controlla_annullamento()
+        self.notifica_progresso("process", 1, 3)
+
+        # NoInterf1 per terna unica
+        terne = motori[["motore", "motY", "prefix"]].drop_duplicates()
+        inizio = time.perf_counter()
+        no_interf = self._no_interf_vettoriale(terne)
+        self.stats.zone_lookup_seconds += time.perf_counter() - inizio
+        self.stats.zone_lookups += len(terne)
+        motori = motori.merge(no_interf, on=["motore", "motY", "prefix"], how="left")
+        self.controlla_annullamento()
+        self.notifica_progresso("process", 2, 3)
+
+        # Chiavi di ordinamento: una chiamata a parse_zone_and_index per pagina distinta
+        chiavi = {pagina: self.parse_zone_and_index(pagina) for pagina in pd.unique(motori["pagina"])}
+        motori["zone_idx"] = motori["pagina"].map({p: k[0] for p, k in chiavi.items()})
+        motori["idx_num"] = motori["pagina"].map({p: k[1] for p, k in chiavi.items()})
+        motori = motori.sort_values(["zone_idx", "idx_num", "seq", "k"], kind="stable", ignore_index=True)
+
+        self.stats.charts_generated += len(motori)
+        self.inter_grouped.extend(
+            RigaChart(*campi)
+            for campi in zip(
+                motori["zone_idx"].tolist(), motori["idx_num"].tolist(), motori["pagina"],
+                motori["slot"].tolist(), motori["motore"], motori["k"].tolist(), motori["no_interf1"],
+            )
+        )
+
+        # Summary solo per motA (per evitare duplicati)
+        summary = motori[motori["motore"] == motori["motA"]]
+        testi = "Interferences : " + summary["motA"] + "/" + summary["motB"]
+        self.summary_grouped.extend(
+            RigaSummary(*campi)
+            for campi in zip(summary["zone_idx"].tolist(), summary["idx_num"].tolist(), summary["pagina"], testi)
+        )
+        self.notifica_progresso("process", 3, 3)
+
+    def _no_interf_vettoriale(self, terne: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calcola NoInterf1 per ogni terna (motore, motY, prefix) con la stessa logica di
+        raccogli_zone_no_interf(): righe del root con/senza underscore che contengono motY,
+        ordinati per (ordinal, Index), coppie start/end per ordinal 1 e 2.
+        """
+        terne = terne.reset_index(drop=True)
+        terne["terna"] = np.arange(len(terne))
+        zone = self.tabella_zone.astype({"root": object})
+
+        root_with = terne["prefix"] + "_" + terne["motore"]
+        root_without = terne["prefix"] + "_" + terne["motore"].str.replace("_", "", regex=False)
+        chiavi = pd.concat([
+            terne.assign(root=root_with),
+            terne.assign(root=root_without),
+        ], ignore_index=True).drop_duplicates(["terna", "root"])
+        cand = chiavi[["terna", "motY", "root"]].merge(zone, on="root", how="inner")
+
+        # Filtro "contiene motY": un solo str.contains per ogni motY distinto
+        keep = np.zeros(len(cand), dtype=bool)
+        for motY, pos in cand.groupby("motY", sort=False).indices.items():
+            keep[pos] = cand["descr"].iloc[pos].str.contains(motY, na=False).to_numpy()
+        cand = cand[keep]
+
+        # Ordina per ordinal ASC, poi Index ASC (a parità, ordine del foglio) e numera le righe
+        cand = cand.sort_values(["terna", "is_start", "ordinal", "Index", "pos"], kind="stable")
+        con_nan = cand["Index"].isna().groupby([cand["terna"], cand["is_start"]]).transform("any")
+        if con_nan.any():
+            # Con Index mancanti sorted() non vede un ordine totale: per questi gruppi
+            # si replica esattamente l'ordinamento di raccogli_zone_no_interf()
+            gruppi = []
+            for _, g in cand[con_nan].groupby(["terna", "is_start"], sort=False):
+                g = g.sort_values("pos")
+                chiavi_sort = list(zip(g["ordinal"].tolist(), g["Index"]))
+                gruppi.append(g.iloc[sorted(range(len(g)), key=chiavi_sort.__getitem__)])
+            cand = pd.concat([cand[~con_nan], *gruppi])
+        cand = cand[cand["ordinal"].isin((1, 2))]
+        cand["n"] = cand.groupby(["terna", "is_start", "ordinal"]).cumcount()
+
+        # Coppia i-esima start con i-esima end per lo stesso ordinal
+        coppie = cand[cand["is_start"]].merge(
+            cand[~cand["is_start"]], on=["terna", "ordinal", "n"], suffixes=("_s", "_e")
+        )
+        flat = pd.concat([
+            coppie[["terna", "ordinal", "n"]].assign(lato=0, tag=coppie["tag_s"]),
+            coppie[["terna", "ordinal", "n"]].assign(lato=1, tag=coppie["tag_e"]),
+        ], ignore_index=True)
+        flat = flat[flat["tag"] != ""].sort_values(["terna", "ordinal", "n", "lato"], kind="stable")
+        testi = flat.groupby("terna")["tag"].agg(",".join)
+
+        terne["no_interf1"] = terne["terna"].map(testi).fillna("")
+        return terne[["motore", "motY", "prefix", "no_interf1"]]
+
+    def indice_risultati(self) -> IndiceRisultati:
+        """
+        Indice interrogabile (per pagina, motore, zona, tag PLC) delle righe di chart_config
+        calcolate da process(), senza passare dai file (vedi query.py).
+        """
+        return IndiceRisultati(self.inter_grouped, self.zone_order)
 
     def write_chart_config(self):
         """
-        Scrive chart_config.txt con header e righe tab-separated.
-        """
-        header = [
-            "pagina",
-            "nome",
-            "visiblePlc",
-            "Type",
-            "Rotation",
-            "Period",
-            "Title",
-            "FunctionType",
-            "NoInterf1",
-            "NoInterf2",
-        ]
-        with open(self.output_chart, "w", encoding="utf-8") as f:
-            f.write("\t".join(header) + "\n")
-            for _, _, riga in self.inter_grouped:
-                f.write("\t".join(riga) + "\n")
+        Scrive chart_config.txt con header e righe tab-separated (più i formati in output_formats).
+        Le righe sono scritte a blocchi su un file temporaneo poi rinominato: vedi writers.scrivi_tabella.
+        """
+        scrivi_tabella(
+            self.output_chart, CHART_HEADER, (riga.campi() for riga in self.inter_grouped), self.output_formats
+        )
 
     def write_summary(self):
         """
-        Scrive interferences_summary.txt con header e righe tab-separated.
+        Scrive interferences_summary.txt con header e righe tab-separated (più i formati in output_formats).
         """
-        with open(self.output_summary, "w", encoding="utf-8") as f2:
-            f2.write("pagina\tInterferences\n")
-            for _, _, pagina, testo in self.summary_grouped:
-                f2.write(f"{pagina}\t{testo}\n")
+        scrivi_tabella(
+            self.output_summary, SUMMARY_HEADER, (riga.campi() for riga in self.summary_grouped), self.output_formats
+        )
 
     def run(self):
         """
@@ -351,8 +700,89 @@ class InterferenceProcessor:
         2. process()
         3. write_chart_config()
         4. write_summary()
+        Tra una fase e l'altra notifica l'avanzamento e verifica l'annullamento.
+        I tempi e i contatori sono raccolti in self.stats; con stats_log vengono aggiunti
+        al file JSON Lines, con profile viene scritto un profilo accanto agli output.
+        """
+        self.stats = RunStats()
+        profiler = self._avvia_profilo()
+        try:
+            self.notifica_progresso("load", 0, 1)
+            with self.stats.fase("load_data"):
+                self.load_data()
+            self.controlla_annullamento()
+            self.notifica_progresso("filter", 0, 1)
+            with self.stats.fase("process"):
+                self.process()
+            self.controlla_annullamento()
+            self.notifica_progresso("write", 0, 2)
+            with self.stats.fase("write_chart_config"):
+                self.write_chart_config()
+            self.notifica_progresso("write", 1, 2)
+            with self.stats.fase("write_summary"):
+                self.write_summary()
+            self.notifica_progresso("write", 2, 2)
+        finally:
+            self._chiudi_profilo(profiler)
+
+        if self.stats_log:
+            self.scrivi_stats(self.stats_log)
+
+    def percorso_profilo(self, estensione: str) -> str:
+        """
+        Percorso del file di profilo, nella cartella di output_chart.
+        """
+        cartella = os.path.dirname(os.path.abspath(self.output_chart))
+        return os.path.join(cartella, f"interference_profile_{self.profile}{estensione}")
+
+    def _avvia_profilo(self):
+        if self.profile == "cprofile":
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        if self.profile == "tracemalloc":
+            import tracemalloc
+
+            tracemalloc.start(25)
+        return None
+
+    def _chiudi_profilo(self, profiler):
+        """
+        Ferma la profilazione e scrive i file:
+        - cprofile: .prof (per pstats/snakeviz) e .txt con le 40 funzioni più costose
+        - tracemalloc: .txt con picco di memoria e le 30 righe che allocano di più
+        """
+        if self.profile == "cprofile":
+            import pstats
+
+            profiler.disable()
+            profiler.dump_stats(self.percorso_profilo(".prof"))
+            with open(self.percorso_profilo(".txt"), "w", encoding="utf-8") as f:
+                pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(40)
+        elif self.profile == "tracemalloc":
+            import tracemalloc
+
+            snapshot = tracemalloc.take_snapshot()
+            _, picco = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stats.peak_memory_bytes = picco
+            with open(self.percorso_profilo(".txt"), "w", encoding="utf-8") as f:
+                f.write(f"Picco di memoria: {picco / 1024 / 1024:.1f} MB\n\n")
+                for voce in snapshot.statistics("lineno")[:30]:
+                    f.write(f"{voce}\n")
+
+    def scrivi_stats(self, path: str):
+        """
+        Aggiunge al file JSON Lines una riga con le statistiche dell'ultima esecuzione.
         """
-        self.load_data()
-        self.process()
-        self.write_chart_config()
-        self.write_summary()
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "excel_path": self.excel_path,
+            "sheet_name": self.sheet_name,
+            "engine": self.engine,
+            "stats": self.stats.to_dict(),
+        }
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
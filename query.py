@@ -0,0 +1,224 @@
+# query.py
+
+import numpy as np
+
+from records import CHART_HEADER, RigaChart
+from zones import classificatore_zone, regex_indice, numero_pagina, DEFAULT_ZONE_ORDER
+
+# Campi interrogabili e cercati da cerca()
+QUERY_FIELDS = ("pagina", "motore", "zona", "tag")
+
+# Zona delle pagine che non contengono nessuna zona di zone_order
+NESSUNA_ZONA = ""
+
+
+class ValoriCampo:
+    """
+    Valori distinti di un campo e righe che li contengono:
+    - valori: lista dei valori distinti (id = posizione nella lista)
+    - righe, ids: coppie (riga, id valore) come array paralleli (una riga può avere più tag)
+    """
+
+    def __init__(self, valori: list, righe, ids):
+        self.valori = valori
+        self.id_di = {v: i for i, v in enumerate(valori)}
+        self.righe = np.asarray(righe, dtype=np.int64)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self._minuscoli = None  # valori in minuscolo, calcolati alla prima ricerca
+        self._ultima = None   # (testo, maschera) dell'ultima ricerca
+        self._gruppi = None
+
+    def posizioni(self, valore) -> np.ndarray:
+        """Righe (non ordinate) che contengono il valore."""
+        i = self.id_di.get(valore)
+        if i is None:
+            return np.empty(0, dtype=np.int64)
+        if self._gruppi is None:
+            ordine = np.argsort(self.ids, kind="stable")
+            confini = np.searchsorted(self.ids[ordine], np.arange(len(self.valori) + 1))
+            self._gruppi = (self.righe[ordine], confini)
+        righe, confini = self._gruppi
+        return righe[confini[i]:confini[i + 1]]
+
+    def contenenti(self, testo: str) -> np.ndarray:
+        """
+        Maschera (per id) dei valori che contengono testo, già in minuscolo.
+        Durante la digitazione il testo estende quello precedente: si controllano solo i valori già trovati.
+        """
+        if self._minuscoli is None:
+            self._minuscoli = [v.lower() for v in self.valori]
+
+        trovati = np.zeros(len(self.valori), dtype=bool)
+        if self._ultima is not None and self._ultima[0] in testo:
+            minuscoli = self._minuscoli
+            ids = [i for i in np.flatnonzero(self._ultima[1]).tolist() if testo in minuscoli[i]]
+            trovati[ids] = True
+        else:
+            trovati[[i for i, v in enumerate(self._minuscoli) if testo in v]] = True
+        self._ultima = (testo, trovati)
+        return trovati
+
+
+class IndiceRisultati:
+    """
+    Indice in memoria delle righe di chart_config (RigaChart) prodotte da un'elaborazione,
+    per consultarle senza scrivere e riaprire i file:
+    - pagina(), motore(), zona(), tag(): righe con quel valore (tag = tag PLC contenuto in NoInterf1)
+    - cerca(testo): righe in cui almeno un campo contiene il testo (senza distinzione di maiuscole);
+      la ricerca scorre i valori distinti, non le righe, e seleziona le righe con operazioni NumPy
+    - riordina(zone_order): ricalcola l'ordinamento (zone_idx, idx_num) con un altro ordine di zone,
+      senza rileggere il foglio. A parità di chiave resta l'ordine delle righe di partenza: pagine diverse
+      con la stessa nuova chiave possono comparire raggruppate anziché alternate come in una rigenerazione.
+    Le interrogazioni restituiscono posizioni in self.righe nell'ordine corrente (vedi righe_di()).
+    Non dipende da pandas: è utilizzabile dalla GUI.
+    """
+
+    def __init__(self, righe, zone_order=None):
+        self.righe = list(righe)
+        n = len(self.righe)
+        self.campi = {}
+
+        for campo, attributo in (("pagina", "pagina"), ("motore", "motore")):
+            id_di = {}
+            ids = np.fromiter(
+                (id_di.setdefault(getattr(r, attributo), len(id_di)) for r in self.righe), dtype=np.int64, count=n
+            )
+            self.campi[campo] = ValoriCampo(list(id_di), np.arange(n), ids)
+
+        id_di, righe_tag, ids_tag = {}, [], []
+        for pos, riga in enumerate(self.righe):
+            if riga.no_interf1:
+                for tag in dict.fromkeys(riga.no_interf1.split(",")):
+                    righe_tag.append(pos)
+                    ids_tag.append(id_di.setdefault(tag, len(id_di)))
+        self.campi["tag"] = ValoriCampo(list(id_di), righe_tag, ids_tag)
+
+        self._pagine_lower = [p.lower() for p in self.campi["pagina"].valori]
+        self._colonne_zona = {}     # zona in minuscolo -> colonna_zona()
+        self.zone_order = None
+        self.ordine = np.arange(n)  # posizioni di self.righe nell'ordine corrente
+        self.rango = np.arange(n)   # rango[pos] = posizione della riga in self.ordine
+        self.riordina(zone_order or DEFAULT_ZONE_ORDER)
+
+    @classmethod
+    def da_file(cls, path: str, zone_order=None):
+        """
+        Costruisce l'indice da un chart_config.txt già scritto (es. generato dal servizio daemon.py).
+        """
+        classificatore = classificatore_zone(zone_order or DEFAULT_ZONE_ORDER)
+        righe = []
+        with open(path, encoding="utf-8") as f:
+            header = f.readline().rstrip("\n").split("\t")
+            if header != CHART_HEADER:
+                raise ValueError(f"Intestazione non riconosciuta in '{path}': {header}")
+            for linea in f:
+                campi = linea.rstrip("\n").split("\t")
+                if len(campi) != len(CHART_HEADER):
+                    continue
+                righe.append(RigaChart.da_campi(*classificatore.classifica(campi[0]), campi))
+        return cls(righe, zone_order)
+
+    def __len__(self):
+        return len(self.righe)
+
+    def colonna_zona(self, zona: str):
+        """
+        Per ogni pagina distinta: se contiene la zona e il numero che la segue (calcolati una volta per zona,
+        così riordinare le zone non richiede di riclassificare le pagine).
+        """
+        chiave = zona.lower()
+        colonna = self._colonne_zona.get(chiave)
+        if colonna is None:
+            regex = regex_indice(chiave)
+            presente = np.fromiter((chiave in p for p in self._pagine_lower), dtype=bool, count=len(self._pagine_lower))
+            numeri = [numero_pagina(regex, p) if c else 1 for p, c in zip(self._pagine_lower, presente.tolist())]
+            colonna = self._colonne_zona[chiave] = (presente, numeri)
+        return colonna
+
+    def riordina(self, zone_order):
+        """
+        Ordina le righe per (zone_idx, idx_num) secondo zone_order, con le stesse regole di ZoneClassifier:
+        zona = prima di zone_order contenuta nel nome pagina, poi un unico np.lexsort stabile sulle righe.
+        Ricostruisce anche l'indice per zona.
+        """
+        zone_order = list(zone_order)
+        if zone_order == self.zone_order:
+            return
+        n_pagine = len(self.campi["pagina"].valori)
+        zone_idx = np.full(n_pagine, len(zone_order), dtype=np.int64)
+        numeri = [1] * n_pagine
+        libere = np.ones(n_pagine, dtype=bool)  # pagine non ancora assegnate a una zona
+        for idx, zona in enumerate(zone_order):
+            presente, numeri_zona = self.colonna_zona(zona)
+            nuove = np.flatnonzero(presente & libere)
+            zone_idx[nuove] = idx
+            libere[nuove] = False
+            for p in nuove.tolist():
+                numeri[p] = numeri_zona[p]
+        try:
+            idx_num = np.array(numeri, dtype=np.int64)
+        except OverflowError:
+            # Numeri di pagina oltre int64: rango tra i valori distinti
+            rango = {v: i for i, v in enumerate(sorted(set(numeri)))}
+            idx_num = np.array([rango[v] for v in numeri], dtype=np.int64)
+
+        id_pagina = self.campi["pagina"].ids
+        self.ordine = np.lexsort((idx_num[id_pagina], zone_idx[id_pagina]))
+        self.rango = np.empty_like(self.ordine)
+        self.rango[self.ordine] = np.arange(len(self.ordine))
+
+        # Zona per riga: nome della zona in zone_order oppure NESSUNA_ZONA
+        nomi = list(zone_order) + [NESSUNA_ZONA]
+        self.campi["zona"] = ValoriCampo(nomi, np.arange(len(self.righe)), zone_idx[id_pagina])
+        self.zone_order = zone_order
+
+    def zona_di(self, pos: int) -> str:
+        """Nome della zona della riga secondo l'ordine corrente ("" se nessuna)."""
+        zona = self.campi["zona"]
+        return zona.valori[zona.ids[pos]]
+
+    def righe_di(self, posizioni) -> list:
+        """RigaChart corrispondenti alle posizioni."""
+        return [self.righe[pos] for pos in posizioni]
+
+    def valori(self, campo: str) -> list:
+        """Valori distinti del campo (pagine, motori, zone o tag)."""
+        return list(self._campo(campo).valori)
+
+    def _campo(self, campo: str) -> ValoriCampo:
+        if campo not in self.campi:
+            raise ValueError(f"Campo non supportato: '{campo}'. Usa uno tra {list(QUERY_FIELDS)}")
+        return self.campi[campo]
+
+    def interroga(self, campo: str, valore: str) -> np.ndarray:
+        """Posizioni delle righe con campo == valore, nell'ordine corrente."""
+        posizioni = self._campo(campo).posizioni(valore)
+        return posizioni[np.argsort(self.rango[posizioni], kind="stable")]
+
+    def pagina(self, pagina: str) -> np.ndarray:
+        return self.interroga("pagina", pagina)
+
+    def motore(self, motore: str) -> np.ndarray:
+        return self.interroga("motore", motore)
+
+    def zona(self, zona: str) -> np.ndarray:
+        return self.interroga("zona", zona)
+
+    def tag(self, tag: str) -> np.ndarray:
+        return self.interroga("tag", tag)
+
+    def cerca(self, testo: str, campi=QUERY_FIELDS) -> np.ndarray:
+        """
+        Posizioni (nell'ordine corrente) delle righe in cui uno dei campi contiene testo.
+        Testo vuoto = tutte le righe.
+        """
+        testo = testo.strip().lower()
+        if not testo:
+            return self.ordine
+        trovate = np.zeros(len(self.righe), dtype=bool)
+        for campo in campi:
+            valori = self._campo(campo)
+            contenenti = valori.contenenti(testo)
+            if contenenti.any():
+                trovate[valori.righe[contenenti[valori.ids]]] = True
+        return self.ordine[trovate[self.ordine]]
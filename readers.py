@@ -0,0 +1,428 @@
+# readers.py
+
+import csv
+import importlib.util
+import os
+
+import pandas as pd
+
+# Colonne obbligatorie del foglio variabili
+REQUIRED_COLS = [
+    "DescrizioneRadice",
+    "DescrizioneEstensione",
+    "DataType",
+    "ObjectType",
+    "Index",
+    "New Page",
+]
+
+# Valori testuali trattati come mancanti (come i default di pandas.read_excel)
+NA_STRINGS = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+
+# Valore comune delle celle di soli spazi: process() le tratta come pagina vuota (riga saltata),
+# diversamente dalle celle vuote (NaN, pagina "nan")
+SOLO_SPAZI = ""
+
+
+def normalizza_cella(v):
+    """
+    Converte un valore openpyxl come farebbe pandas.read_excel:
+    stringhe "vuote"/NA -> None, float interi -> int; celle di soli spazi -> SOLO_SPAZI.
+    """
+    if isinstance(v, str):
+        if v in NA_STRINGS:
+            return None
+        return SOLO_SPAZI if v.isspace() else v
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def normalizza_spazi(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Celle di soli spazi delle colonne obbligatorie -> SOLO_SPAZI, per ogni backend
+    (stesso valore di normalizza_cella nella lettura in streaming).
+    """
+    for col in REQUIRED_COLS:
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if s.dtype != object and not pd.api.types.is_string_dtype(s):
+            continue
+        spazi = s.str.isspace().fillna(False).astype(bool)
+        if spazi.any():
+            df[col] = s.mask(spazi, SOLO_SPAZI)
+    return df
+
+
+def compatta_colonne(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colonne numeriche convertite come farebbe read_excel, colonne di testo in categoriali.
+    """
+    for col in df.columns:
+        s = df[col]
+        if s.dtype == object:
+            try:
+                s = pd.to_numeric(s)
+            except (ValueError, TypeError):
+                s = s.astype("category")
+        elif pd.api.types.is_string_dtype(s):
+            s = s.astype("category")
+        df[col] = s
+    return df
+
+
+def verifica_header(colonne, sheet_name: str):
+    missing = [c for c in REQUIRED_COLS if c not in colonne]
+    if missing:
+        raise ValueError(f"Mancano colonne nel foglio '{sheet_name}': {missing}")
+
+
+def righe_obbligatorie(righe, sheet_name: str):
+    """
+    Da un iteratore di righe la cui prima riga è l'header restituisce (generatore) le tuple
+    dei valori di REQUIRED_COLS, normalizzati come read_excel. Le righe tutte vuote in fondo al
+    foglio sono scartate, quelle intermedie restano (tutte None) come in read_excel: la riga i
+    corrisponde sempre alla riga Excel i + 2 (numeri di riga di lint.py).
+    L'header è verificato prima di leggere i dati.
+    """
+    header = list(next(righe, ()))
+    verifica_header(header, sheet_name)
+    posizioni = [header.index(c) for c in REQUIRED_COLS]
+    vuota = (None,) * len(posizioni)
+
+    vuote = 0  # righe vuote non ancora restituite: solo se seguite da una riga con dati
+    for riga in righe:
+        valori = tuple(normalizza_cella(riga[i]) if i < len(riga) else None for i in posizioni)
+        if valori == vuota:
+            vuote += 1
+            continue
+        for _ in range(vuote):
+            yield vuota
+        vuote = 0
+        yield valori
+
+
+def righe_ridotte(righe, sheet_name: str) -> pd.DataFrame:
+    """
+    Costruisce il DataFrame ridotto (solo REQUIRED_COLS) da un iteratore di righe
+    la cui prima riga è l'header; l'header è verificato prima di leggere i dati.
+    """
+    # Una lista per colonna; le stringhe uguali condividono lo stesso oggetto
+    colonne = [[] for _ in REQUIRED_COLS]
+    interni = [{} for _ in REQUIRED_COLS]
+    for valori in righe_obbligatorie(righe, sheet_name):
+        for lista, interno, v in zip(colonne, interni, valori):
+            if isinstance(v, str):
+                v = interno.setdefault(v, v)
+            lista.append(v)
+
+    df = pd.DataFrame({c: pd.Series(lista, dtype=object) for c, lista in zip(REQUIRED_COLS, colonne)})
+    return compatta_colonne(df)
+
+
+class ExcelReader:
+    """
+    Lettore di fogli variabili. Ogni backend dichiara le estensioni gestite e i moduli
+    necessari; tutti restituiscono lo stesso DataFrame (quello di pandas.read_excel),
+    ridotto a REQUIRED_COLS con colonne di testo categoriali se low_memory=True.
+    """
+
+    nome = ""
+    estensioni = ()
+    moduli = ()        # moduli Python richiesti dal backend
+    engine = None      # engine di pandas.read_excel
+
+    @classmethod
+    def disponibile(cls) -> bool:
+        return all(importlib.util.find_spec(m) is not None for m in cls.moduli)
+
+    @staticmethod
+    def _errore(sheet_name: str, path: str, e: Exception) -> ValueError:
+        ext = os.path.splitext(path)[1].lower()
+        return ValueError(f"Errore apertura foglio '{sheet_name}' ({ext}): {e}")
+
+    def leggi(self, path: str, sheet_name: str, low_memory: bool = False) -> pd.DataFrame:
+        """
+        Legge un foglio. Con low_memory=True l'header è verificato prima dei dati
+        e vengono lette solo le colonne obbligatorie.
+        """
+        try:
+            xl = pd.ExcelFile(path, engine=self.engine)
+        except Exception as e:
+            raise self._errore(sheet_name, path, e)
+        with xl:
+            return self._leggi_foglio(xl, path, sheet_name, low_memory)
+
+    def _leggi_foglio(self, xl, path: str, sheet_name: str, low_memory: bool) -> pd.DataFrame:
+        return self._leggi_tabella(lambda **kw: xl.parse(sheet_name, **kw), sheet_name, path, low_memory)
+
+    def _leggi_tabella(self, leggi, sheet_name: str, path: str, low_memory: bool) -> pd.DataFrame:
+        """
+        leggi(**kw): funzione pandas (parse/read_csv) già legata al foglio.
+        Gli errori di lettura diventano ValueError "Errore apertura foglio …".
+        """
+        try:
+            if not low_memory:
+                return normalizza_spazi(leggi())
+            header = leggi(nrows=0)
+        except Exception as e:
+            raise self._errore(sheet_name, path, e)
+        verifica_header(header.columns, sheet_name)
+        try:
+            return compatta_colonne(normalizza_spazi(leggi(usecols=REQUIRED_COLS)))
+        except Exception as e:
+            raise self._errore(sheet_name, path, e)
+
+    def scorri_righe(self, path: str, sheet_name: str):
+        """
+        Generatore delle righe del foglio come tuple dei valori di REQUIRED_COLS (None = cella vuota),
+        per chi elabora il foglio senza tenerlo tutto in memoria (vedi chunked.py).
+        Questo backend legge comunque le sole colonne obbligatorie in un colpo;
+        OpenpyxlReader le legge in streaming. I valori sono normalizzati come in streaming
+        (normalizza_cella): una colonna numerica con celle vuote è float per pandas, ma 5.0 deve restare 5.
+        """
+        df = self.leggi(path, sheet_name, low_memory=True)
+        colonne = [df[c].tolist() for c in REQUIRED_COLS]
+        del df
+        for valori in zip(*colonne):
+            yield tuple(None if isinstance(v, float) and v != v else normalizza_cella(v) for v in valori)
+
+    def leggi_fogli(self, path: str, seleziona, low_memory: bool = False) -> dict:
+        """
+        Apre il file una sola volta e legge i fogli scelti da seleziona(nomi_fogli).
+        Restituisce {foglio: DataFrame oppure eccezione}.
+        """
+        ext = os.path.splitext(path)[1].lower()
+        try:
+            xl = pd.ExcelFile(path, engine=self.engine)
+        except Exception as e:
+            raise ValueError(f"Errore apertura workbook ({ext}): {e}")
+        with xl:
+            risultato = {}
+            for foglio in seleziona(xl.sheet_names):
+                try:
+                    risultato[foglio] = self._leggi_foglio(xl, path, foglio, low_memory)
+                except Exception as e:
+                    risultato[foglio] = e
+            return risultato
+
+
+class OpenpyxlReader(ExcelReader):
+    """
+    openpyxl (.xlsx/.xlsm). Con low_memory=True legge il foglio in modalità read-only,
+    riga per riga, tenendo solo le colonne obbligatorie.
+    """
+
+    nome = "openpyxl"
+    estensioni = (".xlsx", ".xlsm")
+    moduli = ("openpyxl",)
+    engine = "openpyxl"
+
+    def _apri(self, path: str):
+        import openpyxl
+
+        return openpyxl.load_workbook(path, read_only=True, data_only=True)
+
+    def leggi(self, path: str, sheet_name: str, low_memory: bool = False) -> pd.DataFrame:
+        if not low_memory:
+            return super().leggi(path, sheet_name)
+        try:
+            wb = self._apri(path)
+        except Exception as e:
+            raise self._errore(sheet_name, path, e)
+        try:
+            if sheet_name not in wb.sheetnames:
+                raise self._errore(sheet_name, path, "foglio non trovato")
+            return righe_ridotte(wb[sheet_name].iter_rows(values_only=True), sheet_name)
+        finally:
+            wb.close()
+
+    def scorri_righe(self, path: str, sheet_name: str):
+        try:
+            wb = self._apri(path)
+        except Exception as e:
+            raise self._errore(sheet_name, path, e)
+        try:
+            if sheet_name not in wb.sheetnames:
+                raise self._errore(sheet_name, path, "foglio non trovato")
+            yield from righe_obbligatorie(wb[sheet_name].iter_rows(values_only=True), sheet_name)
+        finally:
+            wb.close()
+
+    def leggi_fogli(self, path: str, seleziona, low_memory: bool = False) -> dict:
+        if not low_memory:
+            return super().leggi_fogli(path, seleziona)
+        ext = os.path.splitext(path)[1].lower()
+        try:
+            wb = self._apri(path)
+        except Exception as e:
+            raise ValueError(f"Errore apertura workbook ({ext}): {e}")
+        try:
+            risultato = {}
+            for foglio in seleziona(wb.sheetnames):
+                try:
+                    risultato[foglio] = righe_ridotte(wb[foglio].iter_rows(values_only=True), foglio)
+                except Exception as e:
+                    risultato[foglio] = e
+            return risultato
+        finally:
+            wb.close()
+
+
+class XlrdReader(ExcelReader):
+    """xlrd (.xls)."""
+
+    nome = "xlrd"
+    estensioni = (".xls",)
+    moduli = ("xlrd",)
+    engine = "xlrd"
+
+
+class CalamineReader(ExcelReader):
+    """
+    calamine (libreria Rust, pacchetto python-calamine): legge .xlsx/.xlsm/.xls/.xlsb/.ods
+    molto più velocemente degli engine Python. Richiede pandas >= 2.2.
+    Solo su richiesta (reader="calamine"): vedi PREFERENZE per le celle di soli spazi.
+    """
+
+    nome = "calamine"
+    estensioni = (".xlsx", ".xlsm", ".xls", ".xlsb", ".ods")
+    moduli = ("python_calamine",)
+    engine = "calamine"
+
+    @classmethod
+    def disponibile(cls) -> bool:
+        versione = tuple(int(p) for p in pd.__version__.split(".")[:2] if p.isdigit())
+        return versione >= (2, 2) and super().disponibile()
+
+
+class PyxlsbReader(ExcelReader):
+    """pyxlsb (.xlsb, formato binario di Excel)."""
+
+    nome = "pyxlsb"
+    estensioni = (".xlsb",)
+    moduli = ("pyxlsb",)
+    engine = "pyxlsb"
+
+
+class OdfReader(ExcelReader):
+    """odfpy (.ods, LibreOffice/OpenDocument)."""
+
+    nome = "odf"
+    estensioni = (".ods",)
+    moduli = ("odf",)
+    engine = "odf"
+
+
+class CsvReader(ExcelReader):
+    """
+    Esportazioni di testo dei tool PLC (.csv/.tsv/.txt): un solo "foglio", il cui nome
+    non viene verificato. Separatore: tab per .tsv, altrimenti rilevato dalla prima riga
+    (tra ";", ",", tab). Codifica UTF-8 (anche con BOM), in alternativa cp1252.
+    """
+
+    nome = "csv"
+    estensioni = (".csv", ".tsv", ".txt")
+    moduli = ()
+    CODIFICHE = ("utf-8-sig", "cp1252")
+
+    def _formato(self, path: str):
+        ext = os.path.splitext(path)[1].lower()
+        for codifica in self.CODIFICHE:
+            try:
+                with open(path, encoding=codifica, newline="") as f:
+                    prima = f.readline()
+            except UnicodeDecodeError:
+                continue
+            if ext == ".tsv":
+                return "\t", codifica
+            try:
+                return csv.Sniffer().sniff(prima, delimiters=";,\t").delimiter, codifica
+            except csv.Error:
+                return ",", codifica
+        raise ValueError(f"Codifica non riconosciuta (provate: {list(self.CODIFICHE)})")
+
+    def leggi(self, path: str, sheet_name: str, low_memory: bool = False) -> pd.DataFrame:
+        try:
+            sep, codifica = self._formato(path)
+        except Exception as e:
+            raise self._errore(sheet_name, path, e)
+        return self._leggi_tabella(
+            lambda **kw: pd.read_csv(path, sep=sep, encoding=codifica, **kw), sheet_name, path, low_memory
+        )
+
+    def leggi_fogli(self, path: str, seleziona, low_memory: bool = False) -> dict:
+        foglio = os.path.splitext(os.path.basename(path))[0]
+        risultato = {}
+        for nome in seleziona([foglio]):
+            try:
+                risultato[nome] = self.leggi(path, nome, low_memory)
+            except Exception as e:
+                risultato[nome] = e
+        return risultato
+
+
+READERS = [OpenpyxlReader, XlrdReader, CalamineReader, PyxlsbReader, OdfReader, CsvReader]
+READER_NAMES = [r.nome for r in READERS]
+
+# Scelta automatica: per ogni estensione il primo backend installato.
+# calamine non è mai scelto automaticamente: nei file che non marcano gli spazi con xml:space="preserve"
+# (Excel lo fa, altri generatori no) legge come vuote le celle di soli spazi, che diventano pagine "nan"
+# invece di righe saltate. Si usa solo con reader="calamine".
+PREFERENZE = {
+    ".xlsx": ["openpyxl"],
+    ".xlsm": ["openpyxl"],
+    ".xls": ["xlrd"],
+    ".xlsb": ["pyxlsb"],
+    ".ods": ["odf"],
+    ".csv": ["csv"],
+    ".tsv": ["csv"],
+    ".txt": ["csv"],
+}
+
+
+def estensioni_supportate() -> list:
+    return sorted(PREFERENZE)
+
+
+def seleziona_lettore(path: str, reader: str = None) -> ExcelReader:
+    """
+    Lettore per il file: quello indicato da `reader` (nome in READER_NAMES) oppure,
+    se None/"auto", il primo backend installato che gestisce l'estensione.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in estensioni_supportate():
+        raise ValueError(f"Formato non supportato: '{ext}'. Usa uno tra {estensioni_supportate()}")
+
+    if reader and reader != "auto":
+        classe = next((r for r in READERS if r.nome == reader), None)
+        if classe is None:
+            raise ValueError(f"Lettore non supportato: '{reader}'. Usa uno tra {READER_NAMES}")
+        if ext not in classe.estensioni:
+            raise ValueError(f"Il lettore '{reader}' non gestisce i file '{ext}'")
+        if not classe.disponibile():
+            raise ValueError(f"Il lettore '{reader}' richiede i moduli {list(classe.moduli)}, non installati")
+        return classe()
+
+    candidati = [next(r for r in READERS if r.nome == nome) for nome in PREFERENZE[ext]]
+    for classe in candidati:
+        if classe.disponibile():
+            return classe()
+    moduli = sorted({m for r in candidati for m in r.moduli})
+    raise ValueError(f"Nessun lettore disponibile per '{ext}': installa uno tra {moduli}")
+
+
+def lettori_disponibili(path: str) -> list:
+    """
+    Nomi dei backend installati che gestiscono il file, anche quelli non scelti automaticamente
+    (usato dal benchmark e dai test di parità): prima quelli di PREFERENZE.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    preferiti = PREFERENZE.get(ext, [])
+    nomi = preferiti + [r.nome for r in READERS if ext in r.estensioni and r.nome not in preferiti]
+    return [nome for nome in nomi if next(r for r in READERS if r.nome == nome).disponibile()]
@@ -0,0 +1,115 @@
+# records.py
+
+import sys
+
+import numpy as np
+
+# Nomi dei grafici assegnati in ordine di comparsa sulla stessa pagina
+CHART_NAMES = ["ChartLeft", "ChartRight", "ChartCenter"]
+
+# FunctionType per il primo (motA) e il secondo (motB) motore della coppia
+FUNCTION_TYPES = ["Axe1_RefPosition", "Axe2_RefPosition"]
+
+# Colonne di chart_config.txt
+CHART_HEADER = [
+    "pagina",
+    "nome",
+    "visiblePlc",
+    "Type",
+    "Rotation",
+    "Period",
+    "Title",
+    "FunctionType",
+    "NoInterf1",
+    "NoInterf2",
+]
+
+# Colonne di interferences_summary.txt
+SUMMARY_HEADER = ["pagina", "Interferences"]
+
+
+class RigaChart:
+    """
+    Riga di chart_config.txt in forma compatta.
+    Le colonne costanti (visiblePlc, Type, Rotation, Period, NoInterf2) non sono memorizzate;
+    nome e FunctionType sono indici in CHART_NAMES / FUNCTION_TYPES; pagina e motore sono internati.
+    zone_idx e idx_num sono le chiavi di ordinamento (vedi parse_zone_and_index).
+    """
+
+    __slots__ = ("zone_idx", "idx_num", "pagina", "slot", "motore", "asse", "no_interf1")
+
+    VISIBLE_PLC = ""
+    TYPE = "Doughnut"
+    ROTATION = "0"
+    PERIOD = "360"
+    NO_INTERF2 = ""
+
+    def __init__(self, zone_idx: int, idx_num: int, pagina: str, slot: int, motore: str, asse: int, no_interf1: str):
+        self.zone_idx = zone_idx
+        self.idx_num = idx_num
+        self.pagina = sys.intern(pagina)
+        self.slot = slot
+        self.motore = sys.intern(motore)
+        self.asse = asse
+        self.no_interf1 = no_interf1
+
+    @classmethod
+    def da_campi(cls, zone_idx: int, idx_num: int, campi):
+        """
+        Ricostruisce la riga dalle 10 colonne di chart_config (es. lette dal manifest incrementale).
+        """
+        return cls(
+            zone_idx, idx_num, campi[0], CHART_NAMES.index(campi[1]),
+            campi[6], FUNCTION_TYPES.index(campi[7]), campi[8],
+        )
+
+    @property
+    def nome(self) -> str:
+        return CHART_NAMES[self.slot]
+
+    @property
+    def function_type(self) -> str:
+        return FUNCTION_TYPES[self.asse]
+
+    def campi(self) -> tuple:
+        """
+        Le 10 colonne di chart_config.txt, nell'ordine di CHART_HEADER.
+        """
+        return (
+            self.pagina, CHART_NAMES[self.slot], self.VISIBLE_PLC, self.TYPE, self.ROTATION,
+            self.PERIOD, self.motore, FUNCTION_TYPES[self.asse], self.no_interf1, self.NO_INTERF2,
+        )
+
+
+class RigaSummary:
+    """
+    Riga di interferences_summary.txt: pagina e testo "Interferences : motA/motB",
+    con le stesse chiavi di ordinamento di RigaChart.
+    """
+
+    __slots__ = ("zone_idx", "idx_num", "pagina", "testo")
+
+    def __init__(self, zone_idx: int, idx_num: int, pagina: str, testo: str):
+        self.zone_idx = zone_idx
+        self.idx_num = idx_num
+        self.pagina = sys.intern(pagina)
+        self.testo = testo
+
+    def campi(self) -> tuple:
+        return (self.pagina, self.testo)
+
+
+def ordina_righe(righe: list) -> list:
+    """
+    Ordinamento stabile per (zone_idx, idx_num) con un unico np.lexsort sulle chiavi intere
+    (a parità di chiave resta l'ordine di generazione, come list.sort).
+    """
+    if len(righe) < 2:
+        return list(righe)
+    try:
+        zone_idx = np.fromiter((r.zone_idx for r in righe), dtype=np.int64, count=len(righe))
+        idx_num = np.fromiter((r.idx_num for r in righe), dtype=np.int64, count=len(righe))
+    except OverflowError:
+        # Indici di pagina oltre int64: ordinamento Python
+        return sorted(righe, key=lambda r: (r.zone_idx, r.idx_num))
+    return [righe[i] for i in np.lexsort((idx_num, zone_idx))]
@@ -0,0 +1,265 @@
+# store.py
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+from cache import CartellaCache, default_cache_dir
+from processor import InterferenceProcessor, PROCESSOR_VERSION, REQUIRED_COLS
+from records import RigaChart, RigaSummary
+
+# =============================================================================
+# CONFIGURAZIONE DI DEFAULT
+# =============================================================================
+DEFAULT_STORE_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+DEFAULT_WAIT_SECONDS = 300                   # attesa massima di un risultato calcolato da un altro processo
+
+# Contatori di RunStats prodotti da process(), salvati con il risultato e ripristinati a ogni hit
+CONTATORI_PROCESS = ("dynamic_rows", "pairs_processed", "pages_skipped", "charts_skipped",
+                     "malformed_roots", "charts_generated")
+
+
+def default_store_dir() -> str:
+    return default_cache_dir("results")
+
+
+def righe_rilevanti(df_vars: pd.DataFrame) -> pd.DataFrame:
+    """
+    Righe del foglio da cui dipendono i file generati, in ordine di foglio:
+    le righe DynamicInterference (stesso filtro di filter_dynamic_interference)
+    e le righe StartNo/EndNo (stesso filtro di costruisci_tabella_zone).
+    """
+    descr = df_vars["DescrizioneEstensione"]
+    dinamiche = (df_vars["DataType"] == "BOOL") & descr.str.contains("DynamicInterference", na=False)
+    zone = descr.str.startswith("StartNo", na=False) | descr.str.startswith("EndNo", na=False)
+    return df_vars.loc[dinamiche | zone, REQUIRED_COLS]
+
+
+def impronta_valore(v) -> str:
+    """
+    Valore di una colonna di testo come entra nella chiave: tipo e testo, così la stringa "10.0"
+    e il float 10.0 (che process() scrive uguali solo per caso) non si confondono; celle vuote -> "".
+    """
+    if v is None or v is pd.NA or (isinstance(v, float) and v != v):
+        return ""
+    return f"{type(v).__name__}:{v}"
+
+
+def chiave_risultato(df_vars: pd.DataFrame, zone_order) -> str:
+    """
+    SHA-256 del contenuto rilevante del foglio (vedi righe_rilevanti), dell'ordine delle zone
+    e di PROCESSOR_VERSION. Progetti diversi con la stessa sezione di interferenze hanno la stessa chiave.
+    - i valori sono confrontati come li vede process(): le colonne di testo (object, string o
+      categoriali di lettura low_memory) danno la stessa impronta, mentre un Index letto come
+      float (10.0) o come intero (10) dà impronte diverse, come i tag generati
+    - i valori delle colonne di testo entrano con il loro tipo (impronta_valore): in una colonna
+      object mista la stringa "10.0" e il float 10.0 danno impronte diverse
+    """
+    rilevanti = righe_rilevanti(df_vars)
+    tipi = []
+    colonne = {}
+    for c in REQUIRED_COLS:
+        serie = rilevanti[c]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            tipo = serie.dtype.categories.dtype
+        else:
+            tipo = serie.dtype
+        if tipo.kind in "iufb":
+            tipi.append(str(tipo))
+        else:
+            tipi.append("testo")
+            serie = serie.astype(object).map(impronta_valore)
+        colonne[c] = serie
+    descrizione = {"version": PROCESSOR_VERSION, "zone_order": list(zone_order), "dtypes": tipi}
+
+    h = hashlib.sha256()
+    h.update(json.dumps(descrizione, ensure_ascii=False).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(pd.DataFrame(colonne), index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class ResultStore(CartellaCache):
+    """
+    Archivio su disco dei risultati di process() indirizzato per contenuto (chiave_risultato):
+    ogni voce (JSON) contiene le righe chart/summary (RigaChart/RigaSummary), i contatori di RunStats
+    e gli avvisi stampati da process().
+    - dimensione massima complessiva con eviction LRU (vedi cache.CartellaCache)
+    - più processi dello stesso batch con la stessa chiave: il primo prenota la chiave con un
+      file .lock e la calcola, gli altri attendono il risultato invece di ricalcolarlo
+    """
+
+    SUFFIX = ".json"
+    LOCK_SUFFIX = ".lock"
+
+    def __init__(self, store_dir: str = None, max_bytes: int = DEFAULT_STORE_MAX_BYTES,
+                 attesa: float = DEFAULT_WAIT_SECONDS):
+        super().__init__(store_dir or default_store_dir(), max_bytes)
+        self.attesa = attesa
+
+    def carica(self, chiave: str):
+        """
+        Restituisce la voce (dict con "charts", "summaries", "stats", "avvisi") oppure None se assente / non leggibile.
+        """
+        percorso = self._percorso(chiave)
+        if not os.path.isfile(percorso):
+            return None
+        try:
+            with open(percorso, encoding="utf-8") as f:
+                dati = json.load(f)
+            voce = {
+                "charts": [RigaChart(*campi) for campi in dati["charts"]],
+                "summaries": [RigaSummary(*campi) for campi in dati["summaries"]],
+                "stats": dati["stats"],
+                "avvisi": dati["avvisi"],
+            }
+        except Exception:
+            # Voce corrotta (es. scrittura interrotta): la si scarta
+            self._rimuovi(percorso)
+            return None
+        # Segna la voce come usata di recente per l'eviction LRU
+        try:
+            os.utime(percorso)
+        except OSError:
+            pass
+        return voce
+
+    def salva(self, chiave: str, charts: list, summaries: list, stats: dict, avvisi: list = ()):
+        dati = {
+            "charts": [[r.zone_idx, r.idx_num, r.pagina, r.slot, r.motore, r.asse, r.no_interf1] for r in charts],
+            "summaries": [[r.zone_idx, r.idx_num, r.pagina, r.testo] for r in summaries],
+            "stats": stats,
+            "avvisi": list(avvisi),
+        }
+
+        def scrivi(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(dati, f, ensure_ascii=False)
+
+        self._scrivi(chiave, scrivi)
+
+    def _lock(self, chiave: str) -> str:
+        return os.path.join(self.cache_dir, chiave + self.LOCK_SUFFIX)
+
+    def prenota(self, chiave: str) -> bool:
+        """
+        Crea il file di lock della chiave. False se un altro processo la sta già calcolando
+        (un lock più vecchio di self.attesa è considerato abbandonato e viene sostituito).
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        lock = self._lock(chiave)
+        for _ in range(2):
+            try:
+                os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.stat(lock).st_mtime <= self.attesa:
+                        return False
+                except OSError:
+                    continue
+                self._rimuovi(lock)
+        return False
+
+    def rilascia(self, chiave: str):
+        self._rimuovi(self._lock(chiave))
+
+    def attendi(self, chiave: str, intervallo: float = 0.2):
+        """
+        Attende che il processo che ha prenotato la chiave salvi il risultato.
+        Restituisce la voce, oppure None se il lock sparisce senza risultato o scade l'attesa.
+        """
+        scadenza = time.monotonic() + self.attesa
+        lock = self._lock(chiave)
+        while time.monotonic() < scadenza:
+            voce = self.carica(chiave)
+            if voce is not None:
+                return voce
+            if not os.path.exists(lock):
+                return self.carica(chiave)
+            time.sleep(intervallo)
+        return None
+
+
+class StoreProcessor(InterferenceProcessor):
+    """
+    Variante di InterferenceProcessor che riusa i risultati di un ResultStore:
+    - process() calcola chiave_risultato dal foglio letto; se la chiave è nello store le righe
+      chart/summary vengono prese da lì e process() classico non viene eseguito (hit),
+      altrimenti le calcola e le salva (miss)
+    - run() scrive comunque i file (e i formati aggiuntivi) dalle righe ottenute
+    Con un hit gli avvisi di process() (es. pagine con più di 3 grafici) salvati con il risultato
+    vengono ristampati e i contatori di RunStats sono quelli salvati.
+    """
+
+    def __init__(self, *args, store: ResultStore = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = store or ResultStore()
+        self.chiave = None
+        self.esito_store = None  # "hit" / "miss" dopo process()
+        self.avvisi = []         # avvisi di process(), salvati con il risultato
+
+    def avvisa(self, testo: str):
+        self.avvisi.append(testo)
+        super().avvisa(testo)
+
+    def process(self):
+        self.avvisi = []
+        self.chiave = chiave_risultato(self.df_vars, self.zone_order)
+        voce = self.store.carica(self.chiave)
+        prenotata = False
+        if voce is None:
+            prenotata = self.store.prenota(self.chiave)
+            if not prenotata:
+                voce = self.store.attendi(self.chiave)
+
+        if voce is not None:
+            self.esito_store = "hit"
+            self.stats.reset_process()
+            self.inter_grouped[:] = voce["charts"]
+            self.summary_grouped[:] = voce["summaries"]
+            for nome, valore in voce["stats"].items():
+                setattr(self.stats, nome, valore)
+            for testo in voce["avvisi"]:
+                self.avvisa(testo)
+            return
+
+        self.esito_store = "miss"
+        try:
+            super().process()
+            try:
+                self.store.salva(
+                    self.chiave, list(self.inter_grouped), list(self.summary_grouped),
+                    {nome: getattr(self.stats, nome) for nome in CONTATORI_PROCESS},
+                    self.avvisi,
+                )
+            except OSError as e:
+                print(f"[WARNING] Impossibile salvare il risultato nello store: {e}")
+        finally:
+            if prenotata:
+                self.store.rilascia(self.chiave)
+
+    def descrivi_store(self) -> str:
+        return f"store {self.esito_store} ({self.chiave[:12]})" if self.chiave else ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gestione dello store dei risultati indirizzato per contenuto.")
+    parser.add_argument("--dir", default=None, help="Cartella dello store (default: cartella utente)")
+    parser.add_argument("--clear", action="store_true", help="Svuota lo store")
+    args = parser.parse_args(argv)
+
+    store = ResultStore(store_dir=args.dir)
+    if args.clear:
+        print(f"Voci eliminate: {store.clear()}")
+    else:
+        voci = store.voci()
+        print(f"Cartella: {store.cache_dir}")
+        print(f"Voci: {len(voci)} - {sum(size for _, size, _ in voci) / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+# conftest.py
+
+import os
+import sys
+
+# I moduli del progetto sono nella cartella principale (nessun pacchetto installabile)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: budget di tempo/memoria su fogli sintetici (escludibili con -m 'not slow')")
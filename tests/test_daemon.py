@@ -0,0 +1,129 @@
+# test_daemon.py
+
+import contextlib
+import http.client
+import io
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from daemon import GestoreRichieste, ServizioWorkbook, TOKEN_HEADER, output_consentito
+from processor import REQUIRED_COLS
+
+TOKEN = "token-di-prova"
+
+RIGHE = [
+    ("MC1_A1_MC1_B1", "DynamicInterference_1", "BOOL", "DB10;BOOL", 1, "Wheel1_1"),
+    ("MC1_A1", "StartNoInterf_B1", "BOOL", "DB20;BOOL", 10, None),
+    ("MC1_A1", "EndNoInterf_B1", "BOOL", "DB20;BOOL", 11, None),
+]
+
+
+def scrivi_workbook(percorso):
+    pd.DataFrame(RIGHE, columns=REQUIRED_COLS).to_excel(percorso, sheet_name="Variabili", index=False)
+    return str(percorso)
+
+
+@pytest.fixture
+def servizio():
+    """Servizio HTTP su una porta libera, con un token fisso (nessun file del token scritto)."""
+    gestore = type("Gestore", (GestoreRichieste,), {
+        "servizio": ServizioWorkbook(), "token": TOKEN, "log_message": lambda self, *args: None,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), gestore)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def chiama(server, metodo, percorso, dati=None, headers=None):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+    corpo = json.dumps(dati).encode("utf-8") if dati is not None else None
+    try:
+        conn.request(metodo, percorso, body=corpo, headers=headers or {})
+        resp = conn.getresponse()
+        return resp.status, json.loads(resp.read().decode("utf-8"))
+    finally:
+        conn.close()
+
+
+def richiesta(cartella, excel, **altro):
+    return dict({
+        "excel_path": excel, "sheet_name": "Variabili",
+        "output_chart": str(cartella / "chart_config.txt"),
+        "output_summary": str(cartella / "interferences_summary.txt"),
+    }, **altro)
+
+
+@pytest.mark.parametrize("headers", [
+    {},
+    {TOKEN_HEADER: "sbagliato"},
+    {TOKEN_HEADER: TOKEN, "Origin": "http://esempio.invalid"},
+], ids=["senza_token", "token_errato", "origin"])
+def test_richieste_non_autorizzate(servizio, headers):
+    for metodo, percorso, dati in (("GET", "/status", None), ("POST", "/shutdown", {})):
+        intestazioni = dict(headers, **({"Content-Type": "application/json"} if dati is not None else {}))
+        codice, risposta = chiama(servizio, metodo, percorso, dati, intestazioni)
+        assert codice == 403 and risposta["ok"] is False
+    # Il servizio è ancora attivo
+    assert chiama(servizio, "GET", "/status", headers={TOKEN_HEADER: TOKEN})[0] == 200
+
+
+def test_post_senza_json_rifiutata(servizio):
+    codice, _ = chiama(servizio, "POST", "/shutdown", {}, {TOKEN_HEADER: TOKEN, "Content-Type": "text/plain"})
+    assert codice == 415
+    assert chiama(servizio, "GET", "/status", headers={TOKEN_HEADER: TOKEN})[0] == 200
+
+
+def test_output_consentito(tmp_path):
+    excel = str(tmp_path / "progetto" / "variabili.xlsx")
+    assert output_consentito(str(tmp_path / "progetto" / "chart_config.txt"), excel)
+    assert output_consentito(str(tmp_path / "progetto" / "out" / "chart_config.txt"), excel)
+    assert not output_consentito(str(tmp_path / "altro" / "chart_config.txt"), excel)
+    assert not output_consentito(str(tmp_path / "progetto" / ".." / "chart_config.txt"), excel)
+    assert not output_consentito(str(tmp_path / "progetto2" / "chart_config.txt"), excel)
+
+
+def test_generate_fuori_dalla_cartella(servizio, tmp_path):
+    (tmp_path / "progetto").mkdir()
+    excel = scrivi_workbook(tmp_path / "progetto" / "variabili.xlsx")
+    headers = {TOKEN_HEADER: TOKEN, "Content-Type": "application/json"}
+
+    codice, risposta = chiama(servizio, "POST", "/generate", richiesta(tmp_path, excel), headers)
+    assert codice == 403 and risposta["ok"] is False
+    assert not (tmp_path / "chart_config.txt").exists()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        codice, risposta = chiama(servizio, "POST", "/generate", richiesta(tmp_path / "progetto", excel), headers)
+    assert codice == 200 and risposta["ok"] is True
+    assert (tmp_path / "progetto" / "chart_config.txt").exists()
+
+
+def test_lru_scarta_il_foglio_usato_meno_di_recente(tmp_path):
+    servizio = ServizioWorkbook()
+    percorsi = {nome: scrivi_workbook(tmp_path / f"{nome}.xlsx") for nome in ("a", "b", "c")}
+    voce_a, _ = servizio.voce(percorsi["a"], "Variabili")
+    servizio.voce(percorsi["b"], "Variabili")
+    # Stesso contenuto: i tre fogli occupano gli stessi byte, ne restano residenti due
+    servizio.max_bytes = 2 * voce_a.bytes
+
+    assert servizio.voce(percorsi["a"], "Variabili")[1] is True
+    servizio.voce(percorsi["c"], "Variabili")
+    assert [chiave[0] for chiave in servizio.voci] == [percorsi["a"], percorsi["c"]]
+    assert servizio.voce(percorsi["b"], "Variabili")[1] is False
+    assert [chiave[0] for chiave in servizio.voci] == [percorsi["c"], percorsi["b"]]
+    assert (servizio.letture, servizio.riusi) == (4, 1)
+
+
+def test_foglio_piu_grande_del_limite_resta_residente(tmp_path):
+    servizio = ServizioWorkbook(max_bytes=1)
+    percorsi = [scrivi_workbook(tmp_path / f"{nome}.xlsx") for nome in ("a", "b")]
+    for percorso in percorsi:
+        servizio.voce(percorso, "Variabili")
+        assert [chiave[0] for chiave in servizio.voci] == [percorso]
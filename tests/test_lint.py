@@ -0,0 +1,51 @@
+# test_lint.py
+
+import pytest
+
+from lint import SheetLinter
+from readers import REQUIRED_COLS
+
+openpyxl = pytest.importorskip("openpyxl")
+
+# Righe Excel (1 = intestazione): le righe vuote intermedie non devono spostare la numerazione
+RIGHE = [
+    ["MC1_MA_MC1_MB", "DynamicInterference_1", "BOOL", "DB10;BOOL", 1, "Wheel1_1"],  # 2
+    None,                                                                         # 3
+    ["MC1_MA", "StartNo1stInterf_MB", "BOOL", "DB1;a", 10, None],                 # 4
+    ["MC1_MA", "EndNo1stInterf_MB", "BOOL", "DB1;a", 11, None],                   # 5
+    None,                                                                         # 6
+    ["MC1_MA", "StartNo1stInterf_MB", "BOOL", "DB1;a", 12, None],                 # 7: Start senza End
+    ["MC1_MB", "StartNoInterf_MA", "BOOL", "DB1;a", 20, None],                    # 8
+    ["MC1_MB", "EndNoInterf_MA", "BOOL", "DB1;a", 21, None],                      # 9
+    # Nessuna riga DynamicInterference cerca MZ: il generatore non usa queste righe
+    ["MC1_MA", "StartNoInterf_MZ", "BOOL", "DB1;a", 30, None],                    # 10
+    ["MC1_MB", "DynamicInterference_2", "BOOL", "DB10;BOOL", 2, "Wheel1_1"],      # 11: root non conforme
+]
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Variabili"
+    ws.append(REQUIRED_COLS)
+    for riga in RIGHE:
+        ws.append(riga or [])
+    percorso = str(tmp_path / "lint.xlsx")
+    wb.save(percorso)
+    return percorso
+
+
+@pytest.mark.parametrize("low_memory", [False, True])
+def test_righe_come_nel_foglio(workbook, low_memory):
+    problemi = SheetLinter.da_workbook(workbook, "Variabili", low_memory=low_memory).esegui()
+    assert problemi[problemi["controllo"] == "root"]["riga"].tolist() == [11]
+    assert problemi[problemi["controllo"] == "start_end"]["riga"].tolist() == [4]
+
+
+def test_start_end_segue_il_generatore(workbook):
+    problemi = SheetLinter.da_workbook(workbook, "Variabili").esegui()
+    start_end = problemi[problemi["controllo"] == "start_end"]
+    # Solo MA->MB ha un Start in eccesso; MB->MA è accoppiato e MZ non è cercato da nessuna coppia
+    assert start_end["root"].tolist() == ["MC1_MA"]
+    assert "2 Start / 1 End per 'MB'" in start_end["dettaglio"].iat[0]
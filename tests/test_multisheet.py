@@ -0,0 +1,67 @@
+# test_multisheet.py
+
+import pandas as pd
+import pytest
+
+from multisheet import COMBINED_CHART, COMBINED_SUMMARY, MultiSheetProcessor
+from processor import REQUIRED_COLS
+from records import CHART_HEADER, SUMMARY_HEADER
+
+FOGLI = {
+    "Linea1": [
+        ("MC1_A1_MC1_B1", "DynamicInterference_1", "BOOL", "DB10;BOOL", 1, "Wheel1_2"),
+        ("MC1_A2_MC1_B2", "DynamicInterference_2", "BOOL", "DB10;BOOL", 2, "Infeed_1"),
+        ("MC1_A1", "StartNoInterf_B1", "BOOL", "DB20;BOOL", 10, None),
+        ("MC1_A1", "EndNoInterf_B1", "BOOL", "DB20;BOOL", 11, None),
+    ],
+    "Linea2": [
+        ("MC2_C1_MC2_D1", "DynamicInterference_1", "BOOL", "DB10;BOOL", 1, "Exit_1"),
+        ("MC2_D1", "StartNo1stInterf_C1", "BOOL", "DB21;BOOL", 5, None),
+        ("MC2_D1", "EndNo1stInterf_C1", "BOOL", "DB21;BOOL", 6, None),
+    ],
+}
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    percorso = str(tmp_path / "linee.xlsx")
+    with pd.ExcelWriter(percorso) as writer:
+        for foglio, righe in FOGLI.items():
+            pd.DataFrame(righe, columns=REQUIRED_COLS).to_excel(writer, sheet_name=foglio, index=False)
+        # Foglio senza le colonne obbligatorie: errore solo per lui
+        pd.DataFrame({"Note": ["revisione 3"]}).to_excel(writer, sheet_name="Note", index=False)
+    return percorso
+
+
+def righe_file(percorso) -> list:
+    with open(percorso, encoding="utf-8", newline="") as f:
+        return f.read().splitlines()
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_output_combinato(workbook, tmp_path, jobs):
+    """L'output combinato è l'unione degli output per foglio, con il foglio in testa a ogni riga."""
+    separati = MultiSheetProcessor(workbook, out_dir=str(tmp_path / "separati"), jobs=jobs)
+    combinato = MultiSheetProcessor(workbook, out_dir=str(tmp_path / "combinato"), jobs=jobs, combina=True)
+    esiti_separati = separati.run(stampa=lambda riga: None)
+    esiti = combinato.run(stampa=lambda riga: None)
+
+    assert [(r["foglio"], r["ok"]) for r in esiti] == [("Linea1", True), ("Linea2", True), ("Note", False)]
+    assert [(r["foglio"], r["ok"]) for r in esiti_separati] == [(r["foglio"], r["ok"]) for r in esiti]
+    assert sorted(p.name for p in (tmp_path / "combinato").iterdir()) == sorted([COMBINED_CHART, COMBINED_SUMMARY])
+
+    for nome, header in ((COMBINED_CHART, CHART_HEADER), (COMBINED_SUMMARY, SUMMARY_HEADER)):
+        atteso = ["\t".join(["foglio"] + header)]
+        for foglio in FOGLI:
+            righe = righe_file(tmp_path / "separati" / foglio / nome)
+            assert righe[0] == "\t".join(header)
+            assert len(righe) > 1
+            atteso += [f"{foglio}\t{riga}" for riga in righe[1:]]
+        assert righe_file(tmp_path / "combinato" / nome) == atteso
+
+
+def test_output_combinato_con_selezione(workbook, tmp_path):
+    combinato = MultiSheetProcessor(workbook, pattern="linea2", out_dir=str(tmp_path), jobs=1, combina=True)
+    combinato.run(stampa=lambda riga: None)
+    righe = righe_file(tmp_path / COMBINED_SUMMARY)
+    assert righe == ["\t".join(["foglio"] + SUMMARY_HEADER), "Linea2\tExit_1\tInterferences : C1/D1"]
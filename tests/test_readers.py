@@ -0,0 +1,107 @@
+# test_readers.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from readers import PREFERENZE, REQUIRED_COLS, SOLO_SPAZI, lettori_disponibili, seleziona_lettore
+
+# Pagine miste (numeri e testo), celle di soli spazi e colonne numeriche con celle vuote: pandas le legge
+# come object/float, i lettori devono comunque restituire gli stessi valori (5 e non 5.0, "" per gli spazi)
+FOGLIO = pd.DataFrame({
+    "DescrizioneRadice": ["MC1_Z1", "MC1_Z2", "MC1_Z3", "MC1_Z4", "   "],
+    "DescrizioneEstensione": ["DynamicInterference_1", "StartNo1st_Wheel_1", None, "EndNo1st_Wheel_1",
+                              "DynamicInterference_2"],
+    "DataType": ["BOOL", "BOOL", "INT", "BOOL", "BOOL"],
+    "ObjectType": ["DB10;BOOL"] * 5,
+    "Index": [1, None, 3, 4, 5],
+    "New Page": [5, "   ", "Wheel_1", 7.5, " \t "],
+})
+SOLO_NUMERI = FOGLIO.assign(**{"New Page": [5, None, 6, 7, 8]})
+
+# Backend che possono leggere come vuote le celle di soli spazi (file senza xml:space="preserve"):
+# per il resto devono dare gli stessi valori degli altri
+SPAZI_PERSI = {"calamine"}
+
+
+def scrivi(df, tmp_path, ext):
+    percorso = str(tmp_path / f"foglio{ext}")
+    if ext == ".csv":
+        df.to_csv(percorso, index=False, sep=";")
+    else:
+        df.to_excel(percorso, sheet_name="Variabili", index=False)
+    return percorso
+
+
+def letture(percorso):
+    """{modo: {lettore: DataFrame}} per ogni backend installato che gestisce il file."""
+    risultato = {"leggi": {}, "low_memory": {}, "scorri_righe": {}}
+    for nome in lettori_disponibili(percorso):
+        lettore = seleziona_lettore(percorso, nome)
+        risultato["leggi"][nome] = lettore.leggi(percorso, "Variabili")[REQUIRED_COLS]
+        risultato["low_memory"][nome] = lettore.leggi(percorso, "Variabili", low_memory=True)
+        righe = list(lettore.scorri_righe(percorso, "Variabili"))
+        risultato["scorri_righe"][nome] = pd.DataFrame(righe, columns=REQUIRED_COLS, dtype=object)
+    return risultato
+
+
+def senza_spazi(df, vuoto=np.nan):
+    """Il frame atteso da un backend di SPAZI_PERSI: celle di soli spazi vuote."""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == "category":
+            df[col] = df[col].astype(object)
+        df[col] = df[col].mask(df[col].map(lambda v: isinstance(v, str) and v == SOLO_SPAZI), vuoto)
+    return df
+
+
+@pytest.mark.parametrize("foglio", [FOGLIO, SOLO_NUMERI], ids=["pagine_miste", "pagine_numeriche"])
+@pytest.mark.parametrize("ext, modulo", [(".xlsx", "openpyxl"), (".ods", "odf"), (".csv", None)])
+def test_stesso_frame_con_ogni_lettore(tmp_path, foglio, ext, modulo):
+    """Per ogni modalità di lettura tutti i backend installati danno lo stesso frame (valori e tipi)."""
+    if modulo:
+        pytest.importorskip(modulo)
+    percorso = scrivi(foglio, tmp_path, ext)
+
+    for modo, per_lettore in letture(percorso).items():
+        nomi = list(per_lettore)
+        atteso = per_lettore[nomi[0]]
+        for nome in nomi[1:]:
+            ottenuto = per_lettore[nome]
+            if nome in SPAZI_PERSI:
+                vuoto = None if modo == "scorri_righe" else np.nan
+                atteso_nome, ottenuto = senza_spazi(atteso, vuoto), senza_spazi(ottenuto, vuoto)
+            else:
+                atteso_nome = atteso
+            if modo == "scorri_righe":
+                # Tuple Python: 5 e 5.0 sono uguali per ==, non per il testo della pagina
+                atteso_nome, ottenuto = atteso_nome.map(repr), ottenuto.map(repr)
+            pd.testing.assert_frame_equal(ottenuto, atteso_nome, obj=f"{modo} {nome} vs {nomi[0]}")
+
+
+def test_celle_di_soli_spazi(tmp_path):
+    """Le celle di soli spazi valgono SOLO_SPAZI con i backend scelti automaticamente."""
+    pytest.importorskip("openpyxl")
+    percorso = scrivi(FOGLIO, tmp_path, ".xlsx")
+    lettore = seleziona_lettore(percorso)
+    for df in (lettore.leggi(percorso, "Variabili"), lettore.leggi(percorso, "Variabili", low_memory=True)):
+        pagine = df["New Page"].astype(object)
+        assert pagine.iat[1] == SOLO_SPAZI and pagine.iat[4] == SOLO_SPAZI
+        assert df["DescrizioneRadice"].astype(object).iat[4] == SOLO_SPAZI
+    righe = list(lettore.scorri_righe(percorso, "Variabili"))
+    assert [r[-1] for r in righe][1::3] == [SOLO_SPAZI, SOLO_SPAZI]
+
+
+def test_calamine_mai_scelto_automaticamente():
+    assert all("calamine" not in nomi for nomi in PREFERENZE.values())
+
+
+def test_scorri_righe_senza_float_interi(tmp_path):
+    """Le righe in streaming hanno Index e pagine come nel foglio: 5 e non 5.0."""
+    pytest.importorskip("openpyxl")
+    percorso = scrivi(SOLO_NUMERI, tmp_path, ".xlsx")
+    for nome in lettori_disponibili(percorso):
+        righe = list(seleziona_lettore(percorso, nome).scorri_righe(percorso, "Variabili"))
+        # repr: 5.0 == 5 per Python, ma str() della pagina darebbe "5.0"
+        assert [repr(r[-2]) for r in righe] == ["1", "None", "3", "4", "5"], nome
+        assert [repr(r[-1]) for r in righe] == ["5", "None", "6", "7", "8"], nome
@@ -0,0 +1,284 @@
+# test_regression.py
+
+import contextlib
+import io
+import time
+import tracemalloc
+
+import pandas as pd
+import pytest
+
+from benchmark import genera_foglio_sintetico, parametri_per_righe
+from chunked import ChunkedProcessor
+from incremental import IncrementalProcessor
+from processor import InterferenceProcessor, ENGINES, REQUIRED_COLS
+from records import CHART_HEADER, SUMMARY_HEADER
+
+# Budget di process() + scrittura dei file sul foglio sintetico di benchmark.py da BUDGET_ROWS righe
+# (foglio già in memoria: la lettura dell'Excel non è compresa), circa il triplo delle misure attuali.
+BUDGET_ROWS = 100_000
+BUDGETS = {
+    "classic": {"seconds": 6.0, "peak_mb": 70},
+    "vectorized": {"seconds": 6.0, "peak_mb": 280},
+}
+
+# Varianti con cui viene elaborato ogni caso: tutte devono produrre gli stessi byte
+VARIANTI = {
+    "classic": (InterferenceProcessor, {}),
+    "vectorized": (InterferenceProcessor, {"engine": "vectorized"}),
+    "low_memory": (InterferenceProcessor, {"low_memory": True}),
+    "chunked": (ChunkedProcessor, {}),
+}
+
+# -----------------------------------------------------------------------------
+# Casi costruiti a mano: righe (DescrizioneRadice, DescrizioneEstensione, DataType, ObjectType, Index, New Page)
+# e righe attese di chart_config.txt / interferences_summary.txt (campi separati da tabulazione).
+# -----------------------------------------------------------------------------
+CASI = [
+    {
+        "nome": "root_underscore",
+        "descrizione": "motore con underscore: zone sotto il root con e senza underscore, motY cercato con underscore",
+        "zone_order": None,
+        "righe": [
+            ("MC1_MOT_A_MC1_MOTB", "DynamicInterference_1", "BOOL", "DB10;BOOL", 1, "Wheel1_1"),
+            ("MC1_MOTC_MC1_MOTD", "DynamicInterference_2", "BOOL", "DB10;BOOL", 2, "Infeed_2"),
+            ("MC1_MOT_A", "StartNo1stInterf_MOTB", "BOOL", "DB20;BOOL", 10, None),
+            ("MC1_MOT_A", "EndNo1stInterf_MOTB", "BOOL", "DB20;BOOL", 11, None),
+            ("MC1_MOTA", "StartNo2ndInterf_MOTB", "BOOL", "DB20;BOOL", 12, None),
+            ("MC1_MOTA", "EndNo2ndInterf_MOTB", "BOOL", "DB20;BOOL", 13, None),
+            ("MC1_MOTB", "StartNoInterf_MOT_A", "BOOL", "DB21;BOOL", 20, None),
+            ("MC1_MOTB", "EndNoInterf_MOT_A", "BOOL", "DB21;BOOL", 21, None),
+            ("MC1_MOTB", "StartNoInterf_MOTA", "BOOL", "DB21;BOOL", 22, None),
+            ("MC1_MOTB", "EndNoInterf_MOTA", "BOOL", "DB21;BOOL", 23, None),
+            ("MC1_AUX", "Param_1", "INT", "DB30;INT", 1, None),
+        ],
+        "chart": [
+            "Infeed_2\tChartLeft\t\tDoughnut\t0\t360\tMOTC\tAxe1_RefPosition\t\t",
+            "Infeed_2\tChartRight\t\tDoughnut\t0\t360\tMOTD\tAxe2_RefPosition\t\t",
+            "Wheel1_1\tChartLeft\t\tDoughnut\t0\t360\tMOT_A\tAxe1_RefPosition\t"
+            "DB20_StartNo1stInterf_MOTB_10,DB20_EndNo1stInterf_MOTB_11,"
+            "DB20_StartNo2ndInterf_MOTB_12,DB20_EndNo2ndInterf_MOTB_13\t",
+            "Wheel1_1\tChartRight\t\tDoughnut\t0\t360\tMOTB\tAxe2_RefPosition\t"
+            "DB21_StartNoInterf_MOT_A_20,DB21_EndNoInterf_MOT_A_21\t",
+        ],
+        "summary": [
+            "Infeed_2\tInterferences : MOTC/MOTD",
+            "Wheel1_1\tInterferences : MOT_A/MOTB",
+        ],
+    },
+    {
+        "nome": "ordinali",
+        "descrizione": "ordinali 1st/2nd/3rd: coppie per (ordinale, Index), 3rd ignorato, senza ordinale = 1st, Start in eccesso scartati",
+        "zone_order": None,
+        "righe": [
+            ("MC2_M1_MC2_M2", "DynamicInterference_1", "BOOL", "DB10;BOOL", 1, "Exit_1"),
+            ("MC2_M1", "StartNo1stX_M2", "BOOL", "DB20;BOOL", 5, None),
+            ("MC2_M1", "EndNo1stX_M2", "BOOL", "DB20;BOOL", 6, None),
+            ("MC2_M1", "StartNo1stY_M2", "BOOL", "DB20;BOOL", 3, None),
+            ("MC2_M1", "EndNo1stY_M2", "BOOL", "DB20;BOOL", 4, None),
+            ("MC2_M1", "StartNo2ndX_M2", "BOOL", "DB20;BOOL", 7, None),
+            ("MC2_M1", "EndNo2ndX_M2", "BOOL", "DB20;BOOL", 8, None),
+            ("MC2_M1", "StartNo3rdX_M2", "BOOL", "DB20;BOOL", 9, None),
+            ("MC2_M1", "EndNo3rdX_M2", "BOOL", "DB20;BOOL", 10, None),
+            ("MC2_M1", "StartNo2ndZ_M2", "BOOL", "DB20;BOOL", 11, None),
+            ("MC2_M2", "StartNoZ_M1", "BOOL", "DB21;BOOL", 1, None),
+            ("MC2_M2", "StartNo1stW_M1", "BOOL", "DB21;BOOL", 30, None),
+            ("MC2_M2", "EndNo1stW_M1", "BOOL", "DB21;BOOL", 31, None),
+        ],
+        "chart": [
+            "Exit_1\tChartLeft\t\tDoughnut\t0\t360\tM1\tAxe1_RefPosition\t"
+            "DB20_StartNo1stY_M2_3,DB20_EndNo1stY_M2_4,DB20_StartNo1stX_M2_5,DB20_EndNo1stX_M2_6,"
+            "DB20_StartNo2ndX_M2_7,DB20_EndNo2ndX_M2_8\t",
+            "Exit_1\tChartRight\t\tDoughnut\t0\t360\tM2\tAxe2_RefPosition\t"
+            "DB21_StartNoZ_M1_1,DB21_EndNo1stW_M1_31\t",
+        ],
+        "summary": [
+            "Exit_1\tInterferences : M1/M2",
+        ],
+    },
+    {
+        "nome": "tre_motori",
+        "descrizione": "più di tre motori per pagina, root non conformi, pagina mancante (scritta 'nan' come in origine)",
+        "zone_order": None,
+        "righe": [
+            ("MC1_A1_MC1_B1", "DynamicInterference_1", "BOOL", "DB10;BOOL", 1, "Wheel2_3"),
+            ("MC1_A2_MC1_B2", "DynamicInterference_2", "BOOL", "DB10;BOOL", 2, "Wheel2_3"),
+            ("MC1_A3_MC1_B3", "DynamicInterference_3", "BOOL", "DB10;BOOL", 3, "Wheel2_3"),
+            ("MC1_A4_MC1_B4", "DynamicInterference_4", "BOOL", "DB10;BOOL", 4, "Wheel2_1"),
+            ("MC1_A5_MC1_B5", "DynamicInterference_5", "BOOL", "DB10;BOOL", 5, None),
+            ("MC1_BAD", "DynamicInterference_6", "BOOL", "DB10;BOOL", 6, "Wheel2_1"),
+            ("MC1_X_Y_MC2_Z", "DynamicInterference_7", "BOOL", "DB10;BOOL", 7, "Wheel2_1"),
+            ("MC1_A2", "StartNoInterf_B2", "BOOL", "DB20;BOOL", 40, None),
+            ("MC1_A2", "EndNoInterf_B2", "BOOL", "DB20;BOOL", 41, None),
+            ("MC1_A2", "StartNoDynamicInterference_B2", "INT", "DB20;INT", 42, None),
+        ],
+        "chart": [
+            "Wheel2_1\tChartLeft\t\tDoughnut\t0\t360\tA4\tAxe1_RefPosition\t\t",
+            "Wheel2_1\tChartRight\t\tDoughnut\t0\t360\tB4\tAxe2_RefPosition\t\t",
+            "Wheel2_3\tChartLeft\t\tDoughnut\t0\t360\tA1\tAxe1_RefPosition\t\t",
+            "Wheel2_3\tChartRight\t\tDoughnut\t0\t360\tB1\tAxe2_RefPosition\t\t",
+            "Wheel2_3\tChartCenter\t\tDoughnut\t0\t360\tA2\tAxe1_RefPosition\t"
+            "DB20_StartNoInterf_B2_40,DB20_EndNoInterf_B2_41\t",
+            "nan\tChartLeft\t\tDoughnut\t0\t360\tA5\tAxe1_RefPosition\t\t",
+            "nan\tChartRight\t\tDoughnut\t0\t360\tB5\tAxe2_RefPosition\t\t",
+        ],
+        "summary": [
+            "Wheel2_1\tInterferences : A4/B4",
+            "Wheel2_3\tInterferences : A1/B1",
+            "Wheel2_3\tInterferences : A2/B2",
+            "nan\tInterferences : A5/B5",
+        ],
+    },
+    {
+        "nome": "zone_sconosciute",
+        "descrizione": "ordine di zone personalizzato, pagine senza zona, indici con separatore, maiuscole e zona senza numero (= 1)",
+        "zone_order": ["Wheel1", "Stamp", "Infeed"],
+        "righe": [
+            ("MC1_P1_MC1_Q1", "DynamicInterference_1", "BOOL", "DB10;BOOL", 1, "Robot_1"),
+            ("MC1_P2_MC1_Q2", "DynamicInterference_2", "BOOL", "DB10;BOOL", 2, "stamp-2"),
+            ("MC1_P3_MC1_Q3", "DynamicInterference_3", "BOOL", "DB10;BOOL", 3, "WHEEL1_10"),
+            ("MC1_P4_MC1_Q4", "DynamicInterference_4", "BOOL", "DB10;BOOL", 4, "Wheel1_2"),
+            ("MC1_P5_MC1_Q5", "DynamicInterference_5", "BOOL", "DB10;BOOL", 5, "Infeed"),
+            ("MC1_P6_MC1_Q6", "DynamicInterference_6", "BOOL", "DB10;BOOL", 6, "Paint"),
+            ("MC1_P7_MC1_Q7", "DynamicInterference_7", "BOOL", "DB10;BOOL", 7, "Wheel1Stamp_3"),
+        ],
+        "chart": [
+            "Wheel1Stamp_3\tChartLeft\t\tDoughnut\t0\t360\tP7\tAxe1_RefPosition\t\t",
+            "Wheel1Stamp_3\tChartRight\t\tDoughnut\t0\t360\tQ7\tAxe2_RefPosition\t\t",
+            "Wheel1_2\tChartLeft\t\tDoughnut\t0\t360\tP4\tAxe1_RefPosition\t\t",
+            "Wheel1_2\tChartRight\t\tDoughnut\t0\t360\tQ4\tAxe2_RefPosition\t\t",
+            "WHEEL1_10\tChartLeft\t\tDoughnut\t0\t360\tP3\tAxe1_RefPosition\t\t",
+            "WHEEL1_10\tChartRight\t\tDoughnut\t0\t360\tQ3\tAxe2_RefPosition\t\t",
+            "stamp-2\tChartLeft\t\tDoughnut\t0\t360\tP2\tAxe1_RefPosition\t\t",
+            "stamp-2\tChartRight\t\tDoughnut\t0\t360\tQ2\tAxe2_RefPosition\t\t",
+            "Infeed\tChartLeft\t\tDoughnut\t0\t360\tP5\tAxe1_RefPosition\t\t",
+            "Infeed\tChartRight\t\tDoughnut\t0\t360\tQ5\tAxe2_RefPosition\t\t",
+            "Robot_1\tChartLeft\t\tDoughnut\t0\t360\tP1\tAxe1_RefPosition\t\t",
+            "Robot_1\tChartRight\t\tDoughnut\t0\t360\tQ1\tAxe2_RefPosition\t\t",
+            "Paint\tChartLeft\t\tDoughnut\t0\t360\tP6\tAxe1_RefPosition\t\t",
+            "Paint\tChartRight\t\tDoughnut\t0\t360\tQ6\tAxe2_RefPosition\t\t",
+        ],
+        "summary": [
+            "Wheel1Stamp_3\tInterferences : P7/Q7",
+            "Wheel1_2\tInterferences : P4/Q4",
+            "WHEEL1_10\tInterferences : P3/Q3",
+            "stamp-2\tInterferences : P2/Q2",
+            "Infeed\tInterferences : P5/Q5",
+            "Robot_1\tInterferences : P1/Q1",
+            "Paint\tInterferences : P6/Q6",
+        ],
+    },
+]
+
+
+
+
+def file_atteso(header: list, righe: list) -> str:
+    return "".join(riga + "\n" for riga in ["\t".join(header)] + righe)
+
+
+@pytest.fixture(scope="module")
+def workbook_casi(tmp_path_factory):
+    """Un workbook per caso, scritto una sola volta per tutte le varianti."""
+    cartella = tmp_path_factory.mktemp("casi")
+    percorsi = {}
+    for caso in CASI:
+        percorsi[caso["nome"]] = str(cartella / f"{caso['nome']}.xlsx")
+        pd.DataFrame(caso["righe"], columns=REQUIRED_COLS).to_excel(
+            percorsi[caso["nome"]], sheet_name="Variabili", index=False
+        )
+    return percorsi
+
+
+@pytest.mark.parametrize("variante", list(VARIANTI))
+@pytest.mark.parametrize("caso", CASI, ids=[c["nome"] for c in CASI])
+def test_output_byte_per_byte(workbook_casi, tmp_path, caso, variante):
+    classe, opzioni = VARIANTI[variante]
+    chart = tmp_path / "chart_config.txt"
+    summary = tmp_path / "interferences_summary.txt"
+    with contextlib.redirect_stdout(io.StringIO()):
+        classe(
+            workbook_casi[caso["nome"]], "Variabili", str(chart), str(summary),
+            zone_order=caso["zone_order"], **opzioni,
+        ).run()
+    assert chart.read_bytes().decode("utf-8") == file_atteso(CHART_HEADER, caso["chart"])
+    assert summary.read_bytes().decode("utf-8") == file_atteso(SUMMARY_HEADER, caso["summary"])
+
+
+def righe_caso(nome: str) -> list:
+    return list(next(c for c in CASI if c["nome"] == nome)["righe"])
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_incrementale_come_rigenerazione_completa(tmp_path, engine):
+    """
+    Build completo, poi una pagina modificata, una rimossa e una nuova: il run incrementale
+    deve dare gli stessi byte di un run completo sul foglio modificato e il report delle pagine cambiate.
+    """
+    prima = righe_caso("root_underscore") + righe_caso("zone_sconosciute")
+    dopo = [
+        riga[:4] + (14,) + riga[5:] if riga[1] == "StartNo1stInterf_MOTB" else riga
+        for riga in prima
+        if riga[5] != "Paint"
+    ]
+    dopo.append(("MC1_P8_MC1_Q8", "DynamicInterference_8", "BOOL", "DB10;BOOL", 8, "Stamp_5"))
+
+    def esegui(classe, righe, cartella, **opzioni):
+        cartella.mkdir(exist_ok=True)
+        excel = cartella / "variabili.xlsx"
+        pd.DataFrame(righe, columns=REQUIRED_COLS).to_excel(excel, sheet_name="Variabili", index=False)
+        chart = cartella / "chart_config.txt"
+        summary = cartella / "interferences_summary.txt"
+        processor = classe(str(excel), "Variabili", str(chart), str(summary), engine=engine, **opzioni)
+        with contextlib.redirect_stdout(io.StringIO()):
+            processor.run()
+        return processor, chart, summary
+
+    incrementale = tmp_path / "incrementale"
+    report = str(incrementale / "chart_config.txt.changes.txt")
+    esegui(IncrementalProcessor, prima, incrementale, report_path=report)
+    processor, chart, summary = esegui(IncrementalProcessor, dopo, incrementale, report_path=report)
+    _, chart_completo, summary_completo = esegui(InterferenceProcessor, dopo, tmp_path / "completo")
+
+    assert chart.read_bytes() == chart_completo.read_bytes()
+    assert summary.read_bytes() == summary_completo.read_bytes()
+    with open(report, encoding="utf-8") as f:
+        assert f.read() == "nuove\tStamp_5\nmodificate\tWheel1_1\nrimosse\tPaint\n"
+    assert processor.report["invariate"] == 7
+
+
+@pytest.fixture(scope="module")
+def foglio_budget():
+    return genera_foglio_sintetico(seed=0, **parametri_per_righe(BUDGET_ROWS))
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("engine", ENGINES)
+def test_budget(foglio_budget, tmp_path, engine):
+    """
+    Tempo (senza tracemalloc) e picco di memoria (con tracemalloc, in un secondo passaggio)
+    di process() + scrittura dei file entro BUDGETS.
+    """
+    misure = {}
+    for misura in ("seconds", "peak_mb"):
+        p = InterferenceProcessor(
+            "", "Variabili", str(tmp_path / "chart_config.txt"), str(tmp_path / "interferences_summary.txt"),
+            engine=engine,
+        )
+        p.imposta_foglio(foglio_budget)
+        if misura == "peak_mb":
+            tracemalloc.start()
+        inizio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            p.process()
+            p.write_chart_config()
+            p.write_summary()
+        if misura == "seconds":
+            misure["seconds"] = time.perf_counter() - inizio
+        else:
+            misure["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+
+    limiti = BUDGETS.get(engine, {})
+    for misura, limite in limiti.items():
+        assert misure[misura] <= limite, f"{engine}: {misura}={misure[misura]:.2f} oltre il budget {limite}"
@@ -0,0 +1,49 @@
+# test_store.py
+
+import pandas as pd
+import pytest
+
+from processor import REQUIRED_COLS
+from store import ResultStore, StoreProcessor, chiave_risultato
+
+RIGA = {
+    "DescrizioneRadice": ["MC1_A_MC1_B"],
+    "DescrizioneEstensione": ["DynamicInterference_1"],
+    "DataType": ["BOOL"],
+    "ObjectType": ["DB10;BOOL"],
+    "Index": [1],
+}
+
+
+def foglio(pagina, dtype=object):
+    return pd.DataFrame({**RIGA, "New Page": pd.Series([pagina], dtype=dtype)})
+
+
+def test_chiave_distingue_tipo_dei_valori():
+    assert chiave_risultato(foglio("10.0"), ["Wheel1"]) != chiave_risultato(foglio(10.0), ["Wheel1"])
+
+
+@pytest.mark.parametrize("dtype", ["str", "category"])
+def test_chiave_uguale_per_ogni_colonna_di_testo(dtype):
+    assert chiave_risultato(foglio("Wheel1_1"), ["Wheel1"]) == chiave_risultato(foglio("Wheel1_1", dtype), ["Wheel1"])
+
+
+def test_hit_ristampa_gli_avvisi(tmp_path, capsys):
+    pytest.importorskip("openpyxl")
+    # Tre coppie sulla stessa pagina: sei motori per tre grafici
+    righe = [(f"MC1_A{i}_MC1_B{i}", f"DynamicInterference_{i}", "BOOL", "DB10;BOOL", i, "Wheel1_1") for i in range(3)]
+    excel_path = str(tmp_path / "progetto.xlsx")
+    pd.DataFrame(righe, columns=REQUIRED_COLS).to_excel(excel_path, sheet_name="Variabili", index=False)
+    store = ResultStore(str(tmp_path / "store"))
+
+    def esegui():
+        p = StoreProcessor(excel_path, "Variabili", str(tmp_path / "c.txt"), str(tmp_path / "s.txt"), store=store)
+        p.run()
+        return p, [r for r in capsys.readouterr().out.splitlines() if r.startswith("[WARNING]")]
+
+    miss, avvisi_miss = esegui()
+    hit, avvisi_hit = esegui()
+    assert (miss.esito_store, hit.esito_store) == ("miss", "hit")
+    assert len(avvisi_miss) == 3
+    assert avvisi_hit == avvisi_miss
+    assert hit.stats.charts_skipped == miss.stats.charts_skipped == 3
@@ -0,0 +1,105 @@
+# test_watcher.py
+
+import os
+import threading
+import time
+
+import pytest
+
+from watcher import WorkbookWatcher
+
+INTERVALLO = 0.02
+DEBOUNCE = 0.3
+
+
+@pytest.fixture
+def sorvegliato(tmp_path):
+    """(percorso del foglio, eventi ricevuti, avvia): avvia() crea e avvia il watcher sul foglio."""
+    percorso = tmp_path / "variabili.csv"
+    percorso.write_text("contenuto 0\n", encoding="utf-8")
+    eventi = []
+    evento = threading.Event()
+    watcher = None
+
+    def on_change():
+        eventi.append(time.monotonic())
+        evento.set()
+
+    def avvia():
+        nonlocal watcher
+        watcher = WorkbookWatcher(str(percorso), on_change, intervallo=INTERVALLO, debounce=DEBOUNCE)
+        watcher.start()
+        return evento
+
+    yield percorso, eventi, avvia
+    if watcher is not None:
+        watcher.stop()
+
+
+def attendi_quiete():
+    time.sleep(DEBOUNCE + 10 * INTERVALLO)
+
+
+def test_scritture_ravvicinate_un_solo_evento(sorvegliato):
+    percorso, eventi, avvia = sorvegliato
+    evento = avvia()
+    for n in range(5):
+        percorso.write_text(f"contenuto {n + 1}\n" + "x" * n, encoding="utf-8")
+        ultima_scrittura = time.monotonic()
+        time.sleep(INTERVALLO * 3)
+
+    assert evento.wait(5)
+    attendi_quiete()
+    assert len(eventi) == 1
+    # L'evento parte solo dopo che il file è rimasto invariato per il debounce
+    assert eventi[0] - ultima_scrittura >= DEBOUNCE - INTERVALLO
+
+
+def test_lock_e_temporanei_ignorati(sorvegliato):
+    percorso, eventi, avvia = sorvegliato
+    avvia()
+    cartella = percorso.parent
+    (cartella / f"~${percorso.name}").write_text("lock", encoding="utf-8")
+    (cartella / "A1B2C3D4.tmp").write_text("temporaneo", encoding="utf-8")
+    os.remove(cartella / "A1B2C3D4.tmp")
+    attendi_quiete()
+    assert eventi == []
+
+
+def test_salvataggio_stesso_contenuto_ignorato(sorvegliato):
+    percorso, eventi, avvia = sorvegliato
+    avvia()
+    st = os.stat(percorso)
+    os.utime(percorso, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+    attendi_quiete()
+    assert eventi == []
+
+
+def test_salvataggio_alla_excel(sorvegliato):
+    """Temporaneo scritto, originale eliminato, temporaneo rinominato: un solo evento."""
+    percorso, eventi, avvia = sorvegliato
+    evento = avvia()
+    temporaneo = percorso.parent / "A1B2C3D4.tmp"
+    (percorso.parent / f"~${percorso.name}").write_text("lock", encoding="utf-8")
+    temporaneo.write_text("contenuto nuovo\n", encoding="utf-8")
+    os.remove(percorso)
+    time.sleep(INTERVALLO * 3)
+    os.replace(temporaneo, percorso)
+
+    assert evento.wait(5)
+    attendi_quiete()
+    assert len(eventi) == 1
+
+
+def test_xlsx_incompleto_attende(tmp_path):
+    percorso = tmp_path / "variabili.xlsx"
+    percorso.write_bytes(b"PK incompleto")
+    eventi = []
+    watcher = WorkbookWatcher(str(percorso), lambda: eventi.append(1), intervallo=INTERVALLO, debounce=DEBOUNCE)
+    watcher.start()
+    try:
+        percorso.write_bytes(b"PK ancora incompleto")
+        attendi_quiete()
+        assert eventi == []
+    finally:
+        watcher.stop()
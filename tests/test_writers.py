@@ -0,0 +1,58 @@
+# test_writers.py
+
+import os
+
+import pytest
+
+import writers
+from writers import scrivi_tabella
+
+HEADER = ["pagina", "nome"]
+
+
+def test_scrive_txt_e_formati(tmp_path):
+    path = str(tmp_path / "chart_config.txt")
+    assert scrivi_tabella(path, HEADER, [("P1", "A"), ("P2", "B")], formati=("csv", "jsonl")) == 2
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "pagina\tnome\nP1\tA\nP2\tB\n"
+    assert sorted(os.listdir(tmp_path)) == ["chart_config.csv", "chart_config.jsonl", "chart_config.txt"]
+
+
+def test_errore_di_scrittura_lascia_i_file_esistenti(tmp_path):
+    path = str(tmp_path / "chart_config.txt")
+    scrivi_tabella(path, HEADER, [("P1", "A")], formati=("csv",))
+
+    def righe():
+        yield ("P2", "B")
+        raise RuntimeError("interrotta")
+
+    with pytest.raises(RuntimeError):
+        scrivi_tabella(path, HEADER, righe(), formati=("csv",), batch=1)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "pagina\tnome\nP1\tA\n"
+    assert sorted(os.listdir(tmp_path)) == ["chart_config.csv", "chart_config.txt"]
+
+
+def test_spostamento_fallito_non_lascia_temporanei(tmp_path, monkeypatch):
+    path = str(tmp_path / "chart_config.txt")
+    replace = os.replace
+
+    def replace_csv(src, dst):
+        if dst.endswith(".csv"):
+            raise PermissionError(dst)
+        replace(src, dst)
+
+    monkeypatch.setattr(writers.os, "replace", replace_csv)
+    with pytest.raises(PermissionError):
+        scrivi_tabella(path, HEADER, [("P1", "A")], formati=("csv",))
+    # Il txt è già stato spostato (atomicità per singolo file), nessun temporaneo rimasto
+    assert os.listdir(tmp_path) == ["chart_config.txt"]
+
+
+def test_uscita_senza_scrivi_non_istanziabile(tmp_path):
+    class Incompleta(writers.Uscita):
+        pass
+
+    with pytest.raises(TypeError):
+        Incompleta(str(tmp_path / "chart_config.txt"), HEADER)
+    assert os.listdir(tmp_path) == []
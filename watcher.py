@@ -0,0 +1,104 @@
+# watcher.py
+
+import os
+import threading
+import time
+import zipfile
+
+from cache import WorkbookCache
+
+# =============================================================================
+# CONFIGURAZIONE DI DEFAULT
+# =============================================================================
+DEFAULT_INTERVAL = 0.5  # secondi tra due controlli del file
+DEFAULT_DEBOUNCE = 1.0  # secondi in cui il file deve restare invariato prima di rigenerare
+
+
+class WorkbookWatcher:
+    """
+    Sorveglia un workbook (polling) e chiama on_change() dopo ogni salvataggio.
+    - Excel salva su un file temporaneo, elimina l'originale e rinomina il temporaneo,
+      e tiene aperto un file di lock "~$<nome>": viene controllato solo il percorso
+      del workbook, quindi temporanei e lock non generano eventi
+    - durante il salvataggio il file può mancare o essere incompleto: l'evento parte solo
+      quando dimensione/mtime restano invariati per `debounce` secondi e (per .xlsx)
+      l'archivio zip è leggibile
+    - se il contenuto (hash) non è cambiato rispetto all'ultima rigenerazione,
+      l'evento viene scartato: più scritture dello stesso salvataggio producono un solo run
+    """
+
+    def __init__(self, excel_path: str, on_change, intervallo: float = DEFAULT_INTERVAL,
+                 debounce: float = DEFAULT_DEBOUNCE):
+        self.excel_path = os.path.abspath(excel_path)
+        self.on_change = on_change
+        self.intervallo = intervallo
+        self.debounce = debounce
+        self._stop = threading.Event()
+        self._thread = None
+        self._firma = self.firma()
+        self._hash = self._hash_se_presente()
+
+    def firma(self):
+        """
+        (dimensione, mtime) del workbook, oppure None se al momento non esiste.
+        """
+        try:
+            st = os.stat(self.excel_path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _hash_se_presente(self):
+        try:
+            return WorkbookCache.hash_contenuto(self.excel_path)
+        except OSError:
+            return None
+
+    def completo(self) -> bool:
+        """
+        False se il file è ancora in scrittura (per .xlsx: directory zip non leggibile).
+        """
+        if os.path.splitext(self.excel_path)[1].lower() in (".xlsx", ".xlsm"):
+            try:
+                return zipfile.is_zipfile(self.excel_path)
+            except OSError:
+                return False
+        return True
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._ciclo, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _ciclo(self):
+        candidata, dal = None, 0.0
+        while not self._stop.wait(self.intervallo):
+            firma = self.firma()
+            if firma is None or firma == self._firma:
+                candidata = None
+                continue
+            if firma != candidata:
+                # Nuova modifica: si attende che il file resti stabile
+                candidata, dal = firma, time.monotonic()
+                continue
+            if time.monotonic() - dal < self.debounce or not self.completo():
+                continue
+
+            candidata = None
+            self._firma = firma
+            nuovo_hash = self._hash_se_presente()
+            if nuovo_hash is None or nuovo_hash == self._hash:
+                continue
+            self._hash = nuovo_hash
+            try:
+                self.on_change()
+            except Exception as e:
+                print(f"[WARNING] Rigenerazione fallita: {e}")
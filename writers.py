@@ -0,0 +1,198 @@
+# writers.py
+
+import csv
+import importlib.util
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from itertools import islice
+from json.encoder import encode_basestring
+
+# =============================================================================
+# CONFIGURAZIONE DI DEFAULT
+# =============================================================================
+# Formati aggiuntivi scritti accanto al file di testo (stesso nome, estensione del formato)
+OUTPUT_FORMATS = ("csv", "jsonl", "parquet")
+BATCH_ROWS = 2_000               # righe per blocco: oltre, il costo del garbage collector supera il guadagno
+BUFFER_BYTES = 1024 * 1024       # buffer dei file di testo
+FILE_MODE = 0o644                # permessi dei file nuovi (mkstemp crea file 0600)
+
+
+def verifica_formati(formati) -> tuple:
+    """
+    Normalizza la lista dei formati aggiuntivi (None = nessuno) e verifica che siano scrivibili.
+    """
+    formati = tuple(dict.fromkeys(f.lower() for f in (formati or ())))
+    sconosciuti = [f for f in formati if f not in OUTPUT_FORMATS]
+    if sconosciuti:
+        raise ValueError(f"Formati di output non supportati: {sconosciuti}. Usa tra {list(OUTPUT_FORMATS)}")
+    if "parquet" in formati and importlib.util.find_spec("pyarrow") is None:
+        raise RuntimeError("Il formato parquet richiede pyarrow (pip install pyarrow)")
+    return formati
+
+
+def percorso_formato(path: str, formato: str) -> str:
+    """
+    File del formato aggiuntivo: chart_config.txt -> chart_config.csv / .jsonl / .parquet
+    """
+    return os.path.splitext(path)[0] + "." + formato
+
+
+class Uscita(ABC):
+    """
+    File di output scritto su un temporaneo nella stessa cartella:
+    conferma() lo sposta al suo posto con os.replace (atomico), scarta() lo elimina.
+    Un'elaborazione interrotta non lascia mai un file scritto a metà.
+    Le sottoclassi implementano scrivi() e, se serve, apri()/chiudi().
+    """
+
+    def __init__(self, path: str, header: list):
+        self.path = path
+        self.header = header
+        cartella = os.path.dirname(os.path.abspath(path))
+        fd, self.tmp = tempfile.mkstemp(dir=cartella, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            self.apri()
+        except BaseException:
+            os.remove(self.tmp)
+            raise
+
+    def apri(self):
+        pass
+
+    @abstractmethod
+    def scrivi(self, righe: list):
+        """Scrive un blocco di righe (liste di campi testuali) nel temporaneo."""
+
+    def chiudi(self):
+        pass
+
+    def conferma(self):
+        self.chiudi()
+        # Come open(path, "w"): un file già esistente mantiene i suoi permessi
+        try:
+            modo = os.stat(self.path).st_mode & 0o7777
+        except OSError:
+            modo = FILE_MODE
+        os.chmod(self.tmp, modo)
+        os.replace(self.tmp, self.path)
+
+    def scarta(self):
+        try:
+            self.chiudi()
+        finally:
+            if os.path.exists(self.tmp):
+                os.remove(self.tmp)
+
+
+class UscitaTesto(Uscita):
+    """
+    Testo tab-separated (formato storico di chart_config.txt / interferences_summary.txt).
+    """
+
+    def apri(self):
+        self.f = open(self.tmp, "w", encoding="utf-8", buffering=BUFFER_BYTES)
+        self.f.write("\t".join(self.header) + "\n")
+
+    def scrivi(self, righe: list):
+        self.f.write("".join("\t".join(campi) + "\n" for campi in righe))
+
+    def chiudi(self):
+        self.f.close()
+
+
+class UscitaCsv(UscitaTesto):
+    def apri(self):
+        self.f = open(self.tmp, "w", encoding="utf-8", newline="", buffering=BUFFER_BYTES)
+        self.writer = csv.writer(self.f)
+        self.writer.writerow(self.header)
+
+    def scrivi(self, righe: list):
+        self.writer.writerows(righe)
+
+
+class UscitaJsonl(UscitaTesto):
+    """
+    Un oggetto JSON per riga, con le colonne dell'header come chiavi.
+    """
+
+    def apri(self):
+        self.f = open(self.tmp, "w", encoding="utf-8", buffering=BUFFER_BYTES)
+        # Chiavi codificate una sola volta: stessa riga di json.dumps(dict(...), ensure_ascii=False)
+        self.modello = "{" + ", ".join(
+            encode_basestring(nome).replace("%", "%%") + ": %s" for nome in self.header
+        ) + "}\n"
+
+    def scrivi(self, righe: list):
+        modello = self.modello
+        self.f.write("".join(modello % tuple(map(encode_basestring, campi)) for campi in righe))
+
+
+class UscitaParquet(Uscita):
+    """
+    Parquet con tutte le colonne di tipo stringa, un row group per batch (richiede pyarrow).
+    """
+
+    def apri(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([(nome, pa.string()) for nome in self.header])
+        self.writer = pq.ParquetWriter(self.tmp, self.schema)
+
+    def scrivi(self, righe: list):
+        colonne = list(zip(*righe))
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(c, type=self.pa.string()) for c in colonne], schema=self.schema
+        ))
+
+    def chiudi(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+USCITE = {"txt": UscitaTesto, "csv": UscitaCsv, "jsonl": UscitaJsonl, "parquet": UscitaParquet}
+
+
+def scrivi_tabella(path: str, header: list, righe, formati=(), batch: int = BATCH_ROWS) -> int:
+    """
+    Scrive in un solo passaggio il file di testo `path` e gli eventuali formati aggiuntivi.
+    - righe: iterabile di tuple/liste di stringhe (es. RigaChart.campi()), consumato a blocchi di `batch`
+    - ogni file viene scritto su un temporaneo e spostato al suo posto solo quando tutti
+      i formati sono stati scritti e chiusi; un errore di scrittura lascia intatti i file esistenti
+    - lo spostamento è atomico per singolo file, non per l'insieme dei formati: se fallisce
+      quello di un formato (es. permessi), i formati già spostati restano aggiornati;
+      in ogni caso non restano file temporanei
+    Restituisce il numero di righe scritte.
+    """
+    percorsi = [("txt", path)] + [
+        (f, percorso_formato(path, f)) for f in formati if percorso_formato(path, f) != path
+    ]
+    uscite = []
+    confermate = 0
+    try:
+        for formato, percorso in percorsi:
+            uscite.append(USCITE[formato](percorso, header))
+        righe = iter(righe)
+        totale = 0
+        while True:
+            blocco = list(islice(righe, batch))
+            if not blocco:
+                break
+            for u in uscite:
+                u.scrivi(blocco)
+            totale += len(blocco)
+        # Errori di chiusura (flush su disco pieno, footer parquet) prima di spostare qualunque file
+        for u in uscite:
+            u.chiudi()
+        for u in uscite:
+            u.conferma()
+            confermate += 1
+    except BaseException:
+        for u in uscite[confermate:]:
+            u.scarta()
+        raise
+    return totale
@@ -0,0 +1,121 @@
+# zones.py
+
+import re
+from functools import lru_cache
+
+# =============================================================================
+# CONFIGURAZIONE DI DEFAULT
+# =============================================================================
+DEFAULT_ZONE_ORDER = [
+    "Infeed",
+    "Wheel1",
+    "Wheel2",
+    "Wheel3",
+    "Exit",
+    "Stamp",
+    "InnerLiner",
+    "OuterLiner",
+]
+# Nomi pagina memorizzati per classificatore: oltre, la memo viene svuotata
+# (il servizio daemon.py vive a lungo e vede nomi pagina sempre nuovi)
+MEMO_MAX_PAGES = 100_000
+
+
+class ZoneClassifier:
+    """
+    Classificatore delle pagine ("New Page") per un ordine di zone fissato.
+    Restituisce gli stessi (zone_idx, index_num) della logica originale:
+    - la zona è la prima di zone_order contenuta nel nome pagina (confronto case-insensitive)
+    - l'indice è il numero che segue la zona (eventuale separatore "_" o "-"), altrimenti 1
+    - pagina senza alcuna zona => (len(zone_order), 1)
+    Le zone sono cercate con un'unica alternation precompilata; il risultato
+    è memorizzato per nome pagina (la stessa pagina si ripete per ogni motore),
+    fino a MEMO_MAX_PAGES nomi.
+    Non dipende da pandas: è utilizzabile anche dalla GUI per le anteprime di ordinamento.
+    """
+
+    def __init__(self, zone_order):
+        self.zone = tuple(zone_order)
+        self._zone_lower = [z.lower() for z in self.zone]
+        # Alternation letterale delle zone, nell'ordine di priorità
+        self._alternation = re.compile("|".join(
+            f"(?P<z{i}>{re.escape(z)})" for i, z in enumerate(self._zone_lower)
+        ))
+        self._regex_indice = {}  # zone_idx -> regex compilata (solo per le zone effettivamente incontrate)
+        self._memo = {}          # nome pagina -> (zone_idx, index_num)
+
+    def __len__(self):
+        return len(self.zone)
+
+    def _zona(self, p_lower: str):
+        """
+        Indice della prima zona (in ordine di priorità) contenuta in p_lower, oppure None.
+        L'alternation trova la zona più a sinistra nel testo: basta poi verificare
+        che nessuna zona con priorità maggiore compaia altrove.
+        """
+        match = self._alternation.search(p_lower)
+        if match is None:
+            return None
+        trovata = int(match.lastgroup[1:])
+        for idx in range(trovata):
+            if self._zone_lower[idx] in p_lower:
+                return idx
+        return trovata
+
+    def _indice(self, idx: int, p_lower: str) -> int:
+        regex = self._regex_indice.get(idx)
+        if regex is None:
+            regex = regex_indice(self._zone_lower[idx])
+            self._regex_indice[idx] = regex
+        return numero_pagina(regex, p_lower)
+
+    def classifica(self, page_name: str):
+        """
+        Restituisce (zone_idx, index_num) per il nome pagina.
+        """
+        risultato = self._memo.get(page_name)
+        if risultato is None:
+            p_lower = page_name.lower()
+            idx = self._zona(p_lower)
+            if idx is None:
+                risultato = (len(self.zone), 1)
+            else:
+                risultato = (idx, self._indice(idx, p_lower))
+            if len(self._memo) >= MEMO_MAX_PAGES:
+                self._memo.clear()
+            self._memo[page_name] = risultato
+        return risultato
+
+
+def regex_indice(zona_lower: str):
+    """
+    Regex del numero che segue la zona nel nome pagina ("Wheel1_2", "wheel1-2", "Wheel12").
+    Come nella versione originale il nome zona è usato così com'è nel pattern.
+    """
+    return re.compile(rf"{zona_lower}[_\-]?(\d+)", re.IGNORECASE)
+
+
+def numero_pagina(regex, p_lower: str) -> int:
+    """
+    Numero della pagina trovato da regex_indice, altrimenti 1.
+    """
+    match = regex.search(p_lower)
+    if match:
+        try:
+            return int(match.group(1))
+        except ValueError:
+            return 1
+    return 1
+
+
+@lru_cache(maxsize=32)
+def _classificatore(zone: tuple) -> ZoneClassifier:
+    return ZoneClassifier(zone)
+
+
+def classificatore_zone(zone_order) -> ZoneClassifier:
+    """
+    Restituisce un ZoneClassifier condiviso per l'ordine di zone indicato
+    (la memo delle pagine resta valida tra un'elaborazione e l'altra).
+    """
+    return _classificatore(tuple(zone_order))